@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# Runs many independent Lox scripts across a pool of worker processes, so
+# Python starts and imports pylox once per worker instead of once per script.
+# Every script gets a fresh interpreter. Its output, errors, exit status (0,
+# 65, 70 or 1, as pylox would exit) and time are reported as one JSON line
+# per script, or as a single JSON document with --json. Where pylox would
+# print a Python traceback, the error is the exception's one-line message.
+#
+#   python batch.py [--workers N] [--jsonl FILE | --json FILE] scripts/ 'tests/**/*.lox' ...
+import sys
+import argparse
+import glob
+import json
+import os
+import time
+from lox import *
+
+
+class ArgumentParser(argparse.ArgumentParser):
+  def error(self, message: str) -> None:
+    self.print_usage(sys.stderr)
+    print(f"{self.prog}: error: {message}", file=sys.stderr)
+    sys.exit(64)
+
+
+def expand(pattern: str) -> list:
+  # A directory stands for every .lox file below it, and a pattern with
+  # wildcards for the files it matches; anything else is taken as a path.
+  if os.path.isdir(pattern):
+    return sorted(glob.glob(os.path.join(pattern, "**", "*.lox"), recursive=True))
+  if glob.has_magic(pattern):
+    return sorted(glob.glob(pattern, recursive=True))
+  return [pattern]
+
+
+def main(argv) -> None:
+  parser = ArgumentParser(prog="batch")
+  parser.add_argument("scripts", nargs="*",
+                      help="scripts, directories of scripts or glob patterns to run")
+  parser.add_argument("--from", dest="lists", action="append", default=[], metavar="FILE",
+                      help="also run the scripts listed in FILE, one per line ('-' for stdin)")
+  parser.add_argument("--engine", choices=ENGINES, default="tree",
+                      help="execution engine every script is run with")
+  parser.add_argument("--no-optimize", dest="optimize", action="store_false",
+                      help="skip constant folding and dead branch removal")
+  parser.add_argument("--no-cache", dest="cache", action="store_false",
+                      help="always parse scripts instead of loading them from the parse cache")
+  parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, metavar="N",
+                      help="worker processes to run scripts in (default: one per CPU)")
+  parser.add_argument("--max-steps", type=int, metavar="N",
+                      help="stop a script after it has executed N statements and calls (tree engine only)")
+  parser.add_argument("--timeout", type=float, metavar="SECONDS",
+                      help="stop a script that runs for longer than SECONDS (tree engine only)")
+  parser.add_argument("--max-depth", type=int, metavar="N",
+                      help="stop a script that nests more than N calls (tree engine only)")
+  parser.add_argument("--max-memory", type=int, metavar="BYTES",
+                      help="stop a script holding more than about BYTES in strings and frames (tree engine only)")
+  report = parser.add_mutually_exclusive_group()
+  report.add_argument("--jsonl", metavar="FILE",
+                      help="write one JSON line per script to FILE as results come in (default: stdout)")
+  report.add_argument("--json", metavar="FILE",
+                      help="write a single JSON document with a summary and every result to FILE")
+  args = parser.parse_args(argv[1:])
+  if args.workers < 1: parser.error("--workers must be at least 1")
+  budget = None
+  if (args.max_steps, args.timeout, args.max_depth, args.max_memory) != (None,) * 4:
+    if args.engine != "tree": parser.error("budgets only work with --engine tree")
+    budget = Budget(args.max_steps, args.timeout, args.max_depth, args.max_memory)
+
+  paths = []
+  for pattern in args.scripts:
+    matches = expand(pattern)
+    if not matches: parser.error(f"no scripts match {pattern}")
+    paths.extend(matches)
+  for name in args.lists:
+    with (sys.stdin if name == "-" else open(name, "r")) as f:
+      paths.extend(line.strip() for line in f if line.strip())
+  if not paths: parser.error("no scripts to run")
+
+  destination = args.json if args.json != None else args.jsonl
+  stream = open(destination, "w") if destination != None else sys.stdout
+  results = []
+  counts = {}
+  script_seconds = 0.0
+  start = time.perf_counter()
+  try:
+    for result in run_batch(paths, args.engine, args.optimize, args.cache, args.workers, budget):
+      counts[result["exit_code"]] = counts.get(result["exit_code"], 0) + 1
+      script_seconds += result["seconds"]
+      if args.json != None:
+        results.append(result)
+      else:
+        stream.write(json.dumps(result) + "\n")
+    seconds = time.perf_counter() - start
+
+    summary = {"scripts": len(paths), "exit_codes": {str(code): counts[code] for code in sorted(counts)},
+               "seconds": seconds, "script_seconds": script_seconds, "workers": args.workers,
+               "engine": args.engine}
+    if args.json != None:
+      json.dump(dict(summary, results=results), stream, indent=2)
+      stream.write("\n")
+  finally:
+    if stream is not sys.stdout: stream.close()
+
+  failed = len(paths) - counts.get(0, 0)
+  print(f"[batch] {len(paths)} scripts, {failed} failed, in {seconds:.3f}s "
+        f"({script_seconds:.3f}s running scripts on {args.workers} workers)", file=sys.stderr)
+  # Like make, fail the batch as a whole if any script failed.
+  sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+  main(sys.argv)
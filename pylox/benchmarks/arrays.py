@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# Computes the same dot product and element-wise update of two large arrays
+# with a Lox loop over get() and set(), and with the bulk natives, on every
+# engine. Run it once with NumPy installed and once without to compare the
+# two kinds of storage.
+#
+#   python benchmarks/arrays.py [size]
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lox import ENGINES, ErrorReporter, OutputSink, reporting, create_interpreter, parse_source
+from lox import arrays
+
+SETUP = '''
+var n = {size};
+var a = array(n);
+var b = array(n);
+for (var i = 0; i < n; i = i + 1) {{
+  set(a, i, i);
+  set(b, i, n - i);
+}}
+var start = clock();
+'''
+
+PROGRAMS = {
+  'loop': '''
+    var total = 0;
+    for (var i = 0; i < n; i = i + 1) total = total + get(a, i) * get(b, i);
+    for (var i = 0; i < n; i = i + 1) set(a, i, get(a, i) * 2 + get(b, i));
+    print total + sum(a);
+    print clock() - start;
+  ''',
+  'bulk': '''
+    var total = dot(a, b);
+    a = add(multiply(a, 2), b);
+    print total + sum(a);
+    print clock() - start;
+  '''
+}
+
+
+def run(engine: str, source: str) -> tuple:
+  # The program prints its result and then the seconds it took after setup.
+  with reporting(ErrorReporter()) as errors:
+    output = io.StringIO()
+    interpreter = create_interpreter(engine, OutputSink(output, 'exit'))
+    interpreter.interpret(parse_source(source, interpreter))
+  if errors.had_error or errors.had_runtime_error: raise RuntimeError('the program failed')
+  result, elapsed = output.getvalue().split()
+  return float(elapsed), result
+
+
+def main(argv) -> None:
+  size = int(argv[1]) if len(argv) > 1 else 100000
+  setup = SETUP.format(size=size)
+
+  print(f'{size:,} elements, stored with {"NumPy" if arrays.numpy != None else "array.array"}')
+  print(f'{"engine":<10}{"loop":>10}{"bulk":>10}{"speedup":>10}')
+  for engine in ENGINES:
+    loop, expected = run(engine, setup + PROGRAMS['loop'])
+    bulk, output = run(engine, setup + PROGRAMS['bulk'])
+    if output != expected: raise AssertionError(f'{engine}: {output!r} != {expected!r}')
+    print(f'{engine:<10}{loop:>9.3f}s{bulk:>9.4f}s{loop / max(bulk, 1e-6):>9.0f}x')
+
+
+if __name__ == '__main__':
+  main(sys.argv)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# Compares the memory held by a parsed program (tokens, AST nodes, lexemes)
+# using the slotted node classes and interned identifiers, against the same
+# tree rebuilt the way it used to be stored: one __dict__ per token and node,
+# and a separate string for every identifier occurrence.
+#
+#   python benchmarks/ast_memory.py [functions]
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lox import Expr, Stmt, Token, RegexScanner, Parser
+
+TEMPLATE = '''
+fun accumulate{n}(limit, step) {{
+  var total = 0;
+  for (var index = 0; index < limit; index = index + step) {{
+    if (index / 2 == 0 or total > limit) total = total - index;
+    else total = total + index * step;
+  }}
+  return total;
+}}
+print accumulate{n}(10, 1) + {n};
+'''
+
+
+class DictNode:
+  pass
+
+
+def unshared(text: str) -> str:
+  # A copy that doesn't share storage with the original, like a substring.
+  return text.encode().decode()
+
+
+def with_dicts(value, copies):
+  # Rebuilds a tree as plain __dict__ objects, copying every token, node,
+  # list and lexeme so nothing is shared with the slotted original.
+  if id(value) in copies: return copies[id(value)]
+
+  if isinstance(value, list):
+    copy = [with_dicts(item, copies) for item in value]
+  elif isinstance(value, (Expr, Stmt, Token)):
+    copy = DictNode()
+    copies[id(value)] = copy
+    for name in type(value).__slots__:
+      setattr(copy, name, with_dicts(getattr(value, name), copies))
+    if isinstance(value, Token): copy.lexeme = unshared(value.lexeme)
+  elif isinstance(value, float):
+    copy = value + 0.0
+  else:
+    copy = value
+  copies[id(value)] = copy
+  return copy
+
+
+def traced(build):
+  gc.collect()
+  tracemalloc.start()
+  result = build()
+  gc.collect()
+  size, _ = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  return result, size
+
+
+def count(value, seen, kinds):
+  if id(value) in seen: return
+  seen.add(id(value))
+  if isinstance(value, list):
+    for item in value: count(item, seen, kinds)
+  elif isinstance(value, (Expr, Stmt, Token)):
+    kinds['tokens' if isinstance(value, Token) else 'nodes'] += 1
+    for name in type(value).__slots__:
+      count(getattr(value, name), seen, kinds)
+
+
+def main(argv) -> None:
+  functions = int(argv[1]) if len(argv) > 1 else 2000
+  source = ''.join(TEMPLATE.format(n=n) for n in range(functions))
+
+  statements, slotted = traced(lambda: Parser(RegexScanner(source).scan_tokens()).parse())
+  _, dicts = traced(lambda: with_dicts(statements, {}))
+
+  kinds = {'nodes': 0, 'tokens': 0}
+  count(statements, set(), kinds)
+  objects = kinds['nodes'] + kinds['tokens']
+
+  print(f'{len(source):,} characters, {kinds["nodes"]:,} nodes, {kinds["tokens"]:,} tokens kept by the tree')
+  print(f'{"layout":<24}{"bytes":>14}{"bytes/object":>14}')
+  for label, size in [('__dict__, copied names', dicts), ('__slots__, interned', slotted)]:
+    print(f'{label:<24}{size:>14,}{size / objects:>14.1f}')
+  print(f'reduction: {dicts / slotted:.2f}x')
+
+
+if __name__ == '__main__':
+  main(sys.argv)
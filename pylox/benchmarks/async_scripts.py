@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# Runs hundreds of scripts that each wait on a slow native a few times, one
+# after another on the vm engine with a blocking native, and all at once on
+# one event loop with the async engine, and reports scripts per second. Then
+# checks fairness: how long the waiting scripts take while a busy script
+# shares the loop with them, for a few time slices.
+#
+#   python benchmarks/async_scripts.py [scripts] [delay]
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lox import LoxSession
+
+SCRIPT = '''
+var total = 0;
+for (var i = 0; i < 3; i = i + 1) {{
+  sleep({delay});
+  for (var j = 0; j < 200; j = j + 1) total = total + j;
+}}
+print total;
+'''
+
+BUSY = '''
+var i = 0;
+while (i < 2000000) i = i + 1;
+print i;
+'''
+
+
+def blocking(count: int, delay: float) -> float:
+  script = SCRIPT.format(delay=delay)
+  start = time.perf_counter()
+  for _ in range(count):
+    session = LoxSession('vm')
+    session.define_native('sleep', 1, time.sleep)
+    if not session.run(script).ok: raise RuntimeError('the script failed')
+  return time.perf_counter() - start
+
+
+async def concurrent(count: int, delay: float) -> float:
+  script = SCRIPT.format(delay=delay)
+  start = time.perf_counter()
+  results = await asyncio.gather(*(LoxSession('async').run_async(script) for _ in range(count)))
+  if not all(result.ok for result in results): raise RuntimeError('a script failed')
+  return time.perf_counter() - start
+
+
+async def beside_busy(count: int, delay: float, time_slice: int) -> float:
+  # How long the waiting scripts take with a busy script running alongside.
+  busy = LoxSession('async')
+  busy.interpreter.time_slice = time_slice
+  task = asyncio.ensure_future(busy.run_async(BUSY))
+  await asyncio.sleep(0)
+  elapsed = await concurrent(count, delay)
+  await task
+  return elapsed
+
+
+def main(argv) -> None:
+  count = int(argv[1]) if len(argv) > 1 else 300
+  delay = float(argv[2]) if len(argv) > 2 else 0.01
+
+  print(f'{count} scripts, each waiting 3 x {delay}s')
+  sequential = blocking(count, delay)
+  print(f'{"vm, one at a time":<28}{count / sequential:>10,.0f} scripts/s')
+  together = asyncio.run(concurrent(count, delay))
+  print(f'{"async, all at once":<28}{count / together:>10,.0f} scripts/s{sequential / together:>8.1f}x')
+
+  print(f'alongside a busy script ({count} scripts alone: {together:.3f}s)')
+  for time_slice in (100, 1000, 10000, 100000):
+    elapsed = asyncio.run(beside_busy(count, delay, time_slice))
+    print(f'{"time slice " + str(time_slice):<28}{elapsed:>10.3f}s')
+
+
+if __name__ == '__main__':
+  main(sys.argv)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# Runs the same small scripts once with a pylox.py process per script, as a
+# shell loop would, and once through batch.py's pool of workers, and reports
+# scripts per second for both.
+#
+#   python benchmarks/batch.py [scripts] [workers]
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lox import run_batch
+
+SCRIPT = '''
+var total = 0;
+for (var i = 0; i < 100; i = i + 1) total = total + i * {n};
+print total;
+'''
+
+
+def main(argv) -> None:
+  count = int(argv[1]) if len(argv) > 1 else 200
+  workers = int(argv[2]) if len(argv) > 2 else os.cpu_count() or 1
+
+  with tempfile.TemporaryDirectory() as directory:
+    paths = []
+    for n in range(count):
+      paths.append(os.path.join(directory, f'script{n}.lox'))
+      with open(paths[-1], 'w') as f:
+        f.write(SCRIPT.format(n=n))
+
+    start = time.perf_counter()
+    expected = [subprocess.run([sys.executable, os.path.join(ROOT, 'pylox.py'), '--no-cache', path],
+                               capture_output=True, text=True).stdout for path in paths]
+    processes = time.perf_counter() - start
+
+    start = time.perf_counter()
+    outputs = [result['stdout'] for result in run_batch(paths, cache=False, workers=workers)]
+    pooled = time.perf_counter() - start
+    if outputs != expected: raise AssertionError('the batch printed something different')
+
+  print(f'{count:,} scripts, {workers} workers')
+  print(f'{"process per script":<20}{count / processes:>10,.0f} scripts/s')
+  print(f'{"batch":<20}{count / pooled:>10,.0f} scripts/s{processes / pooled:>9.1f}x')
+
+
+if __name__ == '__main__':
+  main(sys.argv)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# Measures what execution budgets cost: runs the benchmark programs on the
+# tree-walking interpreter without a budget, with step, time and depth limits
+# (none of them reached), and with a memory limit as well, which also tracks
+# frames and strings.
+#
+#   python benchmarks/budget.py [repeat]
+import glob
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lox import Budget, ErrorReporter, OutputSink, reporting, create_interpreter, parse_source
+
+BUDGETS = {
+  'none': None,
+  'steps+time+depth': Budget(steps=10 ** 12, seconds=3600, depth=10000),
+  'all four': Budget(steps=10 ** 12, seconds=3600, depth=10000, memory=1 << 30)
+}
+
+
+def seconds(source: str, budget: Budget, repeat: int) -> float:
+  best = None
+  for _ in range(repeat):
+    with reporting(ErrorReporter()) as errors:
+      interpreter = create_interpreter('tree', OutputSink(io.StringIO(), 'exit'), budget=budget)
+      statements = parse_source(source, interpreter)
+      start = time.perf_counter()
+      interpreter.interpret(statements)
+      elapsed = time.perf_counter() - start
+    if errors.had_error or errors.had_runtime_error: raise RuntimeError('the program failed')
+    best = elapsed if best == None else min(best, elapsed)
+  return best
+
+
+def main(argv) -> None:
+  repeat = int(argv[1]) if len(argv) > 1 else 3
+
+  print(f'{"program":<14}' + ''.join(f'{name:>18}' for name in BUDGETS))
+  for path in sorted(glob.glob(os.path.join(ROOT, 'benchmarks', 'programs', '*.lox'))):
+    with open(path, 'r') as f:
+      source = f.read()
+    times = [seconds(source, budget, repeat) for budget in BUDGETS.values()]
+    cells = [f'{times[0]:>17.3f}s'] + [f'{elapsed:>11.3f}s {elapsed / times[0]:>4.2f}x' for elapsed in times[1:]]
+    print(f'{os.path.splitext(os.path.basename(path))[0]:<14}' + ''.join(cells))
+
+
+if __name__ == '__main__':
+  main(sys.argv)
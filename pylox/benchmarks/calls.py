@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# Measures call throughput of small Lox functions on the tree-walking
+# interpreter, returning through statement completions as it does now, and
+# through a raised exception caught in the callee's call() as it used to.
+#
+#   python benchmarks/calls.py [calls]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lox import LoxFunction, Frame, parse_source
+from lox.interpreter import Interpreter
+
+PROGRAMS = {
+  # Returns straight from the function body.
+  'add': '''
+    fun add(a, b) { return a + b; }
+    var i = 0;
+    while (i < CALLS) { add(i, 1); i = i + 1; }
+  ''',
+  # Returns from inside a loop and two blocks.
+  'search': '''
+    fun search(n) { for (var i = 0; i < 10; i = i + 1) { if (i == n) { return i; } } }
+    var i = 0;
+    while (i < CALLS) { search(2); i = i + 1; }
+  ''',
+  # Falls off the end of the body.
+  'noop': '''
+    fun noop(a) { a; }
+    var i = 0;
+    while (i < CALLS) { noop(i); i = i + 1; }
+  '''
+}
+
+
+class Return(RuntimeError):
+  def __init__(self, value):
+    self.value = value
+
+
+class RaisingFunction(LoxFunction):
+  def call(self, interpreter, arguments):
+    try:
+      interpreter.execute_block(self.declaration.body, Frame(self.closure, arguments + self.padding))
+    except Return as r:
+      return r.value
+
+
+class RaisingInterpreter(Interpreter):
+  def visit_function_stmt(self, stmt):
+    self.define(stmt, stmt.name, RaisingFunction(stmt, self.environment, self.frame_sizes[stmt]))
+
+  def visit_return_stmt(self, stmt):
+    value = None
+    if stmt.value != None: value = self.evaluate(stmt.value)
+    raise Return(value)
+
+
+def calls_per_second(interpreter_class, source: str, calls: int) -> float:
+  interpreter = interpreter_class()
+  statements = parse_source(source.replace('CALLS', str(calls)), interpreter)
+  start = time.perf_counter()
+  interpreter.interpret(statements)
+  return calls / (time.perf_counter() - start)
+
+
+def main(argv) -> None:
+  calls = int(argv[1]) if len(argv) > 1 else 100000
+
+  print(f'{"function":<10}{"raise calls/s":>16}{"return calls/s":>16}{"speedup":>10}')
+  for name, source in PROGRAMS.items():
+    raising = calls_per_second(RaisingInterpreter, source, calls)
+    returning = calls_per_second(Interpreter, source, calls)
+    print(f'{name:<10}{raising:>16,.0f}{returning:>16,.0f}{returning / raising:>9.2f}x')
+
+
+if __name__ == '__main__':
+  main(sys.argv)
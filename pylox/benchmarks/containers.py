@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# Builds and reads a list and a map of n entries on every engine, once with
+# the native list() and map() and once with the structures Lox code has to
+# build out of closures without them: cons cells for lists and association
+# lists for maps. Reading the i-th cell or looking up a key in those walks
+# from the front, so they are only run up to --closure-size.
+#
+#   python benchmarks/containers.py [--size 1000 ...] [--closure-size 1000] [--engine tree ...]
+import argparse
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lox import ENGINES, ErrorReporter, OutputSink, reporting, create_interpreter, parse_source
+
+NATIVE = '''
+var n = {size};
+var start = clock();
+var items = list();
+for (var i = 0; i < n; i = i + 1) append(items, i);
+var total = 0;
+for (var i = 0; i < n; i = i + 1) total = total + get(items, i);
+var table = map();
+for (var i = 0; i < n; i = i + 1) set(table, i * 7, i);
+for (var i = 0; i < n; i = i + 1) total = total + get(table, i * 7);
+print total;
+print clock() - start;
+'''
+
+CLOSURES = '''
+var n = {size};
+var start = clock();
+fun cons(head, tail) {{
+  fun cell(first) {{
+    if (first) return head;
+    return tail;
+  }}
+  return cell;
+}}
+fun nth(cells, count, i) {{
+  for (var j = count - 1; j > i; j = j - 1) cells = cells(false);
+  return cells(true);
+}}
+fun lookup(entries, key) {{
+  while (entries != nil) {{
+    var entry = entries(true);
+    if (entry(true) == key) return entry(false);
+    entries = entries(false);
+  }}
+  return nil;
+}}
+var items = nil;
+for (var i = 0; i < n; i = i + 1) items = cons(i, items);
+var total = 0;
+for (var i = 0; i < n; i = i + 1) total = total + nth(items, n, i);
+var table = nil;
+for (var i = 0; i < n; i = i + 1) table = cons(cons(i * 7, i), table);
+for (var i = 0; i < n; i = i + 1) total = total + lookup(table, i * 7);
+print total;
+print clock() - start;
+'''
+
+
+def run(engine: str, source: str) -> tuple:
+  # The program prints its result and then the seconds it took.
+  with reporting(ErrorReporter()) as errors:
+    output = io.StringIO()
+    interpreter = create_interpreter(engine, OutputSink(output, 'exit'))
+    interpreter.interpret(parse_source(source, interpreter))
+  if errors.had_error or errors.had_runtime_error: raise RuntimeError('the program failed')
+  result, elapsed = output.getvalue().split()
+  return float(elapsed), result
+
+
+def main(argv) -> None:
+  parser = argparse.ArgumentParser(prog='containers.py')
+  parser.add_argument('--size', type=int, action='append', help='entries in the list and the map (default: 200, 1000, 100000)')
+  parser.add_argument('--closure-size', type=int, default=1000, help='largest size to run with closures')
+  parser.add_argument('--engine', action='append', choices=ENGINES, help='engines to run (default: all)')
+  args = parser.parse_args(argv[1:])
+
+  print(f'{"engine":<10}{"size":>8}{"closures":>12}{"native":>12}{"speedup":>10}')
+  for engine in args.engine or ENGINES:
+    for size in args.size or [200, 1000, 100000]:
+      native, expected = run(engine, NATIVE.format(size=size))
+      if size <= args.closure_size:
+        closures, output = run(engine, CLOSURES.format(size=size))
+        if output != expected: raise AssertionError(f'{engine}: {output!r} != {expected!r}')
+        print(f'{engine:<10}{size:>8}{closures:>11.3f}s{native:>11.3f}s{closures / max(native, 1e-6):>9.0f}x')
+      else:
+        print(f'{engine:<10}{size:>8}{"":>12}{native:>11.3f}s')
+
+
+if __name__ == '__main__':
+  main(sys.argv)
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# Times the same Lox programs on every execution engine and reports the
+# speedup over the tree-walking interpreter.
+#
+#   python benchmarks/engines.py
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lox import run, ENGINES
+
+PROGRAMS = {
+  'fib': '''
+    fun fib(n) { if (n < 2) return n; return fib(n - 1) + fib(n - 2); }
+    print fib(22);
+  ''',
+  'loop': '''
+    var sum = 0;
+    for (var i = 0; i < 200000; i = i + 1) { var j = i * 2; sum = sum + j; }
+    print sum;
+  '''
+}
+
+
+def time_run(source: str, engine: str) -> float:
+  start = time.perf_counter()
+  with redirect_stdout(io.StringIO()):
+    run(source, engine)
+  return time.perf_counter() - start
+
+
+def main() -> None:
+  print(f'{"program":<10}{"engine":<10}{"seconds":>10}{"speedup":>10}')
+  for name, source in PROGRAMS.items():
+    baseline = None
+    for engine in ENGINES:
+      seconds = time_run(source, engine)
+      if baseline == None: baseline = seconds
+      print(f'{name:<10}{engine:<10}{seconds:>10.3f}{baseline / seconds:>9.2f}x')
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# Compares per-call cost of the name-keyed Environment frames with the
+# slot-addressed Frame objects the interpreter uses for locals.
+#
+#   python benchmarks/frames.py [calls]
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lox import Environment, Frame
+
+PARAMS = ['a', 'b', 'c']
+LOCALS = 2
+
+
+def dict_frame(enclosing, arguments):
+  environment = Environment(enclosing)
+  for i, name in enumerate(PARAMS):
+    environment.define(name, arguments[i])
+  for i in range(LOCALS):
+    environment.define(f'local{i}', None)
+  return environment
+
+
+def slot_frame(enclosing, arguments, padding=[None] * LOCALS):
+  return Frame(enclosing, arguments + padding)
+
+
+def bytes_per_call(make_frame, calls: int) -> float:
+  enclosing = Environment()
+  tracemalloc.start()
+  frames = [make_frame(enclosing, [1.0, 2.0, 3.0]) for _ in range(calls)]
+  size, _ = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  # Discount the list holding the frames themselves.
+  return (size - sys.getsizeof(frames)) / calls
+
+
+def calls_per_second(make_frame, calls: int) -> float:
+  enclosing = Environment()
+  arguments = [1.0, 2.0, 3.0]
+  start = time.perf_counter()
+  for _ in range(calls):
+    make_frame(enclosing, list(arguments))
+  return calls / (time.perf_counter() - start)
+
+
+def main(argv) -> None:
+  calls = int(argv[1]) if len(argv) > 1 else 200000
+
+  print(f'{"frame":<12}{"bytes/call":>12}{"calls/s":>14}')
+  for label, make_frame in [('dict', dict_frame), ('slots', slot_frame)]:
+    size = bytes_per_call(make_frame, calls)
+    rate = calls_per_second(make_frame, calls)
+    print(f'{label:<12}{size:>12.1f}{rate:>14,.0f}')
+
+
+if __name__ == '__main__':
+  main(sys.argv)
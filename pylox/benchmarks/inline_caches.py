@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# Measures calls to global functions on the tree-walking interpreter with the
+# call site caches, against looking the callee up and checking it on every
+# call as the interpreter used to.
+#
+#   python benchmarks/inline_caches.py [repeat]
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lox import LoxCallable, LoxRuntimeError, OutputSink, parse_source
+from lox.interpreter import Interpreter
+
+PROGRAMS = {
+  'fib': '''
+    fun fib(n) { if (n < 2) return n; return fib(n - 1) + fib(n - 2); }
+    print fib(21);
+  ''',
+  # The loop counter is a global assigned on every iteration, which must
+  # not invalidate the cached callees.
+  'global loop': '''
+    fun square(x) { return x * x; }
+    fun add(a, b) { return a + b; }
+    var total = 0;
+    for (var i = 0; i < 30000; i = i + 1) total = add(total, square(i));
+    print total;
+  ''',
+  # A global function variable rebound on every iteration; the call site
+  # stops being cached once it has seen both functions.
+  'rebinding': '''
+    fun one() { return 1; }
+    fun two() { return 2; }
+    var f = one;
+    var total = 0;
+    for (var i = 0; i < 30000; i = i + 1) {
+      total = total + f();
+      if (f == one) f = two; else f = one;
+    }
+    print total;
+  '''
+}
+
+
+class UncachedInterpreter(Interpreter):
+  def evaluate_call(self, expr):
+    callee = self.evaluate(expr.callee)
+
+    arguments = []
+    for argument in expr.arguments:
+      arguments.append(self.evaluate(argument))
+
+    if not isinstance(callee, LoxCallable):
+      raise LoxRuntimeError(expr.paren, "Can only call functions and classes.")
+
+    fn: LoxCallable = callee
+    if len(arguments) != fn.arity():
+      raise LoxRuntimeError(expr.paren, f'Expected {fn.arity()} arguments but got {len(arguments)}.')
+    return fn, arguments
+
+
+def seconds(interpreter_class, source: str, repeat: int) -> float:
+  best = None
+  for _ in range(repeat):
+    interpreter = interpreter_class(OutputSink(io.StringIO(), 'exit'))
+    statements = parse_source(source, interpreter)
+    start = time.perf_counter()
+    interpreter.interpret(statements)
+    elapsed = time.perf_counter() - start
+    best = elapsed if best == None else min(best, elapsed)
+  return best
+
+
+def main(argv) -> None:
+  repeat = int(argv[1]) if len(argv) > 1 else 3
+
+  print(f'{"program":<14}{"uncached s":>12}{"cached s":>12}{"speedup":>10}')
+  for name, source in PROGRAMS.items():
+    uncached = seconds(UncachedInterpreter, source, repeat)
+    cached = seconds(Interpreter, source, repeat)
+    print(f'{name:<14}{uncached:>12.3f}{cached:>12.3f}{uncached / cached:>9.2f}x')
+
+
+if __name__ == '__main__':
+  main(sys.argv)
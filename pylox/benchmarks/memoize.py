@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# Times recursive pure functions on the tree-walking interpreter with and
+# without memoization of pure functions, and shows the memo statistics.
+#
+#   python benchmarks/memoize.py [memo size]
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lox import Memo, OutputSink, parse_source, create_interpreter
+
+PROGRAMS = {
+  # Exponentially many repeated calls.
+  'fib': '''
+    fun fib(n) { if (n < 2) return n; return fib(n - 1) + fib(n - 2); }
+    print fib(24);
+  ''',
+  # Ways to climb n stairs taking 1, 2 or 3 steps, a DP recurrence.
+  'stairs': '''
+    fun stairs(n) {
+      if (n < 0) return 0;
+      if (n == 0) return 1;
+      return stairs(n - 1) + stairs(n - 2) + stairs(n - 3);
+    }
+    print stairs(18);
+  ''',
+  # Pure, but never called twice with the same arguments.
+  'sum': '''
+    fun square(x) { return x * x; }
+    var total = 0;
+    for (var i = 0; i < 30000; i = i + 1) total = total + square(i);
+    print total;
+  '''
+}
+
+
+def seconds(source: str, memo: Memo) -> float:
+  interpreter = create_interpreter('tree', OutputSink(io.StringIO(), 'exit'), memo=memo)
+  statements = parse_source(source, interpreter)
+  start = time.perf_counter()
+  interpreter.interpret(statements)
+  return time.perf_counter() - start
+
+
+def main(argv) -> None:
+  size = int(argv[1]) if len(argv) > 1 else 1024
+
+  print(f'{"program":<10}{"plain s":>10}{"memo s":>10}{"speedup":>10}  statistics')
+  for name, source in PROGRAMS.items():
+    memo = Memo(size)
+    plain = seconds(source, None)
+    memoized = seconds(source, memo)
+    statistics = '; '.join(memo.report().split('\n')[1:])
+    print(f'{name:<10}{plain:>10.3f}{memoized:>10.3f}{plain / memoized:>9.1f}x  {statistics}')
+
+
+if __name__ == '__main__':
+  main(sys.argv)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# Measures how fast a Lox program can print, writing through the
+# interpreter's OutputSink under each flush policy, against calling print()
+# once per Lox print statement as the interpreter used to. The output goes to
+# a temporary file opened two ways: line buffered, as stdout is on a
+# terminal, and block buffered, as it is when redirected.
+#
+#   python benchmarks/output.py [lines]
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lox import OutputSink, parse_source
+from lox.interpreter import Interpreter
+
+SOURCE = '''
+var i = 0;
+while (i < LINES) { print i; i = i + 1; }
+'''
+
+
+class PrintingInterpreter(Interpreter):
+  def visit_print_stmt(self, stmt):
+    print(self.stringify(self.evaluate(stmt.expression)))
+
+
+def seconds(path: str, line_buffering: bool, lines: int, policy: str) -> float:
+  with open(path, 'w') as f:
+    stream = io.TextIOWrapper(f.buffer, line_buffering=line_buffering)
+    if policy == None:
+      interpreter = PrintingInterpreter()
+    else:
+      interpreter = Interpreter(OutputSink(stream, policy))
+    statements = parse_source(SOURCE.replace('LINES', str(lines)), interpreter)
+
+    stdout = sys.stdout
+    sys.stdout = stream
+    try:
+      start = time.perf_counter()
+      interpreter.interpret(statements)
+      stream.flush()
+      elapsed = time.perf_counter() - start
+    finally:
+      sys.stdout = stdout
+      stream.detach()
+  return elapsed
+
+
+def main(argv) -> None:
+  lines = int(argv[1]) if len(argv) > 1 else 200000
+
+  with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, 'output.txt')
+    print(f'{lines:,} lines')
+    print(f'{"stream":<16}{"writer":<16}{"seconds":>10}{"lines/s":>14}')
+    for line_buffering, label in [(True, 'line buffered'), (False, 'block buffered')]:
+      for policy in [None, 'line', 'size', 'exit']:
+        elapsed = seconds(path, line_buffering, lines, policy)
+        writer = 'print()' if policy == None else f'sink, {policy}'
+        print(f'{label:<16}{writer:<16}{elapsed:>10.2f}{lines / elapsed:>14,.0f}')
+
+
+if __name__ == '__main__':
+  main(sys.argv)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# Builds strings of growing size with `s = s + piece;` in a loop on every
+# engine, with + making ropes and with + copying the whole string every time
+# as it used to. Copying is quadratic, so it is only run up to --flat-mb.
+#
+#   python benchmarks/ropes.py [--mb 1 --mb 10 ...] [--flat-mb 2] [--engine tree ...]
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lox.rope
+from lox import ENGINES, ErrorReporter, OutputSink, reporting, create_interpreter, parse_source
+
+PIECE = 'the quick brown fox jumps over the lazy dog, again and again.\n'
+
+PROGRAM = '''
+var piece = "{piece}";
+var text = "";
+for (var i = 0; i < {count}; i = i + 1) text = text + piece;
+print text == text + "";
+'''
+
+
+def seconds(engine: str, megabytes: float, ropes: bool) -> float:
+  count = int(megabytes * (1 << 20) / len(PIECE))
+  source = PROGRAM.format(piece=PIECE.replace('\n', ' '), count=count)
+  threshold = lox.rope.ROPE_THRESHOLD
+  lox.rope.ROPE_THRESHOLD = threshold if ropes else sys.maxsize
+  try:
+    with reporting(ErrorReporter()) as errors:
+      output = io.StringIO()
+      interpreter = create_interpreter(engine, OutputSink(output, 'exit'))
+      statements = parse_source(source, interpreter)
+      start = time.perf_counter()
+      interpreter.interpret(statements)
+      elapsed = time.perf_counter() - start
+  finally:
+    lox.rope.ROPE_THRESHOLD = threshold
+  if errors.had_error or errors.had_runtime_error or output.getvalue() != 'true\n':
+    raise RuntimeError('the program failed')
+  return elapsed
+
+
+def main(argv) -> None:
+  parser = argparse.ArgumentParser(prog='ropes.py')
+  parser.add_argument('--mb', type=float, action='append', help='string sizes in MB (default: 1, 2, 10)')
+  parser.add_argument('--flat-mb', type=float, default=2, help='largest size to build by copying')
+  parser.add_argument('--engine', action='append', choices=ENGINES, help='engines to run (default: all)')
+  args = parser.parse_args(argv[1:])
+
+  print(f'{"engine":<10}{"MB":>6}{"copying":>12}{"ropes":>12}{"speedup":>10}')
+  for engine in args.engine or ENGINES:
+    for megabytes in args.mb or [1, 2, 10]:
+      ropes = seconds(engine, megabytes, True)
+      if megabytes <= args.flat_mb:
+        flat = seconds(engine, megabytes, False)
+        print(f'{engine:<10}{megabytes:>6g}{flat:>11.3f}s{ropes:>11.3f}s{flat / ropes:>9.1f}x')
+      else:
+        print(f'{engine:<10}{megabytes:>6g}{"":>12}{ropes:>11.3f}s')
+
+
+if __name__ == '__main__':
+  main(sys.argv)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# Measures scanning throughput of the character-at-a-time Scanner and the
+# regex-driven RegexScanner on the same source, after checking that both
+# produce the same tokens.
+#
+#   python benchmarks/scanner.py [file.lox] [copies]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lox import Scanner, RegexScanner
+
+SAMPLE = '''// Recursive fibonacci with a few of everything.
+fun fib(n) {
+  if (n <= 1) return n;
+  return fib(n - 2) + fib(n - 1);
+}
+
+var greeting = "hello, world";
+for (var i = 0; i < 10.5; i = i + 1) {
+  if (!(i == 3) and i != 4 or false) print fib(i) * 2 / 1;
+}
+print greeting;
+'''
+
+
+def signature(tokens):
+  return [(token.type, token.lexeme, token.literal, token.line) for token in tokens]
+
+
+def tokens_per_second(scanner, source: str, repeat: int = 3):
+  best = None
+  for _ in range(repeat):
+    start = time.perf_counter()
+    count = len(scanner(source).scan_tokens())
+    elapsed = time.perf_counter() - start
+    if best == None or elapsed < best: best = elapsed
+  return count, count / best
+
+
+def main(argv) -> None:
+  if len(argv) > 1:
+    with open(argv[1], 'r') as f:
+      source = f.read()
+  else:
+    source = SAMPLE
+  copies = int(argv[2]) if len(argv) > 2 else 2000
+  source = source * copies
+
+  if signature(Scanner(source).scan_tokens()) != signature(RegexScanner(source).scan_tokens()):
+    sys.exit('scanners disagree on this source')
+
+  print(f'{len(source):,} characters')
+  print(f'{"scanner":<12}{"tokens":>12}{"tokens/s":>14}')
+  for label, scanner in [('classic', Scanner), ('regex', RegexScanner)]:
+    count, rate = tokens_per_second(scanner, source)
+    print(f'{label:<12}{count:>12,}{rate:>14,.0f}')
+
+
+if __name__ == '__main__':
+  main(sys.argv)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# Runs many small scripts back to back, each in a new interpreter through
+# lox.run() as before, and all in one warm LoxSession, and reports scripts
+# per second for every engine.
+#
+#   python benchmarks/session.py [scripts]
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lox import ENGINES, LoxSession, run
+
+SCRIPT = '''
+var total{n} = 0;
+for (var i = 0; i < 10; i = i + 1) total{n} = total{n} + i * {n};
+print total{n};
+'''
+
+
+def scripts_per_second(engine: str, scripts: list, warm: bool) -> float:
+  start = time.perf_counter()
+  if warm:
+    session = LoxSession(engine)
+    for script in scripts:
+      session.run(script)
+  else:
+    with redirect_stdout(io.StringIO()):
+      for script in scripts:
+        run(script, engine)
+  return len(scripts) / (time.perf_counter() - start)
+
+
+def main(argv) -> None:
+  count = int(argv[1]) if len(argv) > 1 else 2000
+  scripts = [SCRIPT.format(n=n) for n in range(count)]
+
+  print(f'{count:,} scripts')
+  print(f'{"engine":<10}{"run() scripts/s":>18}{"session scripts/s":>20}{"speedup":>10}')
+  for engine in ENGINES:
+    cold = scripts_per_second(engine, scripts, False)
+    warm = scripts_per_second(engine, scripts, True)
+    print(f'{engine:<10}{cold:>18,.0f}{warm:>20,.0f}{warm / cold:>9.2f}x')
+
+
+if __name__ == '__main__':
+  main(sys.argv)
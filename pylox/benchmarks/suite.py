@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# Runs the Lox programs in benchmarks/programs, plus a large generated source
+# that mostly exercises the front end, and times each pylox phase on its own:
+# scanning, parsing, resolving (with the optimizer unless --no-optimize) and
+# executing. The vm and python engines compile while executing, so that is
+# counted there. With --jlox the same files are also run by the reference
+# implementation in jlox/jlox.jar, timed as a whole process; its JVM startup,
+# measured on an empty file, is reported alongside. Each phase is the best of
+# --repeat runs. Results are printed as a table and, with --json, written as
+# JSON so runs of different versions can be compared.
+#
+#   python benchmarks/suite.py [--engine tree --engine vm ...] [--jlox [jar]] [--json results.json]
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lox import ENGINES, OutputSink, RegexScanner, Parser, Resolver, Optimizer, create_interpreter
+from lox import ErrorReporter, reporting
+
+PROGRAMS = os.path.join(ROOT, 'benchmarks', 'programs')
+JLOX = os.path.join(os.path.dirname(ROOT), 'jlox', 'jlox.jar')
+
+TEMPLATE = '''// Generated block {n}.
+fun step{n}(previous, factor) {{
+  var next = previous * factor + {n}.5;
+  if (next >= 1000000 and factor != 0) return next / factor;
+  {{
+    var scaled = next * 2;
+    while (scaled > 10) scaled = scaled / 10;
+    next = next + scaled;
+  }}
+  return next - {n};
+}}
+var value{n} = step{n}({n}, 3);
+'''
+
+
+def generate(path: str, kilobytes: int) -> None:
+  blocks = []
+  size = 0
+  while size < kilobytes * 1024:
+    blocks.append(TEMPLATE.format(n=len(blocks)))
+    size += len(blocks[-1])
+  blocks.append('print value0;\n')
+  with open(path, 'w') as f:
+    f.write(''.join(blocks))
+
+
+def timed(phase: str, times: dict, function: Callable[[], Any]) -> Any:
+  start = time.perf_counter()
+  result = function()
+  elapsed = time.perf_counter() - start
+  times[phase] = min(times.get(phase, elapsed), elapsed)
+  return result
+
+
+def run_pylox(source: str, engine: str, optimize: bool, times: dict) -> str:
+  with reporting(ErrorReporter()) as errors:
+    return run_phases(source, engine, optimize, times, errors)
+
+
+def run_phases(source: str, engine: str, optimize: bool, times: dict, errors: ErrorReporter) -> str:
+  output = io.StringIO()
+  interpreter = create_interpreter(engine, OutputSink(output, 'exit'))
+
+  tokens = timed('scan', times, lambda: RegexScanner(source).scan_tokens())
+  statements = timed('parse', times, lambda: Parser(tokens).parse())
+  if errors.had_error: raise SyntaxError('the program has syntax errors')
+
+  def resolve():
+    resolver = Resolver(interpreter)
+    resolver.resolve(statements)
+    if not optimize: return statements
+    return Optimizer(interpreter, resolver.declarations, resolver.assigned).optimize(statements)
+  resolved = timed('resolve', times, resolve)
+  if errors.had_error: raise SyntaxError('the program has resolution errors')
+
+  timed('execute', times, lambda: interpreter.interpret(resolved))
+  if errors.had_runtime_error: raise RuntimeError('the program failed at runtime')
+  return output.getvalue()
+
+
+def run_jlox(java: str, jar: str, path: str) -> Tuple[float, str]:
+  start = time.perf_counter()
+  completed = subprocess.run([java, '-jar', jar, path], capture_output=True, text=True)
+  elapsed = time.perf_counter() - start
+  if completed.returncode != 0:
+    raise RuntimeError(f'jlox exited with {completed.returncode}: {completed.stderr.strip()}')
+  return elapsed, completed.stdout
+
+
+def digest(output: str) -> str:
+  return hashlib.sha256(output.encode()).hexdigest()
+
+
+def revision() -> str:
+  try:
+    return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                          text=True, check=True).stdout.strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+
+def main(argv) -> None:
+  parser = argparse.ArgumentParser(prog='suite.py')
+  parser.add_argument('--engine', action='append', choices=ENGINES,
+                      help='pylox engine to run; may be repeated (default: tree)')
+  parser.add_argument('--program', action='append',
+                      help='only run the named program; may be repeated')
+  parser.add_argument('--repeat', type=int, default=1,
+                      help='runs per program; the best time of each phase is kept')
+  parser.add_argument('--no-optimize', dest='optimize', action='store_false',
+                      help='resolve without running the optimizer')
+  parser.add_argument('--generated-kb', type=int, default=256,
+                      help='size of the generated source in kilobytes')
+  parser.add_argument('--jlox', nargs='?', const=JLOX, metavar='JAR',
+                      help=f'also run every program with jlox (default jar: {JLOX})')
+  parser.add_argument('--json', metavar='FILE',
+                      help='write the results as JSON to FILE')
+  args = parser.parse_args(argv[1:])
+  engines = args.engine or ['tree']
+
+  java = None
+  if args.jlox != None:
+    java = shutil.which('java')
+    if java == None: parser.error('--jlox needs a java executable on PATH')
+    if not os.path.exists(args.jlox): parser.error(f'no jlox jar at {args.jlox}')
+
+  with tempfile.TemporaryDirectory() as directory:
+    paths = {os.path.splitext(os.path.basename(path))[0]: path
+             for path in sorted(glob.glob(os.path.join(PROGRAMS, '*.lox')))}
+    paths['generated'] = os.path.join(directory, 'generated.lox')
+    if args.program != None:
+      unknown = set(args.program) - set(paths)
+      if unknown: parser.error(f'unknown program: {", ".join(sorted(unknown))}')
+      paths = {name: path for name, path in paths.items() if name in args.program}
+    if 'generated' in paths: generate(paths['generated'], args.generated_kb)
+
+    startup = None
+    if java != None:
+      empty = os.path.join(directory, 'empty.lox')
+      open(empty, 'w').close()
+      startup = min(run_jlox(java, args.jlox, empty)[0] for _ in range(args.repeat))
+
+    results = []
+    print(f'{"program":<14}{"runner":<14}{"bytes":>10}{"scan":>9}{"parse":>9}{"resolve":>9}{"execute":>9}{"total":>9}')
+    for name, path in paths.items():
+      with open(path, 'r') as f:
+        source = f.read()
+
+      for engine in engines:
+        times = {}
+        for _ in range(args.repeat):
+          output = run_pylox(source, engine, args.optimize, times)
+        total = sum(times.values())
+        results.append({'program': name, 'runner': 'pylox', 'engine': engine, 'bytes': len(source),
+                        **times, 'total': total, 'output_sha256': digest(output)})
+        print(f'{name:<14}{"pylox " + engine:<14}{len(source):>10,}{times["scan"]:>9.3f}{times["parse"]:>9.3f}'
+              f'{times["resolve"]:>9.3f}{times["execute"]:>9.3f}{total:>9.3f}')
+
+      if java != None:
+        total = None
+        for _ in range(args.repeat):
+          elapsed, output = run_jlox(java, args.jlox, path)
+          total = elapsed if total == None else min(total, elapsed)
+        results.append({'program': name, 'runner': 'jlox', 'bytes': len(source), 'total': total,
+                        'startup': startup, 'output_sha256': digest(output)})
+        print(f'{name:<14}{"jlox":<14}{len(source):>10,}{"":>36}{total:>9.3f}')
+
+  if startup != None: print(f'jlox totals include {startup:.3f}s of JVM startup')
+
+  if args.json != None:
+    report = {
+      'revision': revision(),
+      'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+      'python': sys.version,
+      'platform': platform.platform(),
+      'optimize': args.optimize,
+      'repeat': args.repeat,
+      'generated_kb': args.generated_kb,
+      'jlox_startup': startup,
+      'results': results
+    }
+    with open(args.json, 'w') as f:
+      json.dump(report, f, indent=2)
+      f.write('\n')
+
+
+if __name__ == '__main__':
+  main(sys.argv)
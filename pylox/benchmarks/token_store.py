@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# Scans a large source file two ways and reports scan time and peak memory:
+# reading it into a str and building Token objects with RegexScanner, or
+# mapping it and filling a TokenStore's columns. Each way runs in its own
+# process so the peak resident set size of one doesn't hide the other's.
+#
+#   python benchmarks/token_store.py [megabytes | file.lox]
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lox import RegexScanner, TokenStore, map_source
+
+TEMPLATE = '''// Generated block {n}.
+fun step{n}(previous, factor) {{
+  var next = previous * factor + {n}.5;
+  if (next >= 1000000 and factor != 0) return next / factor;
+  return next - "unused" == nil;
+}}
+var value{n} = step{n}({n}, 3);
+'''
+
+
+def generate(path: str, megabytes: int) -> None:
+  target = megabytes * 1024 * 1024
+  written = 0
+  n = 0
+  with open(path, 'w') as f:
+    while written < target:
+      block = ''.join(TEMPLATE.format(n=n + i) for i in range(1000))
+      f.write(block)
+      written += len(block)
+      n += 1000
+
+
+def scan_text(path: str) -> int:
+  with open(path, 'r') as f:
+    source = f.read()
+  return len(RegexScanner(source).scan_tokens())
+
+
+def scan_store(path: str) -> int:
+  with open(path, 'rb') as f, map_source(f) as source:
+    return len(TokenStore(source).scan())
+
+
+def child(variant: str, path: str) -> None:
+  scan = scan_text if variant == 'text' else scan_store
+  start = time.perf_counter()
+  count = scan(path)
+  elapsed = time.perf_counter() - start
+  peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+  print(count, elapsed, peak)
+
+
+def main(argv) -> None:
+  if len(argv) > 2 and argv[1] == '--child':
+    child(argv[2], argv[3])
+    return
+
+  argument = argv[1] if len(argv) > 1 else '100'
+  directory = None
+  if argument.isdigit():
+    directory = tempfile.TemporaryDirectory()
+    path = os.path.join(directory.name, 'large.lox')
+    generate(path, int(argument))
+  else:
+    path = argument
+
+  print(f'{os.path.getsize(path):,} bytes of source')
+  print(f'{"scanner":<20}{"tokens":>14}{"seconds":>10}{"tokens/s":>14}{"peak RSS MB":>14}')
+  for variant, label in [('text', 'str + Token objects'), ('store', 'mmap + TokenStore')]:
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', variant, path],
+                            capture_output=True, text=True, check=True).stdout
+    count, elapsed, peak = output.split()
+    count, elapsed, peak = int(count), float(elapsed), int(peak)
+    print(f'{label:<20}{count:>14,}{elapsed:>10.2f}{count / elapsed:>14,.0f}{peak / 2**20:>14,.1f}')
+
+  if directory != None: directory.cleanup()
+
+
+if __name__ == '__main__':
+  main(sys.argv)
@@ -48,11 +48,17 @@ def generate_file(input_definitions: List[str], base_name: str, additional_impor
         class_definition = [f"class {class_name}{base_name}({base_name}):"]
         constructor_params = []
         constructor_assignments = []
+        slot_names = []
 
         for field in fields:
             field_type, field_name = re.split(r"\s+", field, maxsplit=1)
             constructor_params.append(f"{field_name}: {field_type}")
             constructor_assignments.append(f"    self.{field_name} = {field_name}\n")
+            slot_names.append(f"'{field_name}'")
+
+        # Nodes have a fixed set of fields, so they don't need a __dict__.
+        trailing_comma = "," if len(slot_names) == 1 else ""
+        class_definition.append(f"  __slots__ = ({', '.join(slot_names)}{trailing_comma})\n")
 
         constructor_definition = [
             "  def __init__(self, " + ", ".join(constructor_params) + ") -> None:",
@@ -82,6 +88,8 @@ def generate_file(input_definitions: List[str], base_name: str, additional_impor
     base_class = [
         f"# {base_name} base class and sub classes",
         f"class {base_name}(ABC):",
+        "  __slots__ = ()",
+        "",
         "  @abstractmethod",
         f"  def accept(self, visitor: {base_name}Visitor):",
         "    pass"
@@ -6,4 +6,23 @@ from .parser import *
 from .interpreter import *
 from .lox_runtime_error import *
 from .environment import *
-from .lox_callable import *
\ No newline at end of file
+from .lox_callable import *
+from .resolver import *
+from .compiler import *
+from .vm import *
+from .closure_compiler import *
+from .transpiler import *
+from .optimizer import *
+from .cache import *
+from .token_store import *
+from .output import *
+from .profiler import *
+from .purity import *
+from .memoize import *
+from .session import *
+from .async_vm import *
+from .budget import *
+from .rope import *
+from .arrays import *
+from .containers import *
+from .batch import *
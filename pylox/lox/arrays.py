@@ -0,0 +1,157 @@
+import array
+import itertools
+import math
+import operator
+from typing import Any, Callable, List
+from .lox_callable import NativeFunction
+from .lox_runtime_error import LoxRuntimeError
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class LoxArray:
+    # A fixed-size array of numbers, held by reference like a function.
+    # The numbers live in contiguous storage: a NumPy float64 array when
+    # NumPy is installed, otherwise a memoryview of an array.array('d').
+    # NumPy is optional (see requirements-optional.txt).
+    # Either way a slice is a view of the same storage, so setting an
+    # element through one shows in the other.
+    __slots__ = ('data',)
+
+    def __init__(self, data: Any) -> None:
+        self.data = data
+
+    def __str__(self) -> str:
+        return '[' + ', '.join(number_text(float(value)) for value in self.data) + ']'
+
+def number_text(value: float) -> str:
+    # A number as Lox prints it.
+    text = str(value)
+    return text[:-2] if text[-2:] == '.0' else text
+
+def divide(a: float, b: float) -> float:
+    # Division as IEEE 754 and NumPy define it, which Python doesn't for 0.
+    if b != 0: return a / b
+    if a == 0 or a != a: return math.nan
+    return math.copysign(math.inf, a) * math.copysign(1.0, b)
+
+if numpy != None:
+    def storage(size: int) -> Any:
+        return numpy.zeros(size)
+
+    def copied(data: Any) -> Any:
+        return data.copy()
+
+    def elementwise(function: Callable[[Any, Any], Any], a: Any, b: Any) -> Any:
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            return function(a, b)
+
+    def dot(a: Any, b: Any) -> float:
+        return float(numpy.dot(a, b))
+
+    OPERATIONS = {'add': numpy.add, 'subtract': numpy.subtract, 'multiply': numpy.multiply, 'divide': numpy.divide}
+    REDUCTIONS = {'sum': numpy.sum, 'min': numpy.min, 'max': numpy.max}
+else:
+    def storage(size: int) -> Any:
+        return memoryview(array.array('d', bytes(8 * size)))
+
+    def copied(data: Any) -> Any:
+        return memoryview(array.array('d', data))
+
+    def elementwise(function: Callable[[Any, Any], Any], a: Any, b: Any) -> Any:
+        # Either side may be a single number.
+        a = a if a.__class__ is memoryview else itertools.repeat(a)
+        b = b if b.__class__ is memoryview else itertools.repeat(b)
+        return memoryview(array.array('d', map(function, a, b)))
+
+    def dot(a: Any, b: Any) -> float:
+        return math.fsum(map(operator.mul, a, b))
+
+    OPERATIONS = {'add': operator.add, 'subtract': operator.sub, 'multiply': operator.mul, 'divide': divide}
+    REDUCTIONS = {'sum': math.fsum, 'min': min, 'max': max}
+
+def check_array(value: Any) -> Any:
+    if value.__class__ is not LoxArray:
+        raise LoxRuntimeError(None, 'Operand must be an array.')
+    return value.data
+
+def check_size(value: Any) -> int:
+    if value.__class__ is not float or not value.is_integer() or value < 0:
+        raise LoxRuntimeError(None, 'Size must be a non-negative whole number.')
+    return int(value)
+
+def check_index(index: Any, end: int) -> int:
+    # A whole number from 0 up to end, inclusive.
+    if index.__class__ is not float or not index.is_integer() or not 0 <= index <= end:
+        raise LoxRuntimeError(None, 'Index out of range.')
+    return int(index)
+
+def check_number(value: Any) -> float:
+    if value.__class__ is not float:
+        raise LoxRuntimeError(None, 'Array elements must be numbers.')
+    return value
+
+def array_of_size(size: Any) -> LoxArray:
+    return LoxArray(storage(check_size(size)))
+
+def array_get(target: Any, index: Any) -> float:
+    data = check_array(target)
+    return float(data[check_index(index, len(data) - 1)])
+
+def array_set(target: Any, index: Any, value: Any) -> float:
+    data = check_array(target)
+    data[check_index(index, len(data) - 1)] = check_number(value)
+    return value
+
+def array_slice(target: Any, start: Any, end: Any) -> LoxArray:
+    data = check_array(target)
+    end = check_index(end, len(data))
+    return LoxArray(data[check_index(start, end):end])
+
+def array_copy(target: Any) -> LoxArray:
+    return LoxArray(copied(check_array(target)))
+
+def operation(function: Callable[[Any, Any], Any]) -> Callable[[Any, Any], LoxArray]:
+    # An element-wise operation on two arrays of the same length, or on an
+    # array and a number.
+    def apply(a: Any, b: Any) -> LoxArray:
+        if a.__class__ is not LoxArray and b.__class__ is not LoxArray:
+            raise LoxRuntimeError(None, 'Operand must be an array.')
+        a = a.data if a.__class__ is LoxArray else check_number(a)
+        b = b.data if b.__class__ is LoxArray else check_number(b)
+        if a.__class__ is not float and b.__class__ is not float and len(a) != len(b):
+            raise LoxRuntimeError(None, 'Arrays must have the same length.')
+        return LoxArray(elementwise(function, a, b))
+    return apply
+
+def reduction(function: Callable[[Any], Any], name: str) -> Callable[[Any], float]:
+    def reduce(target: Any) -> float:
+        data = check_array(target)
+        if len(data) == 0 and name != 'sum':
+            raise LoxRuntimeError(None, 'Array is empty.')
+        return float(function(data))
+    return reduce
+
+def array_dot(a: Any, b: Any) -> float:
+    a = check_array(a)
+    b = check_array(b)
+    if len(a) != len(b):
+        raise LoxRuntimeError(None, 'Arrays must have the same length.')
+    return dot(a, b)
+
+def array_natives() -> List[NativeFunction]:
+    # array(n) makes an array of n zeros; get, set and length are the
+    # collection natives, which take arrays too. The bulk operations take
+    # two arrays of the same length, or an array and a number, and return a
+    # new array.
+    natives = [
+        NativeFunction('array', 1, array_of_size),
+        NativeFunction('slice', 3, array_slice),
+        NativeFunction('copy', 1, array_copy),
+        NativeFunction('dot', 2, array_dot)
+    ]
+    natives += [NativeFunction(name, 2, operation(function)) for name, function in OPERATIONS.items()]
+    natives += [NativeFunction(name, 1, reduction(function, name)) for name, function in REDUCTIONS.items()]
+    return natives
@@ -0,0 +1,58 @@
+import asyncio
+from typing import Any, List
+from .compiler import Chunk, Compiler
+from .vm import VM
+from .lox_callable import NativeFunction
+from .lox_runtime_error import LoxRuntimeError
+from .output import OutputSink
+from .stmt import Stmt
+
+async def sleep(seconds: Any) -> None:
+    if seconds.__class__ is not float:
+        raise LoxRuntimeError(None, 'Operand must be a number.')
+    await asyncio.sleep(seconds)
+
+class AsyncVM(VM):
+    # The bytecode VM as an asyncio task, for running many scripts on one
+    # event loop. A call to an `async def` native suspends the script until
+    # the native's result is ready, and a script that keeps the loop busy
+    # lets the others run every time_slice loop iterations and calls, so a
+    # long computation can't starve a script waiting on I/O. interpret()
+    # runs the program on an event loop of its own; from a coroutine, await
+    # interpret_async() instead.
+    suspends = True
+
+    def __init__(self, output: OutputSink=None, time_slice: int=1000) -> None:
+        super().__init__(output)
+        self.time_slice = time_slice
+        self.define_native('sleep', NativeFunction('sleep', 1, sleep))
+
+    def interpret(self, statements: List[Stmt]):
+        asyncio.run(self.interpret_async(statements))
+
+    async def interpret_async(self, statements: List[Stmt]):
+        chunk = Compiler(self).compile(statements)
+        try:
+            await self.run_async(chunk, self.globals)
+        except LoxRuntimeError as e:
+            self.report_runtime_error(e)
+        finally:
+            self.output.flush()
+
+    async def run_async(self, chunk: Chunk, frame: Any) -> Any:
+        routine = self.routine(chunk, frame)
+        try:
+            awaitable = next(routine)
+            while True:
+                # None means the time slice is up: give the other tasks a turn.
+                try:
+                    result = await (awaitable if awaitable != None else asyncio.sleep(0))
+                except Exception as e:
+                    # Raised where the native was called, as a native that
+                    # isn't async would raise it, so a LoxRuntimeError gets
+                    # the line of the call.
+                    awaitable = routine.throw(e)
+                else:
+                    awaitable = routine.send(result)
+        except StopIteration as e:
+            return e.value
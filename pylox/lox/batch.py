@@ -0,0 +1,49 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List
+from .cache import ProgramCache
+from .session import LoxSession
+
+# The settings of the batch a worker process belongs to, set once when the
+# process starts so they aren't sent along with every script.
+worker_settings: Dict[str, Any] = {}
+
+def start_worker(engine: str, optimize: bool, cache: bool, budget: Any) -> None:
+    worker_settings['engine'] = engine
+    worker_settings['optimize'] = optimize
+    worker_settings['budget'] = budget
+    # One cache per worker; entries are written atomically, so workers can
+    # share the directory.
+    worker_settings['cache'] = ProgramCache() if cache else None
+
+def run_script(path: str) -> Dict[str, Any]:
+    # Runs one script in a new interpreter, so scripts can't see each other's
+    # globals, and returns what pylox would have printed and exited with.
+    start = time.perf_counter()
+    try:
+        with open(path, 'rb') as f:
+            source = f.read()
+    except OSError as e:
+        # 66 is what sysexits.h calls EX_NOINPUT.
+        return {'path': path, 'exit_code': 66, 'stdout': '', 'stderr': f'{e}\n',
+                'seconds': time.perf_counter() - start, 'worker': os.getpid()}
+
+    session = LoxSession(worker_settings['engine'], worker_settings['optimize'], worker_settings['cache'],
+                         worker_settings['budget'])
+    result = session.run(source)
+    return {'path': path, 'exit_code': result.exit_code, 'stdout': result.output,
+            'stderr': ''.join(error.text + '\n' for error in result.errors),
+            'seconds': time.perf_counter() - start, 'worker': os.getpid()}
+
+def run_batch(paths: List[str], engine: str='tree', optimize: bool=True, cache: bool=True, workers: int=None, budget: Any=None) -> Iterator[Dict[str, Any]]:
+    # Runs every script across a pool of worker processes, each importing
+    # pylox once and then running scripts until the batch is done. Results
+    # are yielded in the order of paths as soon as they are ready. A budget
+    # applies to each script on its own.
+    workers = workers if workers != None else os.cpu_count() or 1
+    # Scripts are handed out in chunks to save round trips to the workers,
+    # small enough that one slow chunk doesn't leave the others idle.
+    chunksize = max(1, min(64, len(paths) // (workers * 8)))
+    with ProcessPoolExecutor(workers, initializer=start_worker, initargs=(engine, optimize, cache, budget)) as pool:
+        yield from pool.map(run_script, paths, chunksize=chunksize)
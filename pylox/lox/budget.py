@@ -0,0 +1,189 @@
+import sys
+import time
+from typing import Any, List
+from .expr import Expr, CallExpr
+from .stmt import Stmt
+from .token import Token, TokenType
+from .interpreter import Interpreter
+from .lox_runtime_error import LoxRuntimeError
+from .output import OutputSink
+from .rope import Rope, concat
+from .arrays import LoxArray
+from .containers import LoxList, LoxMap
+from .profiler import first_line
+
+# Steps between two checks of the clock and of the memory a script holds.
+CHECK_INTERVAL = 1024
+
+# What a call's frame holds on to besides its values: the Frame, its list of
+# slots and the Python frames running it, roughly.
+FRAME_SIZE = 512
+
+class BudgetExceeded(LoxRuntimeError):
+    # A script used up one of its execution budgets. Like any runtime error,
+    # it stops the script and is reported with the line it was running.
+    pass
+
+class StepLimitExceeded(BudgetExceeded):
+    pass
+
+class DeadlineExceeded(BudgetExceeded):
+    pass
+
+class CallDepthExceeded(BudgetExceeded):
+    pass
+
+class MemoryLimitExceeded(BudgetExceeded):
+    pass
+
+class Budget:
+    # Limits on running a program, None meaning no limit:
+    #
+    # * steps: statements executed plus calls made,
+    # * seconds: wall-clock time,
+    # * depth: calls in progress at once; a tail call replaces its caller,
+    # * memory: bytes held in strings and local frames, approximately. It
+    #   counts the strings in globals and in the scopes visible where the
+    #   check happens, and a frame for every call in progress; strings only
+    #   held by callers or closures aren't.
+    def __init__(self, steps: int=None, seconds: float=None, depth: int=None, memory: int=None) -> None:
+        self.steps = steps
+        self.seconds = seconds
+        self.depth = depth
+        self.memory = memory
+
+def line_before(node: Any, target: Any, line: List[int]) -> bool:
+    # Walks node in source order, keeping the last line seen in line[0],
+    # until it reaches target. Returns whether it did.
+    if node is target:
+        return True
+    if isinstance(node, Token):
+        line[0] = node.line
+    elif isinstance(node, list):
+        for item in node:
+            if line_before(item, target, line): return True
+    elif isinstance(node, (Expr, Stmt)):
+        for name in node.__slots__:
+            if line_before(getattr(node, name), target, line): return True
+    return False
+
+class BudgetedInterpreter(Interpreter):
+    # The tree-walking interpreter, stopping a script that exceeds its
+    # Budget. Every statement and call adds a step, and only every
+    # CHECK_INTERVAL steps are the clock and memory looked at, so a budget
+    # costs a counter per step. A single string longer than the memory
+    # budget is caught as soon as it's built, since doubling one takes few
+    # steps. A script too deep for Python's own stack fails with a Lox
+    # error too, whatever the depth budget.
+    def __init__(self, output: OutputSink=None, budget: Budget=None) -> None:
+        super().__init__(output)
+        self.budget = budget if budget != None else Budget()
+        self.max_depth = self.budget.depth if self.budget.depth != None else sys.maxsize
+        self.statements: List[Stmt] = []
+        self.steps = 0
+        self.next_check = 0
+        self.deadline = None
+        self.depth = 0
+        self.restart()
+        # Without a memory budget there is no need to look at strings, so the
+        # plain method is left in place.
+        if self.budget.memory != None:
+            self.concatenate = self.concatenate_limited
+
+    def restart(self) -> None:
+        # Starts spending the budget afresh. Until then, every call to
+        # interpret() draws on the same budget, so a program run one
+        # declaration at a time is limited as a whole.
+        self.steps = 0
+        self.deadline = time.monotonic() + self.budget.seconds if self.budget.seconds != None else None
+        self.schedule(CHECK_INTERVAL)
+
+    def interpret(self, statements: List[Stmt]):
+        self.statements = statements
+        super().interpret(statements)
+
+    def schedule(self, interval: int) -> None:
+        self.next_check = self.steps + interval
+        if self.budget.steps != None:
+            self.next_check = min(self.next_check, self.budget.steps + 1)
+
+    def check(self, node: Any) -> None:
+        budget = self.budget
+        if budget.steps != None and self.steps > budget.steps:
+            raise StepLimitExceeded(self.blame(node), f'Step limit of {budget.steps} exceeded.')
+        if self.deadline != None and time.monotonic() > self.deadline:
+            raise DeadlineExceeded(self.blame(node), f'Deadline of {budget.seconds:g} seconds exceeded.')
+
+        interval = CHECK_INTERVAL
+        if budget.memory != None:
+            held, counted = self.held_memory()
+            if held > budget.memory:
+                raise MemoryLimitExceeded(self.blame(node), f'Memory limit of {budget.memory} bytes exceeded.')
+            # Counting takes as long as the values it visits, so checks are
+            # spaced out to keep it from costing more than the steps between.
+            interval = max(interval, counted)
+        self.schedule(interval)
+
+    def held_memory(self) -> Any:
+        # The bytes held, and the number of values visited to count them.
+        values = list(self.globals.values.values())
+        held = self.depth * FRAME_SIZE
+        frame = self.environment
+        while frame is not self.globals:
+            held += sys.getsizeof(frame) + sys.getsizeof(frame.slots)
+            values.extend(frame.slots)
+            frame = frame.enclosing
+        # Lists and maps add what they hold to the values still to visit,
+        # once each however many times they are reachable.
+        seen = set()
+        for value in values:
+            if value.__class__ is str: held += sys.getsizeof(value)
+            elif value.__class__ is Rope: held += value.length
+            elif value.__class__ is LoxArray: held += 8 * len(value.data)
+            elif value.__class__ is LoxList and id(value) not in seen:
+                seen.add(id(value))
+                held += sys.getsizeof(value.items)
+                values.extend(value.items)
+            elif value.__class__ is LoxMap and id(value) not in seen:
+                seen.add(id(value))
+                held += sys.getsizeof(value.entries)
+                values.extend(value.entries.keys())
+                values.extend(value.entries.values())
+        return held, len(values)
+
+    def blame(self, node: Any) -> Token:
+        # A token on the line of node. Nodes without tokens of their own, such
+        # as `while (true) {}`, are blamed on the last line before them.
+        line = first_line(node)
+        if line == None:
+            before = [1]
+            for statement in self.statements:
+                if line_before(statement, node, before): break
+            line = before[0]
+        return Token(TokenType.EOF, '', None, line)
+
+    def execute(self, stmt: Stmt) -> Any:
+        self.steps += 1
+        if self.steps >= self.next_check: self.check(stmt)
+        return stmt.accept(self)
+
+    def visit_call_expr(self, expr: CallExpr) -> Any:
+        self.steps += 1
+        if self.steps >= self.next_check: self.check(expr)
+        if self.depth >= self.max_depth:
+            raise CallDepthExceeded(expr.paren, f'Call depth limit of {self.max_depth} exceeded.')
+
+        self.depth += 1
+        try:
+            return Interpreter.visit_call_expr(self, expr)
+        except RecursionError:
+            raise CallDepthExceeded(expr.paren, 'Stack overflow.') from None
+        finally:
+            self.depth -= 1
+
+    def concatenate_limited(self, operator: Token, left: Any, right: Any) -> Any:
+        value = concat(left, right)
+        length = value.length if value.__class__ is Rope else len(value)
+        if length > self.budget.memory:
+            raise MemoryLimitExceeded(operator, f'Memory limit of {self.budget.memory} bytes exceeded.')
+        return value
@@ -0,0 +1,129 @@
+import contextlib
+import gc
+import glob
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import zlib
+from typing import Any, Iterator, List, Optional
+from .stmt import Stmt
+from .lox_callable import Interpreter
+from .resolver import reachable_nodes
+
+def default_directory() -> str:
+    if os.environ.get('PYLOX_CACHE_DIR'):
+        return os.environ['PYLOX_CACHE_DIR']
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'pylox')
+
+def interpreter_version() -> bytes:
+    # Any change to the interpreter's own sources, or to the Python running
+    # it, may change what a program parses into, so both are part of the key.
+    digest = hashlib.sha256(sys.version.encode())
+    package = os.path.dirname(os.path.abspath(__file__))
+    for path in sorted(glob.glob(os.path.join(package, '*.py'))):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.digest()
+
+@contextlib.contextmanager
+def paused_gc() -> Iterator[None]:
+    # A parsed program is millions of small objects that all stay alive, so
+    # collections triggered while (un)pickling them only cost time.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled: gc.enable()
+
+class ProgramCache:
+    # Stores resolved (and optionally optimized) programs on disk, like
+    # __pycache__ does for Python modules. An entry holds the statements
+    # together with the interpreter's resolution tables, pickled in one go so
+    # the tables still refer to the same nodes after loading, then compressed.
+    # Only programs without static errors are stored. An unreadable or stale
+    # entry is treated as a miss.
+    SUFFIX = '.loxc'
+
+    def __init__(self, directory: str=None) -> None:
+        self.directory = directory if directory != None else default_directory()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def key(self, source: Any, interpreter: Interpreter, optimize: bool) -> str:
+        if self.version == None:
+            self.version = interpreter_version()
+        digest = hashlib.sha256(self.version)
+        digest.update(b'optimized' if optimize else b'unoptimized')
+        # A hit skips the resolver, which checks that every global the
+        # program uses is defined, so the globals it ran against are part of
+        # the key: the engine's and the embedder's natives, and in a session
+        # what earlier scripts defined.
+        digest.update('\0'.join(sorted(interpreter.globals.values)).encode())
+        digest.update(b'\0')
+        digest.update(source.encode() if isinstance(source, str) else source)
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def load(self, source: Any, interpreter: Interpreter, optimize: bool) -> Optional[List[Any]]:
+        # Returns [statements, optimizer report] and installs the resolution
+        # tables into the interpreter, or None on a miss.
+        try:
+            with open(self.path(self.key(source, interpreter, optimize)), 'rb') as f:
+                data = zlib.decompress(f.read())
+            with paused_gc():
+                statements, locals, frame_sizes, tail_calls, report = pickle.loads(data)
+        except Exception:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        interpreter.locals.update(locals)
+        interpreter.frame_sizes.update(frame_sizes)
+        interpreter.tail_calls.update(tail_calls)
+        return [statements, report]
+
+    def store(self, source: Any, interpreter: Interpreter, optimize: bool, statements: List[Stmt], report: str) -> None:
+        # The tables may also hold earlier programs' nodes, and nodes the
+        # optimizer dropped, so only the entries of statements are stored.
+        nodes = reachable_nodes(statements)
+        tables = [{node: table[node] for node in nodes if node in table}
+                  for table in (interpreter.locals, interpreter.frame_sizes, interpreter.tail_calls)]
+        entry = (statements, *tables, report)
+        temporary = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write to a temporary file first so a concurrent run never reads
+            # a partial entry.
+            with paused_gc():
+                data = pickle.dumps(entry, pickle.HIGHEST_PROTOCOL)
+            fd, temporary = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(zlib.compress(data, 1))
+            os.replace(temporary, self.path(self.key(source, interpreter, optimize)))
+            self.stores += 1
+        except (OSError, RecursionError, pickle.PicklingError):
+            # Caching is best effort: a read-only directory or a tree too
+            # deep to pickle just means the next run parses again.
+            if temporary != None and os.path.exists(temporary):
+                os.remove(temporary)
+
+    def clear(self) -> int:
+        removed = 0
+        for path in glob.glob(os.path.join(self.directory, '*' + self.SUFFIX)):
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def report(self) -> str:
+        return f'[cache] {self.hits} hits, {self.misses} misses, {self.stores} stored in {self.directory}'
@@ -0,0 +1,377 @@
+import operator
+from typing import Any, Callable, List
+from .expr import *
+from .stmt import *
+from .token import Token, TokenType
+from .interpreter import Interpreter
+from .lox_callable import LoxCallable
+from .lox_runtime_error import LoxRuntimeError
+from .environment import Frame
+from .return_obj import TailCall
+from .rope import is_string, concat
+
+# Compiled expressions are called as fn(frame) and return the value. Compiled
+# statements are called the same way and return None, or a one-element tuple
+# holding the value when a `return` statement completes them, or a TailCall
+# when that statement returns a call to another compiled function.
+Compiled = Callable[[Any], Any]
+
+number_operators = {
+    TokenType.MINUS         : operator.sub,
+    TokenType.SLASH         : operator.truediv,
+    TokenType.STAR          : operator.mul,
+    TokenType.GREATER       : operator.gt,
+    TokenType.GREATER_EQUAL : operator.ge,
+    TokenType.LESS          : operator.lt,
+    TokenType.LESS_EQUAL    : operator.le
+}
+
+class ClosureFunction(LoxCallable):
+    def __init__(self, declaration: FunctionStmt, body: Compiled, closure: Any, frame_size: int) -> None:
+        self.declaration = declaration
+        self.body = body
+        self.closure = closure
+        self.padding = [None] * (frame_size - len(declaration.params))
+
+    def call(self, interpreter: Interpreter, arguments: List[Any]) -> Any:
+        completion = self.body(Frame(self.closure, arguments + self.padding))
+        while completion.__class__ is TailCall:
+            fn = completion.function
+            completion = fn.body(Frame(fn.closure, completion.arguments + fn.padding))
+        if completion != None: return completion[0]
+        return None
+
+    def arity(self) -> int:
+        return len(self.declaration.params)
+
+    def __str__(self) -> str:
+        return f'<fn {self.declaration.name.lexeme}>'
+
+class ClosureCompiler(ExprVisitor, StmtVisitor):
+    # Walks the resolved tree once and turns every node into a Python closure
+    # specialised for that node, so running the program involves no visitor
+    # dispatch and no operator chains.
+    def __init__(self, interpreter: Interpreter) -> None:
+        self.interpreter = interpreter
+        self.locals = interpreter.locals
+        self.frame_sizes = interpreter.frame_sizes
+        self.globals = interpreter.globals.values
+
+    def compile(self, statements: List[Stmt]) -> List[Compiled]:
+        return [self.compile_stmt(statement) for statement in statements]
+
+    def compile_stmt(self, stmt: Stmt) -> Compiled:
+        return stmt.accept(self)
+
+    def compile_expr(self, expr: Expr) -> Compiled:
+        return expr.accept(self)
+
+    def compile_sequence(self, statements: List[Stmt]) -> Compiled:
+        compiled = self.compile(statements)
+
+        if len(compiled) == 1:
+            return compiled[0]
+
+        def sequence(frame):
+            for statement in compiled:
+                completion = statement(frame)
+                if completion != None: return completion
+        return sequence
+
+    def compile_define(self, stmt: Stmt, name: Token, value: Compiled) -> Compiled:
+        local = self.locals.get(stmt)
+        if local != None:
+            slot = local[1]
+            def define_local(frame):
+                frame.slots[slot] = value(frame)
+            return define_local
+
+        globals = self.globals
+        name = name.lexeme
+        def define_global(frame):
+            globals[name] = value(frame)
+        return define_global
+
+    def visit_block_stmt(self, stmt: BlockStmt) -> Compiled:
+        body = self.compile_sequence(stmt.statements)
+        size = self.frame_sizes[stmt]
+
+        def block(frame):
+            return body(Frame(frame, [None] * size))
+        return block
+
+    def visit_expression_stmt(self, stmt: ExpressionStmt) -> Compiled:
+        expression = self.compile_expr(stmt.expression)
+
+        def expression_stmt(frame):
+            expression(frame)
+        return expression_stmt
+
+    def visit_function_stmt(self, stmt: FunctionStmt) -> Compiled:
+        body = self.compile_sequence(stmt.body)
+        frame_size = self.frame_sizes[stmt]
+
+        def function(frame):
+            return ClosureFunction(stmt, body, frame, frame_size)
+        return self.compile_define(stmt, stmt.name, function)
+
+    def visit_if_stmt(self, stmt: IfStmt) -> Compiled:
+        condition = self.compile_expr(stmt.condition)
+        then_branch = self.compile_stmt(stmt.thenBranch)
+
+        if stmt.elseBranch == None:
+            def if_then(frame):
+                value = condition(frame)
+                if value is not None and value is not False:
+                    return then_branch(frame)
+            return if_then
+
+        else_branch = self.compile_stmt(stmt.elseBranch)
+        def if_then_else(frame):
+            value = condition(frame)
+            if value is not None and value is not False:
+                return then_branch(frame)
+            return else_branch(frame)
+        return if_then_else
+
+    def visit_print_stmt(self, stmt: PrintStmt) -> Compiled:
+        expression = self.compile_expr(stmt.expression)
+        stringify = self.interpreter.stringify
+        write = self.interpreter.output.write
+
+        def print_stmt(frame):
+            write(stringify(expression(frame)))
+        return print_stmt
+
+    def visit_return_stmt(self, stmt: ReturnStmt) -> Compiled:
+        if stmt.value == None:
+            def return_nil(frame):
+                return (None,)
+            return return_nil
+
+        call = self.interpreter.tail_calls.get(stmt)
+        if call != None:
+            return self.compile_tail_call(call)
+
+        value = self.compile_expr(stmt.value)
+        def return_value(frame):
+            return (value(frame),)
+        return return_value
+
+    def compile_tail_call(self, expr: CallExpr) -> Compiled:
+        # Like visit_call_expr, but a ClosureFunction isn't called: it is
+        # handed back for the caller's loop to run.
+        callee = self.compile_expr(expr.callee)
+        arguments = [self.compile_expr(argument) for argument in expr.arguments]
+        count = len(arguments)
+        token = expr.paren
+        interpreter = self.interpreter
+
+        def tail_call(frame):
+            fn = callee(frame)
+            values = [argument(frame) for argument in arguments]
+
+            if fn.__class__ is ClosureFunction:
+                if count != len(fn.declaration.params):
+                    raise LoxRuntimeError(token, f'Expected {fn.arity()} arguments but got {count}.')
+                return TailCall(fn, values)
+
+            if not isinstance(fn, LoxCallable):
+                raise LoxRuntimeError(token, "Can only call functions and classes.")
+            if count != fn.arity():
+                raise LoxRuntimeError(token, f'Expected {fn.arity()} arguments but got {count}.')
+            try:
+                return (fn.call(interpreter, values),)
+            except LoxRuntimeError as e:
+                raise e.at(token)
+        return tail_call
+
+    def visit_var_stmt(self, stmt: VarStmt) -> Compiled:
+        if stmt.initializer != None:
+            initializer = self.compile_expr(stmt.initializer)
+        else:
+            initializer = lambda frame: None
+        return self.compile_define(stmt, stmt.name, initializer)
+
+    def visit_while_stmt(self, stmt: WhileStmt) -> Compiled:
+        condition = self.compile_expr(stmt.condition)
+        body = self.compile_stmt(stmt.body)
+
+        def while_stmt(frame):
+            while True:
+                value = condition(frame)
+                if value is None or value is False: return
+                completion = body(frame)
+                if completion != None: return completion
+        return while_stmt
+
+    def visit_assign_expr(self, expr: AssignExpr) -> Compiled:
+        value = self.compile_expr(expr.value)
+
+        local = self.locals.get(expr)
+        if local == None:
+            globals = self.globals
+            token = expr.name
+            name = token.lexeme
+            def assign_global(frame):
+                result = value(frame)
+                if name not in globals:
+                    raise LoxRuntimeError(token, f"Undefined variable '{name}'.")
+                globals[name] = result
+                return result
+            return assign_global
+
+        depth, slot = local
+        if depth == 0:
+            def assign_local(frame):
+                result = frame.slots[slot] = value(frame)
+                return result
+            return assign_local
+
+        def assign_enclosing(frame):
+            result = value(frame)
+            for _ in range(depth):
+                frame = frame.enclosing
+            frame.slots[slot] = result
+            return result
+        return assign_enclosing
+
+    def visit_binary_expr(self, expr: BinaryExpr) -> Compiled:
+        left = self.compile_expr(expr.left)
+        right = self.compile_expr(expr.right)
+        token = expr.operator
+        kind = token.type
+
+        if kind == TokenType.PLUS:
+            def add(frame):
+                a = left(frame)
+                b = right(frame)
+                if a.__class__ is float and b.__class__ is float: return a + b
+                if is_string(a) and is_string(b): return concat(a, b)
+                raise LoxRuntimeError(token, "Operands must be two numbers or two strings.")
+            return add
+
+        if kind == TokenType.EQUAL_EQUAL or kind == TokenType.BANG_EQUAL:
+            is_equal = self.interpreter.is_equal
+            negate = kind == TokenType.BANG_EQUAL
+            def equality(frame):
+                a = left(frame)
+                return is_equal(a, right(frame)) != negate
+            return equality
+
+        fn = number_operators[kind]
+        def number(frame):
+            a = left(frame)
+            b = right(frame)
+            if a.__class__ is float and b.__class__ is float: return fn(a, b)
+            raise LoxRuntimeError(token, "Operands must be numbers.")
+        return number
+
+    def visit_call_expr(self, expr: CallExpr) -> Compiled:
+        callee = self.compile_expr(expr.callee)
+        arguments = [self.compile_expr(argument) for argument in expr.arguments]
+        count = len(arguments)
+        token = expr.paren
+        interpreter = self.interpreter
+
+        def call(frame):
+            fn = callee(frame)
+            values = [argument(frame) for argument in arguments]
+
+            if fn.__class__ is ClosureFunction:
+                if count != len(fn.declaration.params):
+                    raise LoxRuntimeError(token, f'Expected {fn.arity()} arguments but got {count}.')
+                completion = fn.body(Frame(fn.closure, values + fn.padding))
+                while completion.__class__ is TailCall:
+                    fn = completion.function
+                    completion = fn.body(Frame(fn.closure, completion.arguments + fn.padding))
+                if completion != None: return completion[0]
+                return None
+
+            if not isinstance(fn, LoxCallable):
+                raise LoxRuntimeError(token, "Can only call functions and classes.")
+            if count != fn.arity():
+                raise LoxRuntimeError(token, f'Expected {fn.arity()} arguments but got {count}.')
+            try:
+                return fn.call(interpreter, values)
+            except LoxRuntimeError as e:
+                raise e.at(token)
+        return call
+
+    def visit_grouping_expr(self, expr: GroupingExpr) -> Compiled:
+        return self.compile_expr(expr.expression)
+
+    def visit_literal_expr(self, expr: LiteralExpr) -> Compiled:
+        value = expr.value
+        return lambda frame: value
+
+    def visit_logical_expr(self, expr: LogicalExpr) -> Compiled:
+        left = self.compile_expr(expr.left)
+        right = self.compile_expr(expr.right)
+
+        if expr.operator.type == TokenType.OR:
+            def logical_or(frame):
+                value = left(frame)
+                if value is not None and value is not False: return value
+                return right(frame)
+            return logical_or
+
+        def logical_and(frame):
+            value = left(frame)
+            if value is None or value is False: return value
+            return right(frame)
+        return logical_and
+
+    def visit_unary_expr(self, expr: UnaryExpr) -> Compiled:
+        right = self.compile_expr(expr.right)
+        token = expr.operator
+
+        if token.type == TokenType.MINUS:
+            def negate(frame):
+                value = right(frame)
+                if value.__class__ is float: return -value
+                raise LoxRuntimeError(token, "Operand must be a number.")
+            return negate
+
+        def bang(frame):
+            value = right(frame)
+            return value is None or value is False
+        return bang
+
+    def visit_variable_expr(self, expr: VariableExpr) -> Compiled:
+        local = self.locals.get(expr)
+        if local == None:
+            globals = self.globals
+            token = expr.name
+            name = token.lexeme
+            def get_global(frame):
+                if name not in globals:
+                    raise LoxRuntimeError(token, f"Undefined variable '{name}'.")
+                return globals[name]
+            return get_global
+
+        depth, slot = local
+        if depth == 0:
+            return lambda frame: frame.slots[slot]
+        if depth == 1:
+            return lambda frame: frame.enclosing.slots[slot]
+
+        def get_enclosing(frame):
+            for _ in range(depth):
+                frame = frame.enclosing
+            return frame.slots[slot]
+        return get_enclosing
+
+class ClosureInterpreter(Interpreter):
+    # Shares globals, natives and the Resolver's tables with the tree-walker;
+    # only the execution strategy differs.
+
+    def interpret(self, statements: List[Stmt]):
+        compiled = ClosureCompiler(self).compile(statements)
+        try:
+            for statement in compiled:
+                statement(self.globals)
+        except LoxRuntimeError as e:
+            self.report_runtime_error(e)
+        finally:
+            self.output.flush()
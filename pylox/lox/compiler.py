@@ -0,0 +1,252 @@
+from array import array
+from typing import Any, Dict, List
+from .expr import *
+from .stmt import *
+from .token import Token, TokenType
+from .lox_callable import Interpreter
+
+# Opcodes. Each instruction is one word in Chunk.code, followed by its operands.
+OP_CONSTANT = 0             # index           push constants[index]
+OP_NIL = 1
+OP_TRUE = 2
+OP_FALSE = 3
+OP_POP = 4
+OP_GET_LOCAL = 5            # slot            local in the current frame
+OP_SET_LOCAL = 6            # slot
+OP_DEFINE_LOCAL = 7         # slot            pops the value
+OP_GET_ENCLOSING = 8        # depth, slot     local in an enclosing frame
+OP_SET_ENCLOSING = 9        # depth, slot
+OP_GET_GLOBAL = 10          # name index
+OP_SET_GLOBAL = 11          # name index
+OP_DEFINE_GLOBAL = 12       # name index      pops the value
+OP_ADD = 13
+OP_SUBTRACT = 14
+OP_MULTIPLY = 15
+OP_DIVIDE = 16
+OP_GREATER = 17
+OP_GREATER_EQUAL = 18
+OP_LESS = 19
+OP_LESS_EQUAL = 20
+OP_EQUAL = 21
+OP_NOT_EQUAL = 22
+OP_NEGATE = 23
+OP_NOT = 24
+OP_PRINT = 25
+OP_JUMP = 26                # target
+OP_JUMP_IF_FALSE = 27       # target          pops the condition
+OP_JUMP_IF_FALSE_OR_POP = 28  # target        keeps the value if jumping
+OP_JUMP_IF_TRUE_OR_POP = 29   # target
+OP_CALL = 30                # argument count
+OP_CLOSURE = 31             # proto index
+OP_RETURN = 32
+OP_PUSH_FRAME = 33          # size
+OP_POP_FRAME = 34
+OP_LOOP = 35                # target          jumps back to the start of a loop
+
+binary_opcodes = {
+    TokenType.PLUS          : OP_ADD,
+    TokenType.MINUS         : OP_SUBTRACT,
+    TokenType.STAR          : OP_MULTIPLY,
+    TokenType.SLASH         : OP_DIVIDE,
+    TokenType.GREATER       : OP_GREATER,
+    TokenType.GREATER_EQUAL : OP_GREATER_EQUAL,
+    TokenType.LESS          : OP_LESS,
+    TokenType.LESS_EQUAL    : OP_LESS_EQUAL,
+    TokenType.EQUAL_EQUAL   : OP_EQUAL,
+    TokenType.BANG_EQUAL    : OP_NOT_EQUAL
+}
+
+class Chunk:
+    def __init__(self) -> None:
+        self.code = array('l')
+        self.constants: List[Any] = []
+        # Offset of each instruction that can fail -> token to report it at.
+        self.tokens: Dict[int, Token] = {}
+        self.constant_indexes: Dict[Any, int] = {}
+
+    def write(self, *words: int) -> int:
+        offset = len(self.code)
+        self.code.extend(words)
+        return offset
+
+    def add_constant(self, value: Any) -> int:
+        # Keyed on type as well, so that 1.0 and true don't share an entry,
+        # and on a float's repr, so that 0 and -0 don't either.
+        key = (type(value), repr(value) if type(value) is float else value)
+        index = self.constant_indexes.get(key)
+        if index == None:
+            index = len(self.constants)
+            self.constants.append(value)
+            self.constant_indexes[key] = index
+        return index
+
+class FunctionProto:
+    def __init__(self, name: Token, arity: int, frame_size: int) -> None:
+        self.name = name
+        self.arity = arity
+        self.frame_size = frame_size
+        self.chunk = Chunk()
+
+class Compiler(ExprVisitor, StmtVisitor):
+    # Compiles resolved statements into bytecode for the VM. Variable
+    # addressing comes from the Resolver's tables on the interpreter.
+    def __init__(self, interpreter: Interpreter) -> None:
+        self.locals = interpreter.locals
+        self.frame_sizes = interpreter.frame_sizes
+        self.chunk = None
+
+    def compile(self, statements: List[Stmt]) -> Chunk:
+        self.chunk = Chunk()
+        for statement in statements:
+            self.compile_stmt(statement)
+        self.emit(OP_NIL)
+        self.emit(OP_RETURN)
+        return self.chunk
+
+    def compile_stmt(self, stmt: Stmt) -> None:
+        stmt.accept(self)
+
+    def compile_expr(self, expr: Expr) -> None:
+        expr.accept(self)
+
+    def emit(self, *words: int, token: Token=None) -> int:
+        offset = self.chunk.write(*words)
+        if token != None:
+            self.chunk.tokens[offset] = token
+        return offset
+
+    def emit_jump(self, op: int) -> int:
+        return self.emit(op, -1) + 1
+
+    def patch_jump(self, operand: int) -> None:
+        self.chunk.code[operand] = len(self.chunk.code)
+
+    def emit_define(self, stmt: Stmt, name: Token) -> None:
+        local = self.locals.get(stmt)
+        if local != None:
+            self.emit(OP_DEFINE_LOCAL, local[1])
+        else:
+            self.emit(OP_DEFINE_GLOBAL, self.chunk.add_constant(name.lexeme))
+
+    def visit_block_stmt(self, stmt: BlockStmt) -> None:
+        self.emit(OP_PUSH_FRAME, self.frame_sizes[stmt])
+        for statement in stmt.statements:
+            self.compile_stmt(statement)
+        self.emit(OP_POP_FRAME)
+
+    def visit_expression_stmt(self, stmt: ExpressionStmt) -> None:
+        self.compile_expr(stmt.expression)
+        self.emit(OP_POP)
+
+    def visit_function_stmt(self, stmt: FunctionStmt) -> None:
+        proto = FunctionProto(stmt.name, len(stmt.params), self.frame_sizes[stmt])
+
+        enclosing = self.chunk
+        self.chunk = proto.chunk
+        for statement in stmt.body:
+            self.compile_stmt(statement)
+        self.emit(OP_NIL)
+        self.emit(OP_RETURN)
+        self.chunk = enclosing
+
+        self.emit(OP_CLOSURE, self.chunk.add_constant(proto))
+        self.emit_define(stmt, stmt.name)
+
+    def visit_if_stmt(self, stmt: IfStmt) -> None:
+        self.compile_expr(stmt.condition)
+        else_jump = self.emit_jump(OP_JUMP_IF_FALSE)
+        self.compile_stmt(stmt.thenBranch)
+
+        if stmt.elseBranch != None:
+            end_jump = self.emit_jump(OP_JUMP)
+            self.patch_jump(else_jump)
+            self.compile_stmt(stmt.elseBranch)
+            self.patch_jump(end_jump)
+        else:
+            self.patch_jump(else_jump)
+
+    def visit_print_stmt(self, stmt: PrintStmt) -> None:
+        self.compile_expr(stmt.expression)
+        self.emit(OP_PRINT)
+
+    def visit_return_stmt(self, stmt: ReturnStmt) -> None:
+        if stmt.value != None:
+            self.compile_expr(stmt.value)
+        else:
+            self.emit(OP_NIL)
+        self.emit(OP_RETURN)
+
+    def visit_var_stmt(self, stmt: VarStmt) -> None:
+        if stmt.initializer != None:
+            self.compile_expr(stmt.initializer)
+        else:
+            self.emit(OP_NIL)
+        self.emit_define(stmt, stmt.name)
+
+    def visit_while_stmt(self, stmt: WhileStmt) -> None:
+        loop_start = len(self.chunk.code)
+        self.compile_expr(stmt.condition)
+        exit_jump = self.emit_jump(OP_JUMP_IF_FALSE)
+        self.compile_stmt(stmt.body)
+        self.emit(OP_LOOP, loop_start)
+        self.patch_jump(exit_jump)
+
+    def visit_assign_expr(self, expr: AssignExpr) -> None:
+        self.compile_expr(expr.value)
+
+        local = self.locals.get(expr)
+        if local == None:
+            self.emit(OP_SET_GLOBAL, self.chunk.add_constant(expr.name.lexeme), token=expr.name)
+        elif local[0] == 0:
+            self.emit(OP_SET_LOCAL, local[1])
+        else:
+            self.emit(OP_SET_ENCLOSING, local[0], local[1])
+
+    def visit_binary_expr(self, expr: BinaryExpr) -> None:
+        self.compile_expr(expr.left)
+        self.compile_expr(expr.right)
+        self.emit(binary_opcodes[expr.operator.type], token=expr.operator)
+
+    def visit_call_expr(self, expr: CallExpr) -> None:
+        self.compile_expr(expr.callee)
+        for argument in expr.arguments:
+            self.compile_expr(argument)
+        self.emit(OP_CALL, len(expr.arguments), token=expr.paren)
+
+    def visit_grouping_expr(self, expr: GroupingExpr) -> None:
+        self.compile_expr(expr.expression)
+
+    def visit_literal_expr(self, expr: LiteralExpr) -> None:
+        if expr.value is None:
+            self.emit(OP_NIL)
+        elif expr.value is True:
+            self.emit(OP_TRUE)
+        elif expr.value is False:
+            self.emit(OP_FALSE)
+        else:
+            self.emit(OP_CONSTANT, self.chunk.add_constant(expr.value))
+
+    def visit_logical_expr(self, expr: LogicalExpr) -> None:
+        self.compile_expr(expr.left)
+        if expr.operator.type == TokenType.OR:
+            end_jump = self.emit_jump(OP_JUMP_IF_TRUE_OR_POP)
+        else:
+            end_jump = self.emit_jump(OP_JUMP_IF_FALSE_OR_POP)
+        self.compile_expr(expr.right)
+        self.patch_jump(end_jump)
+
+    def visit_unary_expr(self, expr: UnaryExpr) -> None:
+        self.compile_expr(expr.right)
+        if expr.operator.type == TokenType.MINUS:
+            self.emit(OP_NEGATE, token=expr.operator)
+        else:
+            self.emit(OP_NOT)
+
+    def visit_variable_expr(self, expr: VariableExpr) -> None:
+        local = self.locals.get(expr)
+        if local == None:
+            self.emit(OP_GET_GLOBAL, self.chunk.add_constant(expr.name.lexeme), token=expr.name)
+        elif local[0] == 0:
+            self.emit(OP_GET_LOCAL, local[1])
+        else:
+            self.emit(OP_GET_ENCLOSING, local[0], local[1])
@@ -0,0 +1,143 @@
+from typing import Any, Callable, Dict, List
+from .lox_callable import LoxCallable, NativeFunction, Interpreter
+from .lox_runtime_error import LoxRuntimeError
+from .arrays import LoxArray, check_index, array_get, array_set
+
+class LoxList:
+    # A growable list of any Lox values, held by reference like a function.
+    __slots__ = ('items', 'printing')
+
+    def __init__(self, items: List[Any]) -> None:
+        self.items = items
+        # Set while the list is being printed, so a list holding itself
+        # prints as [...] instead of recursing forever.
+        self.printing = False
+
+    def text(self, stringify: Callable[[Any], str]) -> str:
+        if self.printing: return '[...]'
+        self.printing = True
+        try:
+            return '[' + ', '.join(stringify(item) for item in self.items) + ']'
+        finally:
+            self.printing = False
+
+class LoxMap:
+    # A map from Lox values to Lox values, held by reference, that keeps its
+    # keys in the order they were first set. Two keys are the same key when
+    # Interpreter.is_equal says they are, since both come down to ==; natives
+    # get ropes flattened, so a string key is always a str.
+    __slots__ = ('entries', 'printing')
+
+    def __init__(self, entries: Dict[Any, Any]) -> None:
+        self.entries = entries
+        self.printing = False
+
+    def text(self, stringify: Callable[[Any], str]) -> str:
+        if self.printing: return '{...}'
+        self.printing = True
+        try:
+            return '{' + ', '.join(f'{stringify(key)}: {stringify(value)}' for key, value in self.entries.items()) + '}'
+        finally:
+            self.printing = False
+
+def check_collection(value: Any) -> None:
+    if value.__class__ is not LoxList and value.__class__ is not LoxMap and value.__class__ is not LoxArray:
+        raise LoxRuntimeError(None, 'Operand must be an array, list or map.')
+
+def check_list(value: Any) -> List[Any]:
+    if value.__class__ is not LoxList:
+        raise LoxRuntimeError(None, 'Operand must be a list.')
+    return value.items
+
+def check_map(value: Any) -> Dict[Any, Any]:
+    if value.__class__ is not LoxMap:
+        raise LoxRuntimeError(None, 'Operand must be a map.')
+    return value.entries
+
+def list_of_nothing() -> LoxList:
+    return LoxList([])
+
+def map_of_nothing() -> LoxMap:
+    return LoxMap({})
+
+def list_append(target: Any, value: Any) -> None:
+    check_list(target).append(value)
+
+def collection_get(target: Any, key: Any) -> Any:
+    # A map gives nil for a key it doesn't have; has() tells the two apart.
+    if target.__class__ is LoxList:
+        return target.items[check_index(key, len(target.items) - 1)]
+    if target.__class__ is LoxMap:
+        return target.entries.get(key)
+    check_collection(target)
+    return array_get(target, key)
+
+def collection_set(target: Any, key: Any, value: Any) -> Any:
+    if target.__class__ is LoxList:
+        target.items[check_index(key, len(target.items) - 1)] = value
+        return value
+    if target.__class__ is LoxMap:
+        target.entries[key] = value
+        return value
+    check_collection(target)
+    return array_set(target, key, value)
+
+def map_has(target: Any, key: Any) -> bool:
+    return key in check_map(target)
+
+def collection_length(target: Any) -> float:
+    check_collection(target)
+    if target.__class__ is LoxList: return float(len(target.items))
+    if target.__class__ is LoxMap: return float(len(target.entries))
+    return float(len(target.data))
+
+def map_keys(target: Any) -> LoxList:
+    return LoxList(list(check_map(target)))
+
+class EachNative(LoxCallable):
+    # each(collection, fn) calls fn with every element of an array or list,
+    # or with every key and value of a map, in order. Unlike the other
+    # natives it calls back into Lox, so it needs the interpreter.
+    def __init__(self) -> None:
+        self.name = 'each'
+
+    def arity(self) -> int:
+        return 2
+
+    def call(self, interpreter: Interpreter, arguments: List[Any]) -> None:
+        target, fn = arguments
+        check_collection(target)
+        if not isinstance(fn, LoxCallable):
+            raise LoxRuntimeError(None, 'Can only call functions and classes.')
+        count = 2 if target.__class__ is LoxMap else 1
+        if fn.arity() != count:
+            raise LoxRuntimeError(None, f'Expected a function of {count} arguments but got {fn.arity()}.')
+
+        # Copied first, so the function can change the collection.
+        if target.__class__ is LoxMap:
+            for key, value in list(target.entries.items()):
+                fn.call(interpreter, [key, value])
+        elif target.__class__ is LoxList:
+            for item in list(target.items):
+                fn.call(interpreter, [item])
+        else:
+            for item in target.data.tolist():
+                fn.call(interpreter, [float(item)])
+        return None
+
+    def __str__(self) -> str:
+        return "<native fn>"
+
+def collection_natives() -> List[LoxCallable]:
+    # get, set and length work on arrays as well as lists and maps.
+    return [
+        NativeFunction('list', 0, list_of_nothing),
+        NativeFunction('map', 0, map_of_nothing),
+        NativeFunction('append', 2, list_append),
+        NativeFunction('get', 2, collection_get),
+        NativeFunction('set', 3, collection_set),
+        NativeFunction('has', 2, map_has),
+        NativeFunction('length', 1, collection_length),
+        NativeFunction('keys', 1, map_keys),
+        EachNative()
+    ]
@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, List
 from .token import Token
 from .lox_runtime_error import LoxRuntimeError
 
@@ -7,12 +7,22 @@ class Environment:
 
 class Environment:
 
+    # Only the global scope is an Environment; names are looked up by string.
+    # Interpreters may cache what a watched name is bound to, as long as the
+    # version hasn't changed since: it does whenever a watched name is
+    # assigned or declared again.
     def __init__(self, enclosing: Environment=None) -> None:
         self.values = {}
         self.enclosing = enclosing
+        self.watched = set()
+        self.version = 0
+
+    def watch(self, name: str) -> None:
+        self.watched.add(name)
 
     def assign(self, name: Token, value: Any) -> None:
         if name.lexeme in self.values:
+            if name.lexeme in self.watched: self.version += 1
             self.values[name.lexeme] = value
             return
         
@@ -23,6 +33,7 @@ class Environment:
         raise LoxRuntimeError(name, f"Undefined variable '{name.lexeme}'.")
 
     def define(self, name: str, value: Any) -> None:
+        if name in self.watched: self.version += 1
         self.values[name] = value
 
     def get(self, name: Token) -> Any:
@@ -33,4 +44,30 @@ class Environment:
         if self.enclosing != None:
             return self.enclosing.get(name)
         
-        raise LoxRuntimeError(name, f"Undefined variable '{name.lexeme}'.")
\ No newline at end of file
+        raise LoxRuntimeError(name, f"Undefined variable '{name.lexeme}'.")
+
+class Frame:
+    pass
+
+class Frame:
+
+    # A local scope (block body or function call). Its size is fixed by the
+    # Resolver, so locals live in a preallocated list addressed by slot index.
+    __slots__ = ('slots', 'enclosing')
+
+    def __init__(self, enclosing: Any, slots: List[Any]) -> None:
+        self.slots = slots
+        self.enclosing = enclosing
+
+    def ancestor(self, distance: int) -> Frame:
+        frame = self
+        for _ in range(distance):
+            frame = frame.enclosing
+
+        return frame
+
+    def get_at(self, distance: int, slot: int) -> Any:
+        return self.ancestor(distance).slots[slot]
+
+    def assign_at(self, distance: int, slot: int, value: Any) -> None:
+        self.ancestor(distance).slots[slot] = value
@@ -52,11 +52,15 @@ class ExprVisitor(ABC):
 
 # Expr base class and sub classes
 class Expr(ABC):
+  __slots__ = ()
+
   @abstractmethod
   def accept(self, visitor: ExprVisitor):
     pass
 
 class AssignExpr(Expr):
+  __slots__ = ('name', 'value')
+
   def __init__(self, name: Token, value: Expr) -> None:
     self.name = name
     self.value = value
@@ -65,6 +69,8 @@ class AssignExpr(Expr):
     return visitor.visit_assign_expr(self)
 
 class BinaryExpr(Expr):
+  __slots__ = ('left', 'operator', 'right')
+
   def __init__(self, left: Expr, operator: Token, right: Expr) -> None:
     self.left = left
     self.operator = operator
@@ -74,6 +80,8 @@ class BinaryExpr(Expr):
     return visitor.visit_binary_expr(self)
 
 class CallExpr(Expr):
+  __slots__ = ('callee', 'paren', 'arguments')
+
   def __init__(self, callee: Expr, paren: Token, arguments: List[Expr]) -> None:
     self.callee = callee
     self.paren = paren
@@ -83,6 +91,8 @@ class CallExpr(Expr):
     return visitor.visit_call_expr(self)
 
 class GroupingExpr(Expr):
+  __slots__ = ('expression',)
+
   def __init__(self, expression: Expr) -> None:
     self.expression = expression
 
@@ -90,6 +100,8 @@ class GroupingExpr(Expr):
     return visitor.visit_grouping_expr(self)
 
 class LiteralExpr(Expr):
+  __slots__ = ('value',)
+
   def __init__(self, value: Any) -> None:
     self.value = value
 
@@ -97,6 +109,8 @@ class LiteralExpr(Expr):
     return visitor.visit_literal_expr(self)
 
 class LogicalExpr(Expr):
+  __slots__ = ('left', 'operator', 'right')
+
   def __init__(self, left: Expr, operator: Token, right: Expr) -> None:
     self.left = left
     self.operator = operator
@@ -106,6 +120,8 @@ class LogicalExpr(Expr):
     return visitor.visit_logical_expr(self)
 
 class UnaryExpr(Expr):
+  __slots__ = ('operator', 'right')
+
   def __init__(self, operator: Token, right: Expr) -> None:
     self.operator = operator
     self.right = right
@@ -114,6 +130,8 @@ class UnaryExpr(Expr):
     return visitor.visit_unary_expr(self)
 
 class VariableExpr(Expr):
+  __slots__ = ('name',)
+
   def __init__(self, name: Token) -> None:
     self.name = name
 
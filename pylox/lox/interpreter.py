@@ -6,16 +6,27 @@ from .lox_callable import *
 from .lox_function import LoxFunction
 from .lox_runtime_error import LoxRuntimeError
 from .lox import runtime_error
-from .environment import Environment
-from .return_obj import Return
-from typing import Any, List
+from .environment import Environment, Frame
+from .return_obj import TailCall
+from .output import OutputSink
+from .rope import is_string, concat
+from .arrays import array_natives
+from .containers import LoxList, LoxMap, collection_natives
+from typing import Any, List, Set
 from time import time
 
 class Interpreter(ExprVisitor, StmtVisitor):
 
-  def __init__(self) -> None:
+  def __init__(self, output: OutputSink=None) -> None:
+    self.output = output if output != None else OutputSink()
     self.globals = Environment()
     self.environment = self.globals
+    self.locals = {}
+    self.frame_sizes = {}
+    self.tail_calls = {}
+    # Calls to a global function, with the function and the version of the
+    # globals it was checked against.
+    self.call_caches = {}
 
     class ClockNativeFn(LoxCallable):
       def arity(self) -> int:
@@ -28,13 +39,26 @@ class Interpreter(ExprVisitor, StmtVisitor):
         return "<native fn>"
     
     self.globals.define("clock", ClockNativeFn())
+    for native in array_natives() + collection_natives():
+      self.globals.define(native.name, native)
+
+  def define_native(self, name: str, fn: LoxCallable) -> None:
+    self.globals.define(name, fn)
 
   def interpret(self, statements: List[Stmt]):
     try:
       for statement in statements:
         self.execute(statement)
     except LoxRuntimeError as e:
-      runtime_error(e)
+      self.report_runtime_error(e)
+    finally:
+      self.output.flush()
+
+  def report_runtime_error(self, error: LoxRuntimeError) -> None:
+    # Whatever was printed before the error has to reach the output stream
+    # before the message reaches stderr.
+    self.output.flush()
+    runtime_error(error)
 
   def visit_literal_expr(self, expr: LiteralExpr) -> Any:
     return expr.value
@@ -64,7 +88,14 @@ class Interpreter(ExprVisitor, StmtVisitor):
     return None
   
   def visit_variable_expr(self, expr: VariableExpr) -> Any:
-    return self.environment.get(expr.name)
+    return self.look_up_variable(expr.name, expr)
+
+  def look_up_variable(self, name: Token, expr: Expr) -> Any:
+    local = self.locals.get(expr)
+    if local != None:
+      return self.environment.get_at(local[0], local[1])
+    else:
+      return self.globals.get(name)
 
   def visit_binary_expr(self, expr: BinaryExpr):
     left = self.evaluate(expr.left)
@@ -82,8 +113,8 @@ class Interpreter(ExprVisitor, StmtVisitor):
     elif expr.operator.type == TokenType.PLUS:
       if isinstance(left, float) and isinstance(right, float):
         return float(left) + float(right)
-      if isinstance(left, str) and isinstance(right, str):
-        return str(left) + str(right)
+      if is_string(left) and is_string(right):
+        return self.concatenate(expr.operator, left, right)
       raise LoxRuntimeError(expr.operator, "Operands must be two numbers or two strings.")
     elif expr.operator.type == TokenType.GREATER:
       self.check_number_operands(expr.operator, left, right)
@@ -106,6 +137,28 @@ class Interpreter(ExprVisitor, StmtVisitor):
     return None
   
   def visit_call_expr(self, expr: CallExpr) -> Any:
+    try:
+      cache = self.call_caches.get(expr)
+      if cache != None and cache[0] == self.globals.version:
+        return cache[1].call(self, [argument.accept(self) for argument in expr.arguments])
+
+      fn, arguments = self.evaluate_call(expr)
+      return fn.call(self, arguments)
+    except LoxRuntimeError as e:
+      raise e.at(expr.paren)
+
+  def evaluate_call(self, expr: CallExpr) -> Any:
+    cache = self.call_caches.get(expr)
+    if cache != None and cache[0] == self.globals.version:
+      return cache[1], [self.evaluate(argument) for argument in expr.arguments]
+
+    # The name is watched before anything is evaluated, so that an argument
+    # rebinding it changes the version from the one taken here.
+    is_global = expr.callee.__class__ is VariableExpr and expr.callee not in self.locals
+    if is_global and cache == None:
+      self.globals.watch(expr.callee.name.lexeme)
+    version = self.globals.version
+
     callee = self.evaluate(expr.callee)
 
     arguments = []
@@ -118,8 +171,22 @@ class Interpreter(ExprVisitor, StmtVisitor):
     fn: LoxCallable = callee
     if len(arguments) != fn.arity():
       raise LoxRuntimeError(expr.paren, f'Expected {fn.arity()} arguments but got {len(arguments)}.')
-    return fn.call(self, arguments)
+
+    # The same global will pass the same checks until it is bound to
+    # something else, so later calls can skip looking it up and checking it.
+    # An argument may already have rebound it, which the version taken
+    # before evaluating the callee will show. A call that finds a different
+    # function than last time is left uncached from then on.
+    if is_global:
+      if cache == None or cache[1] is fn:
+        self.call_caches[expr] = (version, fn)
+      else:
+        self.call_caches[expr] = (None, None)
+    return fn, arguments
   
+  def concatenate(self, operator: Token, left: Any, right: Any) -> Any:
+    return concat(left, right)
+
   def stringify(self, object: Any) -> str:
     if isinstance(object, float):
       text = str(object)
@@ -130,11 +197,12 @@ class Interpreter(ExprVisitor, StmtVisitor):
     if object == None: return 'nil'
     if object == True: return 'true'
     if object == False: return 'false'
+    if isinstance(object, (LoxList, LoxMap)): return object.text(self.stringify)
     
     return str(object)
 
   def check_number_operand(self, operator: Token, operand: Any) -> None:
-    if isinstance(operator, float): return
+    if isinstance(operand, float): return
     raise LoxRuntimeError(operator, "Operand must be a number.")
   
   def check_number_operands(self, operator: Token, left: Any, right: Any) -> None:
@@ -154,57 +222,102 @@ class Interpreter(ExprVisitor, StmtVisitor):
   def evaluate(self, expr: Expr) -> Any:
     return expr.accept(self)
   
-  def execute(self, stmt: Stmt) -> None:
-    stmt.accept(self)
+  # Executing a statement returns its completion: None when control carries
+  # on with the next statement, a one-element tuple holding the value when a
+  # `return` finished it, or a TailCall for a returned call to a LoxFunction.
+  # Blocks, ifs and loops pass a completion up until LoxFunction.call.
+  def execute(self, stmt: Stmt) -> Any:
+    return stmt.accept(self)
+
+  def resolve(self, node: Any, depth: int, slot: int) -> None:
+    self.locals[node] = (depth, slot)
+
+  def resolve_scope(self, node: Any, size: int) -> None:
+    self.frame_sizes[node] = size
+
+  def resolve_tail_call(self, stmt: ReturnStmt, call: CallExpr) -> None:
+    self.tail_calls[stmt] = call
+
+  def forget_resolutions(self, keep: Set[Any]) -> None:
+    # Drops what the tables hold for every node not in keep, so nodes of
+    # programs that can no longer run don't stay alive through them.
+    for table in (self.locals, self.frame_sizes, self.tail_calls, self.call_caches):
+      for node in [node for node in table if node not in keep]:
+        del table[node]
+
+  def define(self, stmt: Stmt, name: Token, value: Any) -> None:
+    local = self.locals.get(stmt)
+    if local != None:
+      self.environment.slots[local[1]] = value
+    else:
+      self.globals.define(name.lexeme, value)
 
-  def execute_block(self, statements: List[Stmt], environment: Environment) -> None:
+  def execute_block(self, statements: List[Stmt], environment: Frame) -> Any:
     previous = self.environment
     try:
       self.environment = environment
 
       for statement in statements:
-        self.execute(statement)
+        completion = self.execute(statement)
+        if completion != None: return completion
     finally:
       self.environment = previous
 
-  def visit_block_stmt(self, stmt: BlockStmt) -> None:
-    self.execute_block(stmt.statements, Environment(self.environment))
+  def visit_block_stmt(self, stmt: BlockStmt) -> Any:
+    return self.execute_block(stmt.statements, Frame(self.environment, [None] * self.frame_sizes[stmt]))
   
   def visit_expression_stmt(self, stmt: ExpressionStmt) -> None:
     self.evaluate(stmt.expression)
 
   def visit_function_stmt(self, stmt: FunctionStmt) -> None:
-    fn = LoxFunction(stmt, self.environment)
-    self.environment.define(stmt.name.lexeme, fn)
+    fn = LoxFunction(stmt, self.environment, self.frame_sizes[stmt])
+    self.define(stmt, stmt.name, fn)
 
-  def visit_if_stmt(self, stmt: IfStmt) -> None:
+  def visit_if_stmt(self, stmt: IfStmt) -> Any:
     if self.is_truthy(self.evaluate(stmt.condition)):
-      self.execute(stmt.thenBranch)
+      return self.execute(stmt.thenBranch)
     elif stmt.elseBranch != None:
-      self.execute(stmt.elseBranch)
+      return self.execute(stmt.elseBranch)
 
   def visit_print_stmt(self, stmt: PrintStmt) -> None:
     value = self.evaluate(stmt.expression)
-    print(self.stringify(value))
+    self.output.write(self.stringify(value))
+
+  def visit_return_stmt(self, stmt: ReturnStmt) -> Any:
+    call = self.tail_calls.get(stmt)
+    if call != None:
+      fn, arguments = self.evaluate_call(call)
+      # LoxFunction.call runs Lox functions returned this way in a loop.
+      if isinstance(fn, LoxFunction): return TailCall(fn, arguments)
+      try:
+        return (fn.call(self, arguments),)
+      except LoxRuntimeError as e:
+        raise e.at(call.paren)
 
-  def visit_return_stmt(self, stmt: ReturnStmt) -> None:
     value = None
     if stmt.value != None: value = self.evaluate(stmt.value)
 
-    raise Return(value)
+    return (value,)
 
   def visit_var_stmt(self, stmt: VarStmt) -> None:
     value = None
     if stmt.initializer != None:
       value = self.evaluate(stmt.initializer)
 
-    self.environment.define(stmt.name.lexeme, value)
+    self.define(stmt, stmt.name, value)
 
-  def visit_while_stmt(self, stmt: WhileStmt) -> None:
+  def visit_while_stmt(self, stmt: WhileStmt) -> Any:
     while self.is_truthy(self.evaluate(stmt.condition)):
-      self.execute(stmt.body)
+      completion = self.execute(stmt.body)
+      if completion != None: return completion
 
   def visit_assign_expr(self, expr: AssignExpr) -> Any:
     value = self.evaluate(expr.value)
-    self.environment.assign(expr.name, value)
+
+    local = self.locals.get(expr)
+    if local != None:
+      self.environment.assign_at(local[0], local[1], value)
+    else:
+      self.globals.assign(expr.name, value)
+
     return value
\ No newline at end of file
@@ -1,12 +1,65 @@
+import contextlib
+import contextvars
 import sys
+from typing import Iterator, List
 from . import Token, TokenType
 
-had_error = False
-had_runtime_error = False
+ENGINES = ('tree', 'vm', 'closure', 'python', 'async')
+
+class LoxError:
+  __slots__ = ('kind', 'line', 'message', 'text')
+
+  # kind is 'syntax' for scanner, parser and resolver errors and 'runtime'
+  # otherwise; text is the message as pylox prints it.
+  def __init__(self, kind: str, line: int, message: str, text: str) -> None:
+    self.kind = kind
+    self.line = line
+    self.message = message
+    self.text = text
+
+  def __repr__(self) -> str:
+    return f'LoxError({self.kind!r}, {self.line!r}, {self.message!r})'
+
+class ErrorReporter:
+  # Records the errors of a run and whether there were any. The one in use
+  # is held in a context variable, so each thread, or a session while it
+  # runs a script, can have its own. The default one prints every error to
+  # stderr as it is reported.
+  def __init__(self, echo: bool=True) -> None:
+    self.echo = echo
+    self.had_error = False
+    self.had_runtime_error = False
+    self.errors: List[LoxError] = []
+
+  def add(self, error: LoxError) -> None:
+    if error.kind == 'runtime':
+      self.had_runtime_error = True
+    else:
+      self.had_error = True
+    self.errors.append(error)
+    if self.echo: print(error.text, file=sys.stderr)
+
+  def reset(self) -> None:
+    self.had_error = False
+    self.had_runtime_error = False
+    self.errors = []
+
+current_reporter = contextvars.ContextVar('current_reporter', default=ErrorReporter())
+
+def reporter() -> ErrorReporter:
+  return current_reporter.get()
+
+@contextlib.contextmanager
+def reporting(errors: ErrorReporter) -> Iterator[ErrorReporter]:
+  token = current_reporter.set(errors)
+  try:
+    yield errors
+  finally:
+    current_reporter.reset(token)
 
 def runtime_error(error):
-  print(f'{str(error)}\n[line: {error.token.line}]', file=sys.stderr)
-  had_runtime_error = True
+  message = str(error)
+  reporter().add(LoxError('runtime', error.token.line, message, f'{message}\n[line: {error.token.line}]'))
 
 def scanner_error(line: int, message: str) -> None:
   report(line, '', message)
@@ -15,50 +68,158 @@ def parser_error(token: Token, message: str) -> None:
   if token.type == TokenType.EOF:
     report(token.line, " at end", message)
   else:
-    report(token.line, f" at '{token.lexeme,}'", message)
+    report(token.line, f" at '{token.lexeme}'", message)
 
 def report(line: int, where: str, message: str) -> None:
-  global had_error
-  
-  print(f'[line {line}] Error{where}: {message}', file=sys.stderr)
-  had_error = True
-
-def run(source) -> None:
-  from .scanner import Scanner
-  from .parser import Parser
+  reporter().add(LoxError('syntax', line, message, f'[line {line}] Error{where}: {message}'))
+
+def create_interpreter(engine: str='tree', output=None, profiler=None, memo=None, budget=None):
   from .interpreter import Interpreter
+  from .vm import VM
+  from .closure_compiler import ClosureInterpreter
+  from .transpiler import PythonInterpreter
+  from .async_vm import AsyncVM
+
+  if profiler != None:
+    from .profiler import ProfilingInterpreter
+    if engine != 'tree': raise ValueError('only the tree engine can be profiled')
+    return ProfilingInterpreter(output, profiler)
+  if memo != None:
+    from .memoize import MemoizingInterpreter
+    if engine != 'tree': raise ValueError('only the tree engine can memoize')
+    return MemoizingInterpreter(output, memo)
+  if budget != None:
+    from .budget import BudgetedInterpreter
+    if engine != 'tree': raise ValueError('only the tree engine can enforce a budget')
+    return BudgetedInterpreter(output, budget)
+
+  engines = {'tree': Interpreter, 'vm': VM, 'closure': ClosureInterpreter, 'python': PythonInterpreter,
+             'async': AsyncVM}
+  return engines[engine](output)
+
+def parse_source(source, interpreter, optimize: bool=True, optimizer_report: bool=False, cache=None):
+  from .scanner import RegexScanner
+  from .token_store import TokenStore
+  from .parser import Parser, StoreParser
+  from .resolver import Resolver
+  from .optimizer import Optimizer
+
+  if cache != None:
+    entry = cache.load(source, interpreter, optimize)
+    if entry != None:
+      statements, report = entry
+      if optimizer_report and report != None: print(report, file=sys.stderr)
+      return statements
+
+  # Text is scanned into Token objects; a bytes-like source, such as a
+  # mapped file, into a TokenStore over the same buffer.
+  if isinstance(source, str):
+    parser = Parser(RegexScanner(source).scan_tokens())
+  else:
+    parser = StoreParser(TokenStore(source).scan())
+  statements = parser.parse()
 
+  if reporter().had_error: return None
 
-  scanner = Scanner(source)
-  interpreter = Interpreter()
-  tokens = scanner.scan_tokens()
-  parser = Parser(tokens)
-  statements = parser.parse()
+  resolver = Resolver(interpreter)
+  resolver.resolve(statements)
 
-  if had_error: return
+  # Stop if there was a resolution error.
+  if reporter().had_error: return None
 
-  interpreter.interpret(statements)
+  report = None
+  if optimize:
+    optimizer = Optimizer(interpreter, resolver.declarations, resolver.assigned)
+    statements = optimizer.optimize(statements)
+    report = optimizer.report()
+    if optimizer_report: print(report, file=sys.stderr)
 
-def run_file(filename) -> None:
-  global had_error
+  if cache != None: cache.store(source, interpreter, optimize, statements, report)
+  return statements
 
-  with open(filename, 'r') as f:
-    source = f.read()
-  run(source)
+def run(source, engine: str='tree', optimize: bool=True, optimizer_report: bool=False, cache=None, output=None, profiler=None, memo=None, budget=None) -> None:
+  interpreter = create_interpreter(engine, output, profiler, memo, budget)
+  statements = parse_source(source, interpreter, optimize, optimizer_report, cache)
+  if statements == None: return
+
+  # The budget is for running the program, not for parsing it.
+  if budget != None: interpreter.restart()
+  interpreter.interpret(statements)
 
-  if had_error:
+def run_stream(chunks, engine: str='tree', optimize: bool=True, optimizer_report: bool=False, output=None, profiler=None, budget=None) -> None:
+  # Executes each top-level declaration as soon as it has been parsed, so
+  # output starts early and memory holds one declaration's tokens at a time
+  # plus whatever the program itself keeps alive. The error policy follows
+  # from running code before the rest of the source has been read:
+  #
+  # * A syntax or resolution error stops execution, but scanning and parsing
+  #   carry on to the end so every syntax error is still reported. Output of
+  #   the declarations that already ran stands. Exit code 65.
+  # * A runtime error stops execution and the rest of the source is not
+  #   read, so syntax errors after it go unreported. Exit code 70.
+  # * A global that is read but never declared can only be detected at the
+  #   end of the source. It is reported then (exit code 65), unless reading
+  #   it at runtime has already failed (exit code 70).
+  from .scanner import RegexScanner
+  from .parser import StreamingParser
+  from .resolver import Resolver
+  from .optimizer import Optimizer
+
+  errors = reporter()
+  interpreter = create_interpreter(engine, output, profiler, budget=budget)
+  parser = StreamingParser(RegexScanner(chunks).scan())
+  resolver = Resolver(interpreter)
+  optimizer = Optimizer(interpreter, resolver.declarations, resolver.assigned)
+
+  for statement in parser.parse_declarations():
+    if errors.had_error: continue
+
+    resolver.resolve_statements([statement])
+    if errors.had_error: continue
+
+    statements = [statement]
+    if optimize: statements = optimizer.optimize(statements)
+    interpreter.interpret(statements)
+    if errors.had_runtime_error: return
+
+  resolver.resolve([])
+  if optimize and optimizer_report: print(optimizer.report(), file=sys.stderr)
+
+def run_file(filename, engine: str='tree', optimize: bool=True, optimizer_report: bool=False, stream: bool=False, cache=None, output=None, profiler=None, memo=None, budget=None) -> None:
+  from .token_store import map_source
+
+  if stream:
+    with open(filename, 'r') as f:
+      run_stream(f, engine, optimize, optimizer_report, output, profiler, budget)
+  else:
+    with open(filename, 'rb') as f, map_source(f) as source:
+      run(source, engine, optimize, optimizer_report, cache, output, profiler, memo, budget)
+
+  if reporter().had_error:
     sys.exit(65)
 
-  if had_runtime_error:
+  if reporter().had_runtime_error:
     sys.exit(70)
 
-def run_prompt() -> None:
-  global had_error
+def emit_python(filename, optimize: bool=True) -> None:
+  from .transpiler import Transpiler
+
+  with open(filename, 'r') as f:
+    source = f.read()
+
+  interpreter = create_interpreter('python')
+  statements = parse_source(source, interpreter, optimize)
+  if statements != None:
+    print(Transpiler(interpreter).transpile(statements), end='')
+
+  if reporter().had_error:
+    sys.exit(65)
 
+def run_prompt(engine: str='tree', optimize: bool=True, optimizer_report: bool=False, output=None) -> None:
   while True:
     line = input("> ")
     if not line:
       break
-    run(line)
-    had_error = False
+    run(line, engine, optimize, optimizer_report, output=output)
+    reporter().had_error = False
 
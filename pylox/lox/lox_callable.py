@@ -1,5 +1,8 @@
+import asyncio
+import inspect
 from typing import Any, List
 from abc import ABC, abstractmethod
+from .rope import flatten
 
 class Interpreter:
     pass
@@ -11,4 +14,36 @@ class LoxCallable(ABC):
 
     @abstractmethod
     def call(self, interpreter: Interpreter, arguments: List[Any]):
-        pass
\ No newline at end of file
+        pass
+
+class NativeFunction(LoxCallable):
+    # A Python function callable from Lox. It gets Lox values (float, str,
+    # bool, None or a LoxCallable) as positional arguments; a Python int it
+    # returns becomes a Lox number. An `async def` function is awaited by the
+    # async engine, which runs other scripts meanwhile; the other engines run
+    # it to completion on an event loop of its own. A native fails with a Lox
+    # runtime error by raising a LoxRuntimeError without a token, which is
+    # then reported at the line of the call.
+    def __init__(self, name: str, arity: int, function: Any) -> None:
+        self.name = name
+        self.native_arity = arity
+        self.function = function
+        self.is_async = inspect.iscoroutinefunction(function)
+
+    def arity(self) -> int:
+        return self.native_arity
+
+    def call(self, interpreter: Interpreter, arguments: List[Any]):
+        if self.is_async: return self.lox_value(asyncio.run(self.function(*self.python_values(arguments))))
+        return self.lox_value(self.function(*self.python_values(arguments)))
+
+    def python_values(self, arguments: List[Any]) -> List[Any]:
+        # Natives see strings built by + as plain str.
+        return [flatten(argument) for argument in arguments]
+
+    def lox_value(self, result: Any) -> Any:
+        if result.__class__ is int: return float(result)
+        return result
+
+    def __str__(self) -> str:
+        return "<native fn>"
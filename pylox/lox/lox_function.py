@@ -1,24 +1,30 @@
 from typing import Any, List
 from .lox_callable import LoxCallable, Interpreter
 from .stmt import FunctionStmt
-from .return_obj import Return
-from .environment import Environment
+from .return_obj import TailCall
+from .environment import Frame
 
 class LoxFunction(LoxCallable):
-    def __init__(self, declaration: FunctionStmt, closure: Environment) -> None:
+    def __init__(self, declaration: FunctionStmt, closure: Any, frame_size: int) -> None:
         self.declaration = declaration
         self.closure = closure
+        # Slots for the body's own locals, appended after the parameters.
+        self.padding = [None] * (frame_size - len(declaration.params))
 
     def call(self, interpreter: Interpreter, arguments: List[Any]) -> Any:
-        environment = Environment(self.closure)
+        fn = self
+        while True:
+            environment = Frame(fn.closure, arguments + fn.padding)
+            completion = interpreter.execute_block(fn.declaration.body, environment)
 
-        for i, _ in enumerate(self.declaration.params):
-            environment.define(self.declaration.params[i].lexeme, arguments[i])
+            # A tail call hands back the function instead of calling it, so
+            # the call runs here without another Python frame.
+            if completion.__class__ is not TailCall: break
+            fn = completion.function
+            arguments = completion.arguments
 
-        try:
-            interpreter.execute_block(self.declaration.body, environment)
-        except Return as r:
-            return r.value
+        if completion != None: return completion[0]
+        return None
 
     def arity(self) -> int:
         return len(self.declaration.params)
@@ -3,4 +3,9 @@ from .token import Token
 class LoxRuntimeError(RuntimeError):
     def __init__(self, token: Token, message: str) -> None:
         super().__init__(message)
-        self.token = token
\ No newline at end of file
+        self.token = token
+
+    def at(self, token: Token) -> 'LoxRuntimeError':
+        # Natives raise errors without a token; the call gives them its own.
+        if self.token == None: self.token = token
+        return self
\ No newline at end of file
@@ -0,0 +1,85 @@
+from collections import Counter, OrderedDict
+from typing import Any, List, Set
+from .stmt import Stmt, FunctionStmt
+from .interpreter import Interpreter
+from .lox_function import LoxFunction
+from .output import OutputSink
+from .purity import PurityAnalyzer
+
+MISSING = object()
+
+def memo_key(arguments: List[Any]) -> tuple:
+    # Python treats true and 1, and 0 and -0, as the same dictionary key, but
+    # Lox doesn't treat them as the same value. Pairing each argument with its
+    # class separates the first, and comparing zeros by their text the second.
+    return tuple((argument.__class__, argument if argument else str(argument)) for argument in arguments)
+
+class Memo:
+    # Settings and statistics shared by every memoized function of a run.
+    # Each function value keeps its own cache of at most `size` results,
+    # dropping the least recently used one when full.
+    def __init__(self, size: int=1024) -> None:
+        self.size = size
+        self.pure: List[str] = []
+        self.hits = Counter()
+        self.misses = Counter()
+        self.evictions = Counter()
+
+    def report(self) -> str:
+        lines = [f'[memo] {len(self.pure)} pure functions, up to {self.size} results each'
+                 + (f': {", ".join(self.pure)}' if self.pure else '')]
+        for name in self.pure:
+            if name in self.misses:
+                lines.append(f'[memo] {name}: {self.hits[name]} hits, {self.misses[name]} misses, '
+                             f'{self.evictions[name]} evicted')
+        return '\n'.join(lines)
+
+class MemoizedFunction(LoxFunction):
+    # A pure function value that reuses the result of earlier calls with the
+    # same arguments. Arguments that can't be hashed are simply not cached.
+    # A tail call to another function still runs in this call's trampoline,
+    # so its result is cached under this function's arguments.
+    def __init__(self, declaration: FunctionStmt, closure: Any, frame_size: int, memo: Memo) -> None:
+        super().__init__(declaration, closure, frame_size)
+        self.memo = memo
+        self.name = f'{declaration.name.lexeme}:{declaration.name.line}'
+        self.results = OrderedDict()
+
+    def call(self, interpreter: Interpreter, arguments: List[Any]) -> Any:
+        key = memo_key(arguments)
+        try:
+            result = self.results.get(key, MISSING)
+        except TypeError:
+            return super().call(interpreter, arguments)
+
+        memo = self.memo
+        if result is not MISSING:
+            memo.hits[self.name] += 1
+            self.results.move_to_end(key)
+            return result
+
+        memo.misses[self.name] += 1
+        result = super().call(interpreter, arguments)
+        self.results[key] = result
+        if len(self.results) > memo.size:
+            self.results.popitem(last=False)
+            memo.evictions[self.name] += 1
+        return result
+
+class MemoizingInterpreter(Interpreter):
+    # The tree-walking interpreter, with every function the PurityAnalyzer
+    # finds pure created as a MemoizedFunction. The analysis needs the whole
+    # program, so each call to interpret() should be given all of it.
+    def __init__(self, output: OutputSink=None, memo: Memo=None) -> None:
+        super().__init__(output)
+        self.memo = memo if memo != None else Memo()
+        self.pure: Set[FunctionStmt] = set()
+
+    def interpret(self, statements: List[Stmt]):
+        self.pure = PurityAnalyzer(self).analyze(statements)
+        self.memo.pure = sorted(f'{stmt.name.lexeme}:{stmt.name.line}' for stmt in self.pure)
+        super().interpret(statements)
+
+    def visit_function_stmt(self, stmt: FunctionStmt) -> None:
+        if stmt not in self.pure: return super().visit_function_stmt(stmt)
+        self.define(stmt, stmt.name, MemoizedFunction(stmt, self.environment, self.frame_sizes[stmt], self.memo))
@@ -0,0 +1,245 @@
+from typing import Any, Dict, List, Set
+from .expr import *
+from .stmt import *
+from .token import TokenType
+from .lox_callable import Interpreter
+
+class NodeCounter(ExprVisitor, StmtVisitor):
+    def count(self, nodes: List[Any]) -> int:
+        return sum(node.accept(self) for node in nodes if node != None)
+
+    def visit_assign_expr(self, expr: AssignExpr) -> int:
+        return 1 + expr.value.accept(self)
+
+    def visit_binary_expr(self, expr: BinaryExpr) -> int:
+        return 1 + self.count([expr.left, expr.right])
+
+    def visit_call_expr(self, expr: CallExpr) -> int:
+        return 1 + self.count([expr.callee] + expr.arguments)
+
+    def visit_grouping_expr(self, expr: GroupingExpr) -> int:
+        return 1 + expr.expression.accept(self)
+
+    def visit_literal_expr(self, expr: LiteralExpr) -> int:
+        return 1
+
+    def visit_logical_expr(self, expr: LogicalExpr) -> int:
+        return 1 + self.count([expr.left, expr.right])
+
+    def visit_unary_expr(self, expr: UnaryExpr) -> int:
+        return 1 + expr.right.accept(self)
+
+    def visit_variable_expr(self, expr: VariableExpr) -> int:
+        return 1
+
+    def visit_block_stmt(self, stmt: BlockStmt) -> int:
+        return 1 + self.count(stmt.statements)
+
+    def visit_expression_stmt(self, stmt: ExpressionStmt) -> int:
+        return 1 + stmt.expression.accept(self)
+
+    def visit_function_stmt(self, stmt: FunctionStmt) -> int:
+        return 1 + self.count(stmt.body)
+
+    def visit_if_stmt(self, stmt: IfStmt) -> int:
+        return 1 + self.count([stmt.condition, stmt.thenBranch, stmt.elseBranch])
+
+    def visit_print_stmt(self, stmt: PrintStmt) -> int:
+        return 1 + stmt.expression.accept(self)
+
+    def visit_return_stmt(self, stmt: ReturnStmt) -> int:
+        return 1 + self.count([stmt.value])
+
+    def visit_var_stmt(self, stmt: VarStmt) -> int:
+        return 1 + self.count([stmt.initializer])
+
+    def visit_while_stmt(self, stmt: WhileStmt) -> int:
+        return 1 + self.count([stmt.condition, stmt.body])
+
+class Optimizer(ExprVisitor, StmtVisitor):
+    # Folds constant expressions, propagates never-assigned local literals and
+    # prunes statements with constant conditions. It runs on the resolved tree
+    # and rewrites it in place, so every node the Resolver annotated keeps its
+    # identity. Anything that would raise a runtime error is left unfolded.
+    NO_FOLD = object()
+
+    def __init__(self, interpreter: Interpreter, declarations: Dict[Expr, Stmt], assigned: Set[Stmt]) -> None:
+        self.interpreter = interpreter
+        self.declarations = declarations
+        self.assigned = assigned
+        self.constants = {}
+        self.folded = 0
+        self.propagated = 0
+        self.ungrouped = 0
+        self.pruned = 0
+        self.eliminated = 0
+
+    def optimize(self, statements: List[Stmt]) -> List[Stmt]:
+        counter = NodeCounter()
+        before = counter.count(statements)
+        statements = self.optimize_statements(statements)
+        self.eliminated += before - counter.count(statements)
+        return statements
+
+    def report(self) -> str:
+        return (f'[optimizer] {self.eliminated} nodes eliminated: '
+                f'{self.folded} expressions folded, {self.propagated} constants propagated, '
+                f'{self.ungrouped} groupings removed, {self.pruned} statements pruned')
+
+    def optimize_statements(self, statements: List[Stmt]) -> List[Stmt]:
+        result = []
+        for statement in statements:
+            statement = statement.accept(self)
+            if statement != None: result.append(statement)
+        return result
+
+    def optimize_branch(self, stmt: Stmt) -> Stmt:
+        # A branch must stay a statement, so a pruned one becomes an empty block.
+        stmt = stmt.accept(self)
+        if stmt == None:
+            stmt = BlockStmt([])
+            self.interpreter.resolve_scope(stmt, 0)
+        return stmt
+
+    def optimize_expr(self, expr: Expr) -> Expr:
+        return expr.accept(self)
+
+    def visit_block_stmt(self, stmt: BlockStmt) -> Stmt:
+        stmt.statements = self.optimize_statements(stmt.statements)
+        return stmt
+
+    def visit_expression_stmt(self, stmt: ExpressionStmt) -> Stmt:
+        stmt.expression = self.optimize_expr(stmt.expression)
+        if isinstance(stmt.expression, LiteralExpr):
+            self.pruned += 1
+            return None
+        return stmt
+
+    def visit_function_stmt(self, stmt: FunctionStmt) -> Stmt:
+        stmt.body = self.optimize_statements(stmt.body)
+        return stmt
+
+    def visit_if_stmt(self, stmt: IfStmt) -> Stmt:
+        stmt.condition = self.optimize_expr(stmt.condition)
+
+        if isinstance(stmt.condition, LiteralExpr):
+            self.pruned += 1
+            if self.interpreter.is_truthy(stmt.condition.value):
+                return stmt.thenBranch.accept(self)
+            if stmt.elseBranch != None:
+                return stmt.elseBranch.accept(self)
+            return None
+
+        stmt.thenBranch = self.optimize_branch(stmt.thenBranch)
+        if stmt.elseBranch != None:
+            stmt.elseBranch = self.optimize_branch(stmt.elseBranch)
+        return stmt
+
+    def visit_print_stmt(self, stmt: PrintStmt) -> Stmt:
+        stmt.expression = self.optimize_expr(stmt.expression)
+        return stmt
+
+    def visit_return_stmt(self, stmt: ReturnStmt) -> Stmt:
+        if stmt.value != None:
+            stmt.value = self.optimize_expr(stmt.value)
+        return stmt
+
+    def visit_var_stmt(self, stmt: VarStmt) -> Stmt:
+        value = None
+        if stmt.initializer != None:
+            stmt.initializer = self.optimize_expr(stmt.initializer)
+            if not isinstance(stmt.initializer, LiteralExpr): return stmt
+            value = stmt.initializer.value
+
+        if stmt in self.interpreter.locals and stmt not in self.assigned:
+            self.constants[stmt] = value
+        return stmt
+
+    def visit_while_stmt(self, stmt: WhileStmt) -> Stmt:
+        stmt.condition = self.optimize_expr(stmt.condition)
+
+        if isinstance(stmt.condition, LiteralExpr) and not self.interpreter.is_truthy(stmt.condition.value):
+            self.pruned += 1
+            return None
+
+        stmt.body = self.optimize_branch(stmt.body)
+        return stmt
+
+    def visit_assign_expr(self, expr: AssignExpr) -> Expr:
+        expr.value = self.optimize_expr(expr.value)
+        return expr
+
+    def visit_binary_expr(self, expr: BinaryExpr) -> Expr:
+        expr.left = self.optimize_expr(expr.left)
+        expr.right = self.optimize_expr(expr.right)
+
+        if isinstance(expr.left, LiteralExpr) and isinstance(expr.right, LiteralExpr):
+            value = self.fold_binary(expr.operator.type, expr.left.value, expr.right.value)
+            if value is not self.NO_FOLD:
+                self.folded += 1
+                return LiteralExpr(value)
+        return expr
+
+    def fold_binary(self, type: TokenType, left: Any, right: Any) -> Any:
+        if type == TokenType.EQUAL_EQUAL: return self.interpreter.is_equal(left, right)
+        if type == TokenType.BANG_EQUAL: return not self.interpreter.is_equal(left, right)
+
+        if type == TokenType.PLUS:
+            if isinstance(left, float) and isinstance(right, float): return left + right
+            if isinstance(left, str) and isinstance(right, str): return left + right
+            return self.NO_FOLD
+
+        if not isinstance(left, float) or not isinstance(right, float): return self.NO_FOLD
+
+        if type == TokenType.MINUS: return left - right
+        if type == TokenType.STAR: return left * right
+        if type == TokenType.SLASH: return left / right if right != 0 else self.NO_FOLD
+        if type == TokenType.GREATER: return left > right
+        if type == TokenType.GREATER_EQUAL: return left >= right
+        if type == TokenType.LESS: return left < right
+        if type == TokenType.LESS_EQUAL: return left <= right
+        return self.NO_FOLD
+
+    def visit_call_expr(self, expr: CallExpr) -> Expr:
+        expr.callee = self.optimize_expr(expr.callee)
+        expr.arguments = [self.optimize_expr(argument) for argument in expr.arguments]
+        return expr
+
+    def visit_grouping_expr(self, expr: GroupingExpr) -> Expr:
+        self.ungrouped += 1
+        return self.optimize_expr(expr.expression)
+
+    def visit_literal_expr(self, expr: LiteralExpr) -> Expr:
+        return expr
+
+    def visit_logical_expr(self, expr: LogicalExpr) -> Expr:
+        expr.left = self.optimize_expr(expr.left)
+        expr.right = self.optimize_expr(expr.right)
+
+        if isinstance(expr.left, LiteralExpr):
+            self.folded += 1
+            truthy = self.interpreter.is_truthy(expr.left.value)
+            if expr.operator.type == TokenType.OR:
+                return expr.left if truthy else expr.right
+            return expr.right if truthy else expr.left
+        return expr
+
+    def visit_unary_expr(self, expr: UnaryExpr) -> Expr:
+        expr.right = self.optimize_expr(expr.right)
+
+        if isinstance(expr.right, LiteralExpr):
+            value = expr.right.value
+            if expr.operator.type == TokenType.BANG:
+                self.folded += 1
+                return LiteralExpr(not self.interpreter.is_truthy(value))
+            if isinstance(value, float):
+                self.folded += 1
+                return LiteralExpr(-value)
+        return expr
+
+    def visit_variable_expr(self, expr: VariableExpr) -> Expr:
+        declaration = self.declarations.get(expr)
+        if declaration in self.constants:
+            self.propagated += 1
+            return LiteralExpr(self.constants[declaration])
+        return expr
@@ -0,0 +1,53 @@
+import sys
+from typing import Any, List
+
+FLUSH_POLICIES = ('line', 'size', 'exit')
+
+class OutputSink:
+    # Where `print` statements write. Lines are collected in a list and handed
+    # to the stream in one write() per flush instead of one print() per line.
+    # The flush policy decides when that happens:
+    #
+    # * 'line' writes and flushes every line, for interactive use.
+    # * 'size' writes once buffer_size characters have been collected.
+    # * 'exit' keeps everything until flush(), which interpret() calls when
+    #   the program ends.
+    #
+    # Whatever the policy, an interpreter flushes its sink before reporting a
+    # runtime error, so output and errors appear in the order they happened.
+    # stream is any object with write() and flush(), such as an open file or
+    # an io.StringIO; by default it is whatever sys.stdout is at flush time,
+    # and the policy defaults to 'line' when that is a terminal.
+    def __init__(self, stream: Any=None, flush: str=None, buffer_size: int=1 << 16) -> None:
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.lines: List[str] = []
+        self.size = 0
+
+        if flush == None:
+            flush = 'line' if stream == None and sys.stdout.isatty() else 'size'
+        self.policy = flush
+        # Chosen once here, as write() runs for every Lox print.
+        self.write = {'line': self.write_line, 'size': self.write_sized, 'exit': self.lines.append}[flush]
+
+    def target(self) -> Any:
+        return self.stream if self.stream != None else sys.stdout
+
+    def write_line(self, text: str) -> None:
+        stream = self.target()
+        stream.write(text + '\n')
+        stream.flush()
+
+    def write_sized(self, text: str) -> None:
+        self.lines.append(text)
+        self.size += len(text) + 1
+        if self.size >= self.buffer_size: self.flush()
+
+    def flush(self) -> None:
+        stream = self.target()
+        if self.lines:
+            self.lines.append('')
+            stream.write('\n'.join(self.lines))
+            self.lines.clear()
+            self.size = 0
+        stream.flush()
@@ -2,7 +2,8 @@ from .token import Token, TokenType
 from .expr import *
 from .stmt import *
 from .lox import parser_error
-from typing import List
+from .token_store import TokenStore, token_types, EOF
+from typing import Iterator, List
 
 class Parser:
     class ParseError(RuntimeError):
@@ -345,4 +346,64 @@ class Parser:
         return self.tokens[self.current]
     
     def previous(self)->Token:
-        return self.tokens[self.current-1]
\ No newline at end of file
+        return self.tokens[self.current-1]
+
+class StreamingParser(Parser):
+    # Pulls tokens from an iterator and only holds on to the current and
+    # previous one, so a token can be freed as soon as the statement that
+    # uses it is. parse_declarations() hands back each top-level declaration
+    # as soon as it is complete.
+    def __init__(self, tokens: Iterator[Token]) -> None:
+        self.stream = tokens
+        self.current_token = next(tokens)
+        self.previous_token = None
+
+    def parse_declarations(self) -> Iterator[Stmt]:
+        while not self.is_at_end():
+            yield self.declaration()
+
+    def parse(self) -> List[Stmt]:
+        return list(self.parse_declarations())
+
+    def advance(self) -> Token:
+        if not self.is_at_end():
+            self.previous_token = self.current_token
+            self.current_token = next(self.stream)
+        return self.previous_token
+
+    def peek(self) -> Token:
+        return self.current_token
+
+    def previous(self) -> Token:
+        return self.previous_token
+
+class StoreParser(Parser):
+    # Parses straight from a TokenStore. Token types are looked up in the
+    # store's type column; a Token is only built for the tokens the parser
+    # keeps (names, operators, literals) or reports an error at.
+    def __init__(self, tokens: TokenStore) -> None:
+        self.tokens = tokens
+        self.types = tokens.types
+        self.current = 0
+
+    def match(self, *types: TokenType) -> bool:
+        kind = token_types[self.types[self.current]]
+        if kind is TokenType.EOF: return False
+        for type in types:
+            if kind is type:
+                self.current += 1
+                return True
+        return False
+
+    def check(self, type: TokenType) -> bool:
+        kind = token_types[self.types[self.current]]
+        return kind is type and kind is not TokenType.EOF
+
+    def is_at_end(self) -> bool:
+        return self.types[self.current] == EOF
+
+    def peek(self) -> Token:
+        return self.tokens.token(self.current)
+
+    def previous(self) -> Token:
+        return self.tokens.token(self.current - 1)
@@ -0,0 +1,162 @@
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Tuple
+from .expr import Expr
+from .stmt import Stmt, FunctionStmt
+from .token import Token
+from .interpreter import Interpreter
+from .environment import Frame
+from .output import OutputSink
+
+SCRIPT = '<script>'
+
+def first_line(node: Any) -> int:
+    # The line of the first token in a node, or None for a node made only of
+    # literals, such as one the optimizer folded.
+    if isinstance(node, Token):
+        return node.line
+    if isinstance(node, list):
+        for item in node:
+            line = first_line(item)
+            if line != None: return line
+    elif isinstance(node, (Expr, Stmt)):
+        for name in node.__slots__:
+            line = first_line(getattr(node, name))
+            if line != None: return line
+    return None
+
+class Profiler:
+    # Attributes wall time to Lox source lines and functions. Whenever the
+    # running line or function changes, the time since the last change is
+    # charged to the line and to the stack of functions that were running,
+    # so every second is counted in exactly one line and one stack. Functions
+    # are named after their declaration, as in fib:2.
+    def __init__(self) -> None:
+        self.stack: Tuple[str, ...] = (SCRIPT,)
+        self.entered: List[float] = []
+        self.line = 0
+        self.last = time.perf_counter()
+        self.stack_times: Dict[Tuple[str, ...], float] = defaultdict(float)
+        self.line_times: Dict[int, float] = defaultdict(float)
+        self.line_hits = Counter()
+        self.calls = Counter()
+        self.total_times: Dict[str, float] = defaultdict(float)
+
+    def charge(self) -> float:
+        now = time.perf_counter()
+        elapsed = now - self.last
+        self.stack_times[self.stack] += elapsed
+        self.line_times[self.line] += elapsed
+        self.last = now
+        return now
+
+    def start(self) -> None:
+        self.last = time.perf_counter()
+
+    def stop(self) -> None:
+        self.charge()
+
+    def enter_line(self, line: int) -> int:
+        self.charge()
+        previous = self.line
+        self.line = line
+        self.line_hits[line] += 1
+        return previous
+
+    def leave_line(self, previous: int) -> None:
+        self.charge()
+        self.line = previous
+
+    def enter_function(self, name: str) -> None:
+        self.entered.append(self.charge())
+        self.stack = self.stack + (name,)
+        self.calls[name] += 1
+
+    def leave_function(self) -> None:
+        now = self.charge()
+        name = self.stack[-1]
+        self.stack = self.stack[:-1]
+        start = self.entered.pop()
+        # The time of a recursive call is already part of the outermost one.
+        if name not in self.stack: self.total_times[name] += now - start
+
+    def report(self, limit: int=20) -> str:
+        total = sum(self.stack_times.values())
+        self_times = defaultdict(float)
+        for stack, seconds in self.stack_times.items():
+            self_times[stack[-1]] += seconds
+        total_times = dict(self.total_times, **{SCRIPT: total})
+        calls = dict(self.calls, **{SCRIPT: 1})
+
+        def percent(seconds: float) -> float:
+            return 100 * seconds / total if total > 0 else 0.0
+
+        rows = [f'[profile] {total:.3f}s in total',
+                f'{"calls":>10}{"total s":>10}{"self s":>10}{"self %":>8}  function']
+        for name in sorted(self_times, key=self_times.get, reverse=True):
+            rows.append(f'{calls[name]:>10}{total_times[name]:>10.3f}{self_times[name]:>10.3f}'
+                        f'{percent(self_times[name]):>8.1f}  {name}')
+
+        rows.append(f'{"hits":>10}{"self s":>10}{"self %":>8}  line')
+        # Line 0 holds the moments between interpret() starting and its first
+        # statement, which aren't worth a row.
+        by_time = sorted((line for line in self.line_times if line != 0), key=self.line_times.get, reverse=True)
+        for line in by_time[:limit]:
+            seconds = self.line_times[line]
+            rows.append(f'{self.line_hits[line]:>10}{seconds:>10.3f}{percent(seconds):>8.1f}  {line}')
+        if len(by_time) > limit:
+            rows.append(f'{"":>28}  ... {len(by_time) - limit} more lines')
+        return '\n'.join(rows)
+
+    def collapsed_stacks(self) -> str:
+        # One line per stack, its frames joined by semicolons and followed by
+        # its self time in microseconds, the input flamegraph.pl and similar
+        # tools expect.
+        return ''.join(f'{";".join(stack)} {round(seconds * 1e6)}\n'
+                       for stack, seconds in sorted(self.stack_times.items()))
+
+class ProfilingInterpreter(Interpreter):
+    # The tree-walking interpreter, reporting every statement and function
+    # call to a Profiler. It is only used when profiling, so the Interpreter
+    # itself carries no profiling code.
+    def __init__(self, output: OutputSink=None, profiler: Profiler=None) -> None:
+        super().__init__(output)
+        self.profiler = profiler if profiler != None else Profiler()
+        self.statement_lines: Dict[Stmt, int] = {}
+        # Function names by id() of the body, which LoxFunction.call passes
+        # to execute_block. The program keeps every body alive.
+        self.functions: Dict[int, str] = {}
+
+    def interpret(self, statements: List[Stmt]):
+        self.profiler.start()
+        try:
+            super().interpret(statements)
+        finally:
+            self.profiler.stop()
+
+    def execute(self, stmt: Stmt) -> Any:
+        if stmt in self.statement_lines:
+            line = self.statement_lines[stmt]
+        else:
+            line = self.statement_lines[stmt] = first_line(stmt)
+        if line == None: return stmt.accept(self)
+
+        previous = self.profiler.enter_line(line)
+        try:
+            return stmt.accept(self)
+        finally:
+            self.profiler.leave_line(previous)
+
+    def execute_block(self, statements: List[Stmt], environment: Frame) -> Any:
+        name = self.functions.get(id(statements))
+        if name == None: return super().execute_block(statements, environment)
+
+        self.profiler.enter_function(name)
+        try:
+            return super().execute_block(statements, environment)
+        finally:
+            self.profiler.leave_function()
+
+    def visit_function_stmt(self, stmt: FunctionStmt) -> None:
+        self.functions[id(stmt.body)] = f'{stmt.name.lexeme}:{stmt.name.line}'
+        super().visit_function_stmt(stmt)
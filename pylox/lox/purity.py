@@ -0,0 +1,219 @@
+from typing import Any, Dict, List, Set
+from .expr import *
+from .stmt import *
+from .token import Token
+from .lox_callable import Interpreter, LoxCallable
+from .lox_function import LoxFunction
+
+class FunctionFacts:
+    __slots__ = ('impure', 'reads', 'callees')
+
+    def __init__(self) -> None:
+        # Set when the body prints, assigns a variable it doesn't own,
+        # declares a function or calls something other than a known function.
+        self.impure = False
+        # Variables the body reads but doesn't own, and the functions it
+        # calls: their declarations, or their names if they are global.
+        self.reads: Set[Any] = set()
+        self.callees: Set[Any] = set()
+
+class PurityAnalyzer(ExprVisitor, StmtVisitor):
+    # Finds the functions whose result depends only on their arguments, so
+    # that calls with equal arguments can share one result. A function is
+    # pure when its body
+    #
+    # * doesn't print,
+    # * assigns only its own parameters and locals,
+    # * reads no variable declared outside it that is ever assigned, or that
+    #   is a global declared more than once,
+    # * calls only pure functions, named directly (not natives like clock(),
+    #   which aren't pure, nor functions held in other variables),
+    # * and declares no functions, since each call would create new ones.
+    #
+    # It walks a resolved program with the same scopes as the Resolver, using
+    # the interpreter's tables to find the declaration of each local, so it
+    # also works on a program loaded from the cache. Variables are identified
+    # by their declaration: the VarStmt or FunctionStmt, a parameter's Token,
+    # or a global's name.
+    def __init__(self, interpreter: Interpreter) -> None:
+        self.interpreter = interpreter
+        self.scopes: List[Dict[str, Any]] = []
+        # Every function being analysed, innermost last, with the number of
+        # scopes that were open outside it.
+        self.functions: List[FunctionStmt] = []
+        self.bases: List[int] = []
+        self.facts: Dict[FunctionStmt, FunctionFacts] = {}
+        self.assigned: Set[Any] = set()
+        self.global_definitions: Dict[str, List[Stmt]] = {name: [None] for name in interpreter.globals.values}
+        # Natives, which call nothing back by name, and whether a top-level
+        # statement that can call them has been seen yet.
+        self.natives = {name for name, value in interpreter.globals.values.items()
+                        if isinstance(value, LoxCallable) and not isinstance(value, LoxFunction)}
+        self.started = False
+
+    def analyze(self, statements: List[Stmt]) -> Set[FunctionStmt]:
+        for statement in statements:
+            statement.accept(self)
+            if not isinstance(statement, FunctionStmt): self.started = True
+
+        pure = set()
+        for function, facts in self.facts.items():
+            # Globals can be called before they are declared, so they are
+            # only looked up now that every declaration has been seen.
+            facts.callees = {self.global_function(callee) if isinstance(callee, str) else callee
+                             for callee in facts.callees}
+            if facts.impure or None in facts.callees: continue
+            if any(self.mutable(read) for read in facts.reads): continue
+            pure.add(function)
+
+        # Recursive functions can only be decided together, so start from
+        # every candidate and drop those calling one that isn't pure.
+        changed = True
+        while changed:
+            changed = False
+            for function in list(pure):
+                if not self.facts[function].callees <= pure:
+                    pure.remove(function)
+                    changed = True
+        return pure
+
+    def global_function(self, name: str) -> FunctionStmt:
+        # Only known for sure if nothing else is ever declared under the name;
+        # mutable() checks it is never assigned either.
+        definitions = self.global_definitions.get(name, [])
+        if len(definitions) == 1 and isinstance(definitions[0], FunctionStmt):
+            return definitions[0]
+        return None
+
+    def mutable(self, declaration: Any) -> bool:
+        if isinstance(declaration, str):
+            return declaration in self.assigned or len(self.global_definitions.get(declaration, [])) != 1
+        return declaration in self.assigned
+
+    def analyze_statements(self, statements: List[Stmt]) -> None:
+        for statement in statements:
+            statement.accept(self)
+
+    def analyze_expr(self, expr: Expr) -> None:
+        expr.accept(self)
+
+    def current(self) -> FunctionFacts:
+        return self.facts[self.functions[-1]] if self.functions else None
+
+    def declare(self, name: Token, declaration: Any) -> None:
+        if self.scopes:
+            self.scopes[-1][name.lexeme] = declaration
+            return
+        definitions = self.global_definitions.setdefault(name.lexeme, [])
+        # A native that a function replaces before any other top-level
+        # statement has run can't have been called under its name, so the
+        # function is its only definition.
+        if (definitions == [None] and name.lexeme in self.natives and not self.started
+                and isinstance(declaration, FunctionStmt)):
+            definitions.clear()
+        definitions.append(declaration)
+
+    def declaration(self, expr: Expr, name: Token) -> Any:
+        # The declaration a variable refers to, and whether the innermost
+        # function being analysed owns it.
+        local = self.interpreter.locals.get(expr)
+        if local == None:
+            return name.lexeme, not self.functions
+        index = len(self.scopes) - 1 - local[0]
+        owned = not self.functions or index >= self.bases[-1]
+        return self.scopes[index][name.lexeme], owned
+
+    def begin_scope(self) -> None:
+        self.scopes.append({})
+
+    def end_scope(self) -> None:
+        self.scopes.pop()
+
+    def visit_block_stmt(self, stmt: BlockStmt) -> None:
+        self.begin_scope()
+        self.analyze_statements(stmt.statements)
+        self.end_scope()
+
+    def visit_expression_stmt(self, stmt: ExpressionStmt) -> None:
+        self.analyze_expr(stmt.expression)
+
+    def visit_function_stmt(self, stmt: FunctionStmt) -> None:
+        if self.functions: self.current().impure = True
+        self.declare(stmt.name, stmt)
+
+        self.facts[stmt] = FunctionFacts()
+        self.functions.append(stmt)
+        self.bases.append(len(self.scopes))
+        self.begin_scope()
+        for param in stmt.params:
+            self.declare(param, param)
+        self.analyze_statements(stmt.body)
+        self.end_scope()
+        self.bases.pop()
+        self.functions.pop()
+
+    def visit_if_stmt(self, stmt: IfStmt) -> None:
+        self.analyze_expr(stmt.condition)
+        stmt.thenBranch.accept(self)
+        if stmt.elseBranch != None: stmt.elseBranch.accept(self)
+
+    def visit_print_stmt(self, stmt: PrintStmt) -> None:
+        if self.functions: self.current().impure = True
+        self.analyze_expr(stmt.expression)
+
+    def visit_return_stmt(self, stmt: ReturnStmt) -> None:
+        if stmt.value != None: self.analyze_expr(stmt.value)
+
+    def visit_var_stmt(self, stmt: VarStmt) -> None:
+        if stmt.initializer != None: self.analyze_expr(stmt.initializer)
+        self.declare(stmt.name, stmt)
+
+    def visit_while_stmt(self, stmt: WhileStmt) -> None:
+        self.analyze_expr(stmt.condition)
+        stmt.body.accept(self)
+
+    def visit_assign_expr(self, expr: AssignExpr) -> None:
+        self.analyze_expr(expr.value)
+        declaration, owned = self.declaration(expr, expr.name)
+        self.assigned.add(declaration)
+        if not owned: self.current().impure = True
+
+    def visit_binary_expr(self, expr: BinaryExpr) -> None:
+        self.analyze_expr(expr.left)
+        self.analyze_expr(expr.right)
+
+    def visit_call_expr(self, expr: CallExpr) -> None:
+        self.analyze_expr(expr.callee)
+        for argument in expr.arguments:
+            self.analyze_expr(argument)
+        if not self.functions: return
+
+        facts = self.current()
+        callee = expr.callee
+        while isinstance(callee, GroupingExpr): callee = callee.expression
+        if not isinstance(callee, VariableExpr):
+            facts.impure = True
+            return
+
+        declaration, owned = self.declaration(callee, callee.name)
+        if isinstance(declaration, (str, FunctionStmt)):
+            facts.callees.add(declaration)
+        else:
+            facts.impure = True
+
+    def visit_grouping_expr(self, expr: GroupingExpr) -> None:
+        self.analyze_expr(expr.expression)
+
+    def visit_literal_expr(self, expr: LiteralExpr) -> None:
+        pass
+
+    def visit_logical_expr(self, expr: LogicalExpr) -> None:
+        self.analyze_expr(expr.left)
+        self.analyze_expr(expr.right)
+
+    def visit_unary_expr(self, expr: UnaryExpr) -> None:
+        self.analyze_expr(expr.right)
+
+    def visit_variable_expr(self, expr: VariableExpr) -> None:
+        declaration, owned = self.declaration(expr, expr.name)
+        if not owned: self.current().reads.add(declaration)
@@ -0,0 +1,191 @@
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Set
+from .expr import *
+from .stmt import *
+from .token import Token
+from .lox_callable import Interpreter
+from .lox import parser_error
+
+FunctionType = Enum('FunctionType', ['NONE', 'FUNCTION'])
+
+def reachable_nodes(roots: Iterable[Any]) -> Set[Any]:
+    # Every Expr and Stmt in roots or below them: the nodes whose entries in
+    # the interpreter's tables running those roots may need.
+    nodes = set()
+    pending = list(roots)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, list):
+            pending.extend(node)
+        elif isinstance(node, (Expr, Stmt)) and node not in nodes:
+            nodes.add(node)
+            pending.extend(getattr(node, name) for name in node.__slots__)
+    return nodes
+
+class Resolver(ExprVisitor, StmtVisitor):
+    # Each scope maps a local name to [slot, defined, declaration]. Declarations
+    # are resolved to their own slot at distance 0, and every scope reports its
+    # final size so the interpreter can allocate a Frame of the right length up
+    # front.
+    def __init__(self, interpreter: Interpreter) -> None:
+        self.interpreter = interpreter
+        self.scopes: List[Dict[str, list]] = []
+        self.current_function = FunctionType.NONE
+        self.global_names = set(interpreter.globals.values)
+        self.global_references: List[Token] = []
+        # Which local declaration each local read refers to, and which
+        # declarations are ever assigned after being defined.
+        self.declarations: Dict[Expr, Stmt] = {}
+        self.assigned: Set[Stmt] = set()
+
+    def resolve(self, statements: List[Stmt]) -> None:
+        self.resolve_statements(statements)
+
+        for name in self.global_references:
+            if name.lexeme not in self.global_names:
+                parser_error(name, f"Undefined variable '{name.lexeme}'.")
+        self.global_references = []
+
+    def resolve_statements(self, statements: List[Stmt]) -> None:
+        for statement in statements:
+            self.resolve_stmt(statement)
+
+    def resolve_stmt(self, stmt: Stmt) -> None:
+        stmt.accept(self)
+
+    def resolve_expr(self, expr: Expr) -> None:
+        expr.accept(self)
+
+    def resolve_function(self, function: FunctionStmt, type: FunctionType) -> None:
+        enclosing_function = self.current_function
+        self.current_function = type
+
+        self.begin_scope()
+        for param in function.params:
+            self.declare(param)
+            self.define(param)
+        self.resolve_statements(function.body)
+        self.interpreter.resolve_scope(function, len(self.scopes[-1]))
+        self.end_scope()
+        self.current_function = enclosing_function
+
+    def resolve_local(self, expr: Expr, name: Token) -> None:
+        for i in range(len(self.scopes) - 1, -1, -1):
+            local = self.scopes[i].get(name.lexeme)
+            if local != None:
+                self.interpreter.resolve(expr, len(self.scopes) - 1 - i, local[0])
+                if isinstance(expr, AssignExpr):
+                    self.assigned.add(local[2])
+                else:
+                    self.declarations[expr] = local[2]
+                return
+
+        # Names already declared can't fail the check in resolve().
+        if name.lexeme not in self.global_names:
+            self.global_references.append(name)
+
+    def begin_scope(self) -> None:
+        self.scopes.append({})
+
+    def end_scope(self) -> None:
+        self.scopes.pop()
+
+    def declare(self, name: Token, stmt: Stmt=None) -> None:
+        if not self.scopes:
+            self.global_names.add(name.lexeme)
+            return
+
+        scope = self.scopes[-1]
+        if name.lexeme in scope:
+            parser_error(name, "Already a variable with this name in this scope.")
+            return
+
+        scope[name.lexeme] = [len(scope), False, stmt]
+        if stmt != None:
+            self.interpreter.resolve(stmt, 0, len(scope) - 1)
+
+    def define(self, name: Token) -> None:
+        if not self.scopes: return
+        self.scopes[-1][name.lexeme][1] = True
+
+    def visit_block_stmt(self, stmt: BlockStmt) -> None:
+        self.begin_scope()
+        self.resolve_statements(stmt.statements)
+        self.interpreter.resolve_scope(stmt, len(self.scopes[-1]))
+        self.end_scope()
+
+    def visit_expression_stmt(self, stmt: ExpressionStmt) -> None:
+        self.resolve_expr(stmt.expression)
+
+    def visit_function_stmt(self, stmt: FunctionStmt) -> None:
+        self.declare(stmt.name, stmt)
+        self.define(stmt.name)
+
+        self.resolve_function(stmt, FunctionType.FUNCTION)
+
+    def visit_if_stmt(self, stmt: IfStmt) -> None:
+        self.resolve_expr(stmt.condition)
+        self.resolve_stmt(stmt.thenBranch)
+        if stmt.elseBranch != None: self.resolve_stmt(stmt.elseBranch)
+
+    def visit_print_stmt(self, stmt: PrintStmt) -> None:
+        self.resolve_expr(stmt.expression)
+
+    def visit_return_stmt(self, stmt: ReturnStmt) -> None:
+        if self.current_function == FunctionType.NONE:
+            parser_error(stmt.keyword, "Can't return from top-level code.")
+
+        if stmt.value != None:
+            self.resolve_expr(stmt.value)
+
+            # Nothing runs in a function after its return statement, so a
+            # returned call is always in tail position.
+            value = stmt.value
+            while isinstance(value, GroupingExpr): value = value.expression
+            if isinstance(value, CallExpr) and self.current_function != FunctionType.NONE:
+                self.interpreter.resolve_tail_call(stmt, value)
+
+    def visit_var_stmt(self, stmt: VarStmt) -> None:
+        self.declare(stmt.name, stmt)
+        if stmt.initializer != None:
+            self.resolve_expr(stmt.initializer)
+        self.define(stmt.name)
+
+    def visit_while_stmt(self, stmt: WhileStmt) -> None:
+        self.resolve_expr(stmt.condition)
+        self.resolve_stmt(stmt.body)
+
+    def visit_assign_expr(self, expr: AssignExpr) -> None:
+        self.resolve_expr(expr.value)
+        self.resolve_local(expr, expr.name)
+
+    def visit_binary_expr(self, expr: BinaryExpr) -> None:
+        self.resolve_expr(expr.left)
+        self.resolve_expr(expr.right)
+
+    def visit_call_expr(self, expr: CallExpr) -> None:
+        self.resolve_expr(expr.callee)
+
+        for argument in expr.arguments:
+            self.resolve_expr(argument)
+
+    def visit_grouping_expr(self, expr: GroupingExpr) -> None:
+        self.resolve_expr(expr.expression)
+
+    def visit_literal_expr(self, expr: LiteralExpr) -> None:
+        pass
+
+    def visit_logical_expr(self, expr: LogicalExpr) -> None:
+        self.resolve_expr(expr.left)
+        self.resolve_expr(expr.right)
+
+    def visit_unary_expr(self, expr: UnaryExpr) -> None:
+        self.resolve_expr(expr.right)
+
+    def visit_variable_expr(self, expr: VariableExpr) -> None:
+        if self.scopes:
+            local = self.scopes[-1].get(expr.name.lexeme)
+            if local != None and not local[1]:
+                parser_error(expr.name, "Can't read local variable in its own initializer.")
+
+        self.resolve_local(expr, expr.name)
@@ -1,5 +1,10 @@
-from typing import Any
+from typing import Any, List
 
-class Return(RuntimeError):
-    def __init__(self, value: Any) -> None:
-        self.value = value
\ No newline at end of file
+class TailCall:
+    # Returned in place of a value by `return f(...)`: the function to call
+    # and its arguments, for the caller's trampoline to run.
+    __slots__ = ('function', 'arguments')
+
+    def __init__(self, function: Any, arguments: List[Any]) -> None:
+        self.function = function
+        self.arguments = arguments
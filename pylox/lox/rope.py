@@ -0,0 +1,66 @@
+from typing import Any, List
+
+# Results of + shorter than this are built as plain str: copying them costs
+# less than keeping their pieces.
+ROPE_THRESHOLD = 256
+
+class Rope:
+    # A Lox string made by +, kept as the list of its pieces so that
+    # building a string with `s = s + piece;` in a loop takes linear time
+    # instead of copying everything so far on every iteration. The text is
+    # joined the first time it is needed: when printed, compared, hashed or
+    # passed to a native. Lox code can't tell a Rope from a str.
+    #
+    # Appending to a rope appends to its list and returns a rope covering
+    # one more piece, so ropes made from one another share the list; each
+    # only looks at its first `count` pieces. Appending to an older rope
+    # than the list's last copies the list instead.
+    __slots__ = ('pieces', 'count', 'length', 'text')
+
+    def __init__(self, pieces: List[str], count: int, length: int) -> None:
+        self.pieces = pieces
+        self.count = count
+        self.length = length
+        self.text = None
+
+    def append(self, piece: str) -> 'Rope':
+        pieces = self.pieces
+        if self.count == len(pieces):
+            pieces.append(piece)
+        else:
+            pieces = pieces[:self.count] + [piece]
+        return Rope(pieces, self.count + 1, self.length + len(piece))
+
+    def __str__(self) -> str:
+        if self.text == None:
+            pieces = self.pieces if self.count == len(self.pieces) else self.pieces[:self.count]
+            self.text = ''.join(pieces)
+            # The joined text is all later appends need, so the pieces can go.
+            self.pieces = [self.text]
+            self.count = 1
+        return self.text
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is Rope or other.__class__ is str:
+            return str(self) == str(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+    def __repr__(self) -> str:
+        return f'Rope({str(self)!r})'
+
+def is_string(value: Any) -> bool:
+    return value.__class__ is str or value.__class__ is Rope
+
+def concat(left: Any, right: Any) -> Any:
+    # left + right for two Lox strings, each a str or a Rope.
+    if right.__class__ is Rope: right = str(right)
+    if left.__class__ is Rope: return left.append(right)
+    if len(left) + len(right) < ROPE_THRESHOLD: return left + right
+    return Rope([left, right], 2, len(left) + len(right))
+
+def flatten(value: Any) -> Any:
+    # The str of a rope; any other value as it is.
+    return str(value) if value.__class__ is Rope else value
@@ -1,6 +1,8 @@
+import re
+import sys
 from .token import Token, TokenType
 from .lox import scanner_error
-from typing import List, Any
+from typing import Iterable, Iterator, List, Any, Union
 
 keywords = {
   'and'    : TokenType.AND,
@@ -76,11 +78,12 @@ class Scanner:
   def identifier(self) -> None:
     while self.is_alphanumeric(self.peek()): self.advance()
 
-    text = self.source[self.start:self.current]
+    # Interned, so every occurrence of a name shares one string.
+    text = sys.intern(self.source[self.start:self.current])
     type = keywords.get(text)
     if type == None: type = TokenType.IDENTIFIER
-    
-    self.add_null_token(type)
+
+    self.tokens.append(Token(type, text, None, self.line))
 
 
   def is_alpha(self, c: str) -> bool:
@@ -145,4 +148,94 @@ class Scanner:
     self.tokens.append(Token(type, text, literal, self.line))
 
   def is_at_end(self) -> bool:
-    return self.current >= len(self.source)
\ No newline at end of file
+    return self.current >= len(self.source)
+
+operators = {
+  '(' : TokenType.LEFT_PAREN,
+  ')' : TokenType.RIGHT_PAREN,
+  '{' : TokenType.LEFT_BRACE,
+  '}' : TokenType.RIGHT_BRACE,
+  ',' : TokenType.COMMA,
+  '.' : TokenType.DOT,
+  '-' : TokenType.MINUS,
+  '+' : TokenType.PLUS,
+  ';' : TokenType.SEMICOLON,
+  '/' : TokenType.SLASH,
+  '*' : TokenType.STAR,
+  '!' : TokenType.BANG,
+  '!=': TokenType.BANG_EQUAL,
+  '=' : TokenType.EQUAL,
+  '==': TokenType.EQUAL_EQUAL,
+  '>' : TokenType.GREATER,
+  '>=': TokenType.GREATER_EQUAL,
+  '<' : TokenType.LESS,
+  '<=': TokenType.LESS_EQUAL
+}
+
+# Every alternative may be preceded by horizontal whitespace, so blanks never
+# cost a match of their own. Character classes are spelled out because \d
+# and \w would also accept non-ASCII digits and letters.
+token_pattern = re.compile(r'''[ \t\r]*(?:
+    (?P<IDENTIFIER>[A-Za-z_][A-Za-z_0-9]*)
+  | (?P<OPERATOR>[!=<>]=?|[(){},.\-+;*]|/(?!/))
+  | (?P<NUMBER>[0-9]+(?:\.[0-9]+)?)
+  | (?P<NEWLINE>\n)
+  | (?P<COMMENT>//[^\n]*)
+  | (?P<STRING>"[^"]*"?)
+  | (?P<END>\Z)
+  | (?P<ERROR>[^ \t\r\n])
+)''', re.VERBOSE)
+
+class RegexScanner:
+  # Produces exactly the tokens and diagnostics of Scanner, but lets a single
+  # compiled pattern find each lexeme instead of dispatching per character.
+  # The source may also be an iterable of chunks split at line ends, such as
+  # an open file, in which case only one chunk is held at a time.
+
+  def __init__(self, source: Union[str, Iterable[str]]) -> None:
+    self.source = source
+
+  def scan_tokens(self) -> List[Token]:
+    return list(self.scan())
+
+  def scan(self) -> Iterator[Token]:
+    chunks = [self.source] if isinstance(self.source, str) else self.source
+    line = 1
+    # A string still open at the end of a chunk is rescanned with the next.
+    pending = ''
+    intern = sys.intern
+
+    for chunk in chunks:
+      if pending:
+        chunk = pending + chunk
+        pending = ''
+
+      for match in token_pattern.finditer(chunk):
+        kind = match.lastgroup
+
+        if kind == 'IDENTIFIER':
+          text = intern(match.group(kind))
+          yield Token(keywords.get(text, TokenType.IDENTIFIER), text, None, line)
+        elif kind == 'OPERATOR':
+          text = match.group(kind)
+          yield Token(operators[text], text, None, line)
+        elif kind == 'NUMBER':
+          text = match.group(kind)
+          yield Token(TokenType.NUMBER, text, float(text), line)
+        elif kind == 'NEWLINE':
+          line += 1
+        elif kind == 'STRING':
+          text = match.group(kind)
+          if len(text) > 1 and text[-1] == '"':
+            line += text.count('\n')
+            yield Token(TokenType.STRING, text, text[1:-1], line)
+          else:
+            pending = text
+        elif kind == 'ERROR':
+          scanner_error(line, "Unexpected character.")
+
+    if pending:
+      line += pending.count('\n')
+      scanner_error(line, "Unterminated string.")
+
+    yield Token(TokenType.EOF, '', None, line)
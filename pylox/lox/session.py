@@ -0,0 +1,171 @@
+import contextlib
+import io
+import time
+import weakref
+from typing import Any, Callable, Iterable, Iterator, List, Union
+from .stmt import Stmt, FunctionStmt
+from .lox import LoxError, ErrorReporter, reporting, create_interpreter, parse_source
+from .lox_callable import NativeFunction
+from .lox_function import LoxFunction
+from .memoize import MemoizedFunction
+from .environment import Frame
+from .containers import LoxList, LoxMap
+from .resolver import reachable_nodes
+from .output import OutputSink
+
+def live_declarations(values: Iterable[Any]) -> List[FunctionStmt]:
+    # The declarations of the tree engine's function values that can be
+    # reached from values, through closures, lists, maps and memoized
+    # results. The compiling engines' functions don't need the tables.
+    values = list(values)
+    declarations = []
+    seen = set()
+    for value in values:
+        cls = value.__class__
+        if cls is not Frame and cls is not LoxList and cls is not LoxMap and not isinstance(value, LoxFunction):
+            continue
+        if id(value) in seen: continue
+        seen.add(id(value))
+        if cls is Frame:
+            values.extend(value.slots)
+            values.append(value.enclosing)
+        elif cls is LoxList:
+            values.extend(value.items)
+        elif cls is LoxMap:
+            values.extend(value.entries.keys())
+            values.extend(value.entries.values())
+        else:
+            declarations.append(value.declaration)
+            values.append(value.closure)
+            if cls is MemoizedFunction: values.extend(value.results.values())
+    return declarations
+
+class Program:
+    # A script parsed and resolved by a session, ready to run in it. The
+    # statements are None if the script has syntax errors.
+    def __init__(self, statements: List[Stmt], errors: List[LoxError]) -> None:
+        self.statements = statements
+        self.errors = errors
+
+class ScriptResult:
+    # What running one script produced. exit_code is what pylox would have
+    # exited with: 0, 65 after syntax errors, 70 after a runtime error or 1
+    # after a Python exception that isn't a Lox error.
+    def __init__(self, output: str, errors: List[LoxError], exit_code: int, seconds: float) -> None:
+        self.output = output
+        self.errors = errors
+        self.exit_code = exit_code
+        self.seconds = seconds
+
+    @property
+    def ok(self) -> bool:
+        return self.exit_code == 0
+
+    def __repr__(self) -> str:
+        return f'ScriptResult(exit_code={self.exit_code}, output={self.output!r}, errors={self.errors!r})'
+
+class LoxSession:
+    # One interpreter kept warm for running many scripts, one after another,
+    # as a service embedding Lox would. Everything a script defines stays
+    # visible to the scripts run after it, as do natives registered with
+    # define_native(). Nothing is printed and nothing exits: each script's
+    # output and errors come back in a ScriptResult.
+    #
+    # With a budget, which only the tree engine supports, each script gets
+    # the whole of it.
+    #
+    # Once a script has run, the interpreter forgets how its nodes resolved,
+    # except for nodes of functions still reachable from globals and of
+    # Programs from parse() the caller still holds. A Lox function that only
+    # a native holds on to isn't seen, so natives shouldn't keep one past
+    # the script that passed it.
+    #
+    # A session isn't thread-safe; give each thread its own.
+    def __init__(self, engine: str='tree', optimize: bool=True, cache: Any=None, budget: Any=None) -> None:
+        self.optimize = optimize
+        self.cache = cache
+        self.budget = budget
+        self.buffer = io.StringIO()
+        self.errors = ErrorReporter(echo=False)
+        self.interpreter = create_interpreter(engine, OutputSink(self.buffer, 'exit'), budget=budget)
+        self.programs = weakref.WeakSet()
+        self.crashed = False
+
+    def define_native(self, name: str, arity: int, function: Callable[..., Any]) -> None:
+        self.interpreter.define_native(name, NativeFunction(name, arity, function))
+
+    def parse(self, source: Union[str, bytes]) -> Program:
+        # Globals are checked when a script is resolved, so one that uses the
+        # globals of another must be parsed after that one has run.
+        program = self.parsed(source)
+        self.programs.add(program)
+        return program
+
+    def parsed(self, source: Union[str, bytes]) -> Program:
+        self.errors.reset()
+        with reporting(self.errors):
+            statements = parse_source(source, self.interpreter, self.optimize, cache=self.cache)
+        return Program(statements, self.errors.errors)
+
+    def run(self, script: Union[str, bytes, Program]) -> ScriptResult:
+        start = time.perf_counter()
+        program = script if isinstance(script, Program) else self.parsed(script)
+        if program.statements == None:
+            # Resolution errors come after some nodes have been resolved.
+            self.forget()
+            return ScriptResult('', program.errors, 65, time.perf_counter() - start)
+
+        with self.running():
+            self.interpreter.interpret(program.statements)
+        return self.result(start)
+
+    async def run_async(self, script: Union[str, bytes, Program]) -> ScriptResult:
+        # Runs a script on the running event loop, which needs the async
+        # engine. Each session runs one script at a time, but any number of
+        # sessions can share the loop.
+        start = time.perf_counter()
+        program = script if isinstance(script, Program) else self.parsed(script)
+        if program.statements == None:
+            self.forget()
+            return ScriptResult('', program.errors, 65, time.perf_counter() - start)
+
+        with self.running():
+            await self.interpreter.interpret_async(program.statements)
+        return self.result(start)
+
+    @contextlib.contextmanager
+    def running(self) -> Iterator[None]:
+        self.errors.reset()
+        self.crashed = False
+        if self.budget != None: self.interpreter.restart()
+        with reporting(self.errors):
+            try:
+                yield
+            except Exception as e:
+                # Not a Lox error, so there is no line to blame: a native
+                # that raised, or Python running out of stack. pylox would
+                # exit with the traceback and status 1.
+                self.crashed = True
+                message = f'{e.__class__.__name__}: {e}'
+                self.errors.add(LoxError('runtime', None, message, message))
+            finally:
+                self.forget()
+
+    def forget(self) -> None:
+        interpreter = self.interpreter
+        roots = [program.statements for program in self.programs]
+        # Without a function declaration left in the tables, no function
+        # value can need them, and the globals needn't be searched.
+        if any(node.__class__ is FunctionStmt for node in interpreter.frame_sizes):
+            roots.extend(live_declarations(interpreter.globals.values.values()))
+        interpreter.forget_resolutions(reachable_nodes(roots))
+
+    def result(self, start: float) -> ScriptResult:
+        output = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        exit_code = 1 if self.crashed else 70 if self.errors.had_runtime_error else 0
+        return ScriptResult(output, self.errors.errors, exit_code, time.perf_counter() - start)
+
+    def run_all(self, scripts: Iterable[Union[str, bytes, Program]]) -> List[ScriptResult]:
+        return [self.run(script) for script in scripts]
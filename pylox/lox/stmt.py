@@ -53,11 +53,15 @@ class StmtVisitor(ABC):
 
 # Stmt base class and sub classes
 class Stmt(ABC):
+  __slots__ = ()
+
   @abstractmethod
   def accept(self, visitor: StmtVisitor):
     pass
 
 class BlockStmt(Stmt):
+  __slots__ = ('statements',)
+
   def __init__(self, statements: List[Stmt]) -> None:
     self.statements = statements
 
@@ -65,6 +69,8 @@ class BlockStmt(Stmt):
     return visitor.visit_block_stmt(self)
 
 class ExpressionStmt(Stmt):
+  __slots__ = ('expression',)
+
   def __init__(self, expression: Expr) -> None:
     self.expression = expression
 
@@ -72,6 +78,8 @@ class ExpressionStmt(Stmt):
     return visitor.visit_expression_stmt(self)
 
 class FunctionStmt(Stmt):
+  __slots__ = ('name', 'params', 'body')
+
   def __init__(self, name: Token, params: List[Token], body: List[Stmt]) -> None:
     self.name = name
     self.params = params
@@ -81,6 +89,8 @@ class FunctionStmt(Stmt):
     return visitor.visit_function_stmt(self)
 
 class IfStmt(Stmt):
+  __slots__ = ('condition', 'thenBranch', 'elseBranch')
+
   def __init__(self, condition: Expr, thenBranch: Stmt, elseBranch: Stmt) -> None:
     self.condition = condition
     self.thenBranch = thenBranch
@@ -90,6 +100,8 @@ class IfStmt(Stmt):
     return visitor.visit_if_stmt(self)
 
 class PrintStmt(Stmt):
+  __slots__ = ('expression',)
+
   def __init__(self, expression: Expr) -> None:
     self.expression = expression
 
@@ -97,6 +109,8 @@ class PrintStmt(Stmt):
     return visitor.visit_print_stmt(self)
 
 class ReturnStmt(Stmt):
+  __slots__ = ('keyword', 'value')
+
   def __init__(self, keyword: Token, value: Expr) -> None:
     self.keyword = keyword
     self.value = value
@@ -105,6 +119,8 @@ class ReturnStmt(Stmt):
     return visitor.visit_return_stmt(self)
 
 class VarStmt(Stmt):
+  __slots__ = ('name', 'initializer')
+
   def __init__(self, name: Token, initializer: Expr) -> None:
     self.name = name
     self.initializer = initializer
@@ -113,6 +129,8 @@ class VarStmt(Stmt):
     return visitor.visit_var_stmt(self)
 
 class WhileStmt(Stmt):
+  __slots__ = ('condition', 'body')
+
   def __init__(self, condition: Expr, body: Stmt) -> None:
     self.condition = condition
     self.body = body
@@ -23,6 +23,8 @@ TokenType = Enum('TokenType', [
 ])
 
 class Token:
+  __slots__ = ('type', 'lexeme', 'literal', 'line')
+
   def __init__(self, type: TokenType, lexeme: str, literal: Any, line: int) -> None:
     self.type = type
     self.lexeme = lexeme
@@ -0,0 +1,128 @@
+import contextlib
+import mmap
+import re
+import sys
+from array import array
+from typing import Any, Iterator
+from .token import Token, TokenType
+from .scanner import keywords, operators
+from .lox import scanner_error
+
+# The bytes counterpart of scanner.token_pattern. Files are read without
+# newline translation here, so \r\n and a lone \r both end a line as they
+# would for a file opened in text mode, and a non-ASCII character is one
+# UTF-8 sequence.
+byte_token_pattern = re.compile(rb'''[ \t]*(?:
+    (?P<IDENTIFIER>[A-Za-z_][A-Za-z_0-9]*)
+  | (?P<OPERATOR>[!=<>]=?|[(){},.\-+;*]|/(?!/))
+  | (?P<NUMBER>[0-9]+(?:\.[0-9]+)?)
+  | (?P<NEWLINE>\r\n?|\n)
+  | (?P<COMMENT>//[^\r\n]*)
+  | (?P<STRING>"[^"]*"?)
+  | (?P<END>\Z)
+  | (?P<ERROR>[\xc0-\xff][\x80-\xbf]*|[^ \t\r\n])
+)''', re.VERBOSE)
+
+byte_keywords = {name.encode(): type.value for name, type in keywords.items()}
+byte_operators = {lexeme.encode(): type.value for lexeme, type in operators.items()}
+token_types = {type.value: type for type in TokenType}
+keyword_types = set(byte_keywords.values())
+
+IDENTIFIER = TokenType.IDENTIFIER.value
+NUMBER = TokenType.NUMBER.value
+STRING = TokenType.STRING.value
+EOF = TokenType.EOF.value
+
+def newlines(text: bytes) -> int:
+    return text.count(b'\n') + text.count(b'\r') - text.count(b'\r\n')
+
+def text_mode(text: str) -> str:
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+@contextlib.contextmanager
+def map_source(file: Any) -> Iterator[Any]:
+    # A read-only mapping of an open binary file. Empty files and pipes
+    # can't be mapped, so those are read instead; a pipe reports a size of
+    # 0 too, so nothing can be assumed about what it holds.
+    try:
+        source = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, OSError):
+        yield file.read()
+        return
+    with source:
+        yield source
+
+class TokenStore:
+    # Tokens as parallel columns of type, start offset, length and line over
+    # the source buffer, which may be an mmap. Nothing is copied out of the
+    # buffer while scanning; token() builds a Token, lexeme and literal
+    # included, only for the positions a caller asks about.
+    def __init__(self, source: Any) -> None:
+        self.source = source
+        self.types = array('B')
+        self.starts = array('q')
+        self.lengths = array('I')
+        self.lines = array('I')
+
+    def scan(self) -> 'TokenStore':
+        types = self.types.append
+        starts = self.starts.append
+        lengths = self.lengths.append
+        lines = self.lines.append
+        line = 1
+
+        for match in byte_token_pattern.finditer(self.source):
+            kind = match.lastgroup
+
+            if kind == 'IDENTIFIER':
+                types(byte_keywords.get(match.group(kind), IDENTIFIER))
+            elif kind == 'OPERATOR':
+                types(byte_operators[match.group(kind)])
+            elif kind == 'NUMBER':
+                types(NUMBER)
+            elif kind == 'NEWLINE':
+                line += 1
+                continue
+            elif kind == 'STRING':
+                text = match.group(kind)
+                line += newlines(text)
+                if len(text) == 1 or text[-1:] != b'"':
+                    scanner_error(line, "Unterminated string.")
+                    continue
+                types(STRING)
+            else:
+                if kind == 'ERROR': scanner_error(line, "Unexpected character.")
+                continue
+
+            start, end = match.span(kind)
+            starts(start)
+            lengths(end - start)
+            lines(line)
+
+        types(EOF)
+        starts(len(self.source))
+        lengths(0)
+        lines(line)
+        return self
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def lexeme(self, index: int) -> str:
+        start = self.starts[index]
+        return self.source[start:start + self.lengths[index]].decode()
+
+    def token(self, index: int) -> Token:
+        kind = self.types[index]
+        lexeme = self.lexeme(index)
+        literal = None
+
+        if kind == NUMBER:
+            literal = float(lexeme)
+        elif kind == STRING:
+            lexeme = text_mode(lexeme)
+            literal = lexeme[1:-1]
+        elif kind == IDENTIFIER or kind in keyword_types:
+            lexeme = sys.intern(lexeme)
+
+        return Token(token_types[kind], lexeme, literal, self.lines[index])
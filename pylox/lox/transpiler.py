@@ -0,0 +1,459 @@
+import math
+import traceback
+from types import FunctionType
+from typing import Any, Dict, Iterable, List, Set, Tuple
+from .expr import *
+from .stmt import *
+from .token import Token, TokenType
+from .interpreter import Interpreter
+from .lox_callable import LoxCallable
+from .lox_runtime_error import LoxRuntimeError
+from .output import OutputSink
+from .rope import is_string, concat
+from .containers import LoxList, LoxMap
+
+# Lox names are mangled so they can't collide with Python keywords or the
+# helpers below: globals become g_<name>, locals l<n>_<name>.
+FILENAME = '<lox>'
+
+number_operators = {
+    TokenType.MINUS         : '-',
+    TokenType.SLASH         : '/',
+    TokenType.STAR          : '*',
+    TokenType.GREATER       : '>',
+    TokenType.GREATER_EQUAL : '>=',
+    TokenType.LESS          : '<',
+    TokenType.LESS_EQUAL    : '<='
+}
+
+boolean_operators = set(number_operators) - {TokenType.MINUS, TokenType.SLASH, TokenType.STAR} \
+    | {TokenType.EQUAL_EQUAL, TokenType.BANG_EQUAL}
+
+class TranspiledFunction(LoxCallable):
+    __slots__ = ('fn', 'name', 'argc')
+
+    def __init__(self, fn: Any, name: str, argc: int) -> None:
+        self.fn = fn
+        self.name = name
+        self.argc = argc
+
+    def call(self, interpreter: Interpreter, arguments: List[Any]) -> Any:
+        return self.fn(*arguments)
+
+    def arity(self) -> int:
+        return self.argc
+
+    def __str__(self) -> str:
+        return f'<fn {self.name}>'
+
+class PythonFunction:
+    # A Python def being emitted, and the outer names it has to declare.
+    def __init__(self) -> None:
+        self.declarations: Dict[str, str] = {}
+        self.loop_depth = 0
+
+class Scope:
+    def __init__(self, owner: PythonFunction) -> None:
+        self.owner = owner
+        self.names: Dict[int, str] = {}
+
+def contains(statements: List[Stmt], kind: type) -> bool:
+    # Looks through nested blocks and control flow, but not into functions.
+    for stmt in statements:
+        if isinstance(stmt, kind): return True
+        if isinstance(stmt, BlockStmt) and contains(stmt.statements, kind): return True
+        if isinstance(stmt, IfStmt) and contains([s for s in [stmt.thenBranch, stmt.elseBranch] if s != None], kind): return True
+        if isinstance(stmt, WhileStmt) and contains([stmt.body], kind): return True
+    return False
+
+class Transpiler(ExprVisitor, StmtVisitor):
+    # Translates a resolved program into Python source. Blocks are inlined
+    # into the enclosing def, except blocks inside loops that declare
+    # functions: those become a def called once per iteration, so closures
+    # capture a fresh binding each time as they do in Lox. Passing the token
+    # table and counter of an earlier run lets the output share one
+    # namespace with the code that run produced. The counter numbers both
+    # temporaries and tokens, so the tokens of this run are those numbered
+    # after start.
+    def __init__(self, interpreter: Interpreter, tokens: Dict[int, Token]=None, counter: int=0) -> None:
+        self.locals = interpreter.locals
+        self.lines: List[Tuple[int, str, List[Token]]] = []
+        self.tokens: Dict[int, Token] = tokens if tokens != None else {}
+        self.start = counter
+        self.global_reads: List[Token] = []
+        self.scopes: List[Scope] = []
+        self.module = PythonFunction()
+        self.function = self.module
+        self.indent = 0
+        self.counter = counter
+
+    def transpile(self, statements: List[Stmt]) -> str:
+        self.emit_statements(statements)
+        return '\n'.join('    ' * indent + text for indent, text, _ in self.lines) + '\n'
+
+    def line_reads(self, lineno: int) -> List[Token]:
+        # Global reads emitted on a (1-based) line of the generated source.
+        return self.lines[lineno - 1][2]
+
+    def emit(self, text: str) -> None:
+        self.lines.append((self.indent, text, self.global_reads))
+        self.global_reads = []
+
+    def emit_statements(self, statements: List[Stmt]) -> None:
+        for statement in statements:
+            statement.accept(self)
+
+    def emit_body(self, statements: List[Stmt]) -> None:
+        self.indent += 1
+        start = len(self.lines)
+        self.emit_statements(statements)
+        if len(self.lines) == start:
+            self.emit('pass')
+        self.indent -= 1
+
+    def emit_def(self, header: str, statements: List[Stmt], scope: Scope, trailer: str=None) -> None:
+        self.emit(header)
+        start = len(self.lines)
+        self.emit_body(statements)
+        if trailer != None:
+            self.lines.append((self.indent + 1, trailer, []))
+
+        declarations = [(self.indent + 1, f'{kind} {name}', [])
+                        for name, kind in sorted(scope.owner.declarations.items())]
+        self.lines[start:start] = declarations
+
+    def temp(self) -> str:
+        self.counter += 1
+        return f'_t{self.counter}'
+
+    def token(self, token: Token) -> int:
+        self.counter += 1
+        self.tokens[self.counter] = token
+        return self.counter
+
+    def declare(self, stmt: Any, name: Token) -> str:
+        local = self.locals.get(stmt)
+        if local == None: return f'g_{name.lexeme}'
+
+        self.counter += 1
+        python_name = f'l{self.counter}_{name.lexeme}'
+        self.scopes[-1].names[local[1]] = python_name
+        return python_name
+
+    def local_name(self, expr: Expr, assigning: bool) -> str:
+        depth, slot = self.locals[expr]
+        scope = self.scopes[-1 - depth]
+
+        if assigning and scope.owner is not self.function:
+            name = scope.names[slot]
+            kind = 'global' if scope.owner is self.module else 'nonlocal'
+            self.function.declarations[name] = kind
+
+        return scope.names[slot]
+
+    def condition(self, expr: Expr) -> str:
+        code = self.expr(expr)
+        if self.is_boolean(expr): return code
+        t = self.temp()
+        return f'(({t} := {code}) is not None and {t} is not False)'
+
+    def is_boolean(self, expr: Expr) -> bool:
+        if isinstance(expr, GroupingExpr): return self.is_boolean(expr.expression)
+        if isinstance(expr, LiteralExpr): return isinstance(expr.value, bool)
+        if isinstance(expr, UnaryExpr): return expr.operator.type == TokenType.BANG
+        if isinstance(expr, BinaryExpr): return expr.operator.type in boolean_operators
+        return False
+
+    def expr(self, expr: Expr) -> str:
+        return expr.accept(self)
+
+    def visit_block_stmt(self, stmt: BlockStmt) -> None:
+        if self.function.loop_depth > 0 and contains(stmt.statements, FunctionStmt):
+            self.emit_fresh_block(stmt)
+            return
+
+        self.scopes.append(Scope(self.function))
+        self.emit_statements(stmt.statements)
+        self.scopes.pop()
+
+    def emit_fresh_block(self, stmt: BlockStmt) -> None:
+        self.counter += 1
+        name = f'_block{self.counter}'
+
+        enclosing = self.function
+        self.function = PythonFunction()
+        scope = Scope(self.function)
+        self.scopes.append(scope)
+        self.emit_def(f'def {name}():', stmt.statements, scope, 'return _NO_RETURN')
+        self.scopes.pop()
+        self.function = enclosing
+
+        if contains(stmt.statements, ReturnStmt):
+            t = self.temp()
+            self.emit(f'{t} = {name}()')
+            self.emit(f'if {t} is not _NO_RETURN: return {t}')
+        else:
+            self.emit(f'{name}()')
+
+    def visit_expression_stmt(self, stmt: ExpressionStmt) -> None:
+        self.emit(self.expr(stmt.expression))
+
+    def visit_function_stmt(self, stmt: FunctionStmt) -> None:
+        name = self.declare(stmt, stmt.name)
+
+        enclosing = self.function
+        self.function = PythonFunction()
+        scope = Scope(self.function)
+        self.scopes.append(scope)
+        params = []
+        for param in stmt.params:
+            self.counter += 1
+            params.append(f'l{self.counter}_{param.lexeme}')
+            scope.names[len(scope.names)] = params[-1]
+        self.emit_def(f'def {name}({", ".join(params)}):', stmt.body, scope)
+        self.scopes.pop()
+        self.function = enclosing
+
+        self.emit(f'{name} = _Function({name}, {stmt.name.lexeme!r}, {len(stmt.params)})')
+
+    def visit_if_stmt(self, stmt: IfStmt) -> None:
+        self.emit(f'if {self.condition(stmt.condition)}:')
+        self.emit_body([stmt.thenBranch])
+        if stmt.elseBranch != None:
+            self.emit('else:')
+            self.emit_body([stmt.elseBranch])
+
+    def visit_print_stmt(self, stmt: PrintStmt) -> None:
+        self.emit(f'_print({self.expr(stmt.expression)})')
+
+    def visit_return_stmt(self, stmt: ReturnStmt) -> None:
+        if stmt.value == None:
+            self.emit('return None')
+        else:
+            self.emit(f'return {self.expr(stmt.value)}')
+
+    def visit_var_stmt(self, stmt: VarStmt) -> None:
+        value = 'None'
+        if stmt.initializer != None:
+            value = self.expr(stmt.initializer)
+        self.emit(f'{self.declare(stmt, stmt.name)} = {value}')
+
+    def visit_while_stmt(self, stmt: WhileStmt) -> None:
+        self.emit(f'while {self.condition(stmt.condition)}:')
+        self.function.loop_depth += 1
+        self.emit_body([stmt.body])
+        self.function.loop_depth -= 1
+
+    def visit_assign_expr(self, expr: AssignExpr) -> str:
+        value = self.expr(expr.value)
+        if expr in self.locals:
+            return f'({self.local_name(expr, True)} := {value})'
+        return f'_set_global({"g_" + expr.name.lexeme!r}, {value}, {self.token(expr.name)})'
+
+    def visit_binary_expr(self, expr: BinaryExpr) -> str:
+        left = self.expr(expr.left)
+        right = self.expr(expr.right)
+        kind = expr.operator.type
+
+        if kind == TokenType.EQUAL_EQUAL:
+            return f'({left} == {right})'
+        if kind == TokenType.BANG_EQUAL:
+            return f'({left} != {right})'
+
+        a = self.temp()
+        b = self.temp()
+        index = self.token(expr.operator)
+        if kind == TokenType.PLUS:
+            return f'({a} + {b} if ({a} := {left}).__class__ is ({b} := {right}).__class__ is _float else _add({index}, {a}, {b}))'
+
+        op = number_operators[kind]
+        return (f'({a} {op} {b} if ({a} := {left}).__class__ is ({b} := {right}).__class__ is _float '
+                f'else _fail({index}, "Operands must be numbers."))')
+
+    def visit_call_expr(self, expr: CallExpr) -> str:
+        callee = self.expr(expr.callee)
+        arguments = ', '.join(self.expr(argument) for argument in expr.arguments)
+        count = len(expr.arguments)
+        f = self.temp()
+        # Lox functions are called directly; anything else goes through
+        # _callable, which raises the Lox error only after the arguments
+        # have been evaluated, as the tree-walker does.
+        return (f'({f}.fn if ({f} := {callee}).__class__ is _Function and {f}.argc == {count} '
+                f'else _callable({f}, {count}, {self.token(expr.paren)}))({arguments})')
+
+    def visit_grouping_expr(self, expr: GroupingExpr) -> str:
+        return self.expr(expr.expression)
+
+    def visit_literal_expr(self, expr: LiteralExpr) -> str:
+        # Folding can produce inf or nan, which have no literal syntax.
+        if isinstance(expr.value, float) and not math.isfinite(expr.value):
+            return f'float({str(expr.value)!r})'
+        return repr(expr.value)
+
+    def visit_logical_expr(self, expr: LogicalExpr) -> str:
+        left = self.expr(expr.left)
+        right = self.expr(expr.right)
+        t = self.temp()
+
+        if expr.operator.type == TokenType.OR:
+            return f'({t} if ({t} := {left}) is not None and {t} is not False else {right})'
+        return f'({right} if ({t} := {left}) is not None and {t} is not False else {t})'
+
+    def visit_unary_expr(self, expr: UnaryExpr) -> str:
+        right = self.expr(expr.right)
+        t = self.temp()
+
+        if expr.operator.type == TokenType.MINUS:
+            index = self.token(expr.operator)
+            return f'(-{t} if ({t} := {right}).__class__ is _float else _fail({index}, "Operand must be a number."))'
+        return f'(({t} := {right}) is None or {t} is False)'
+
+    def visit_variable_expr(self, expr: VariableExpr) -> str:
+        if expr in self.locals:
+            return self.local_name(expr, False)
+        self.global_reads.append(expr.name)
+        return f'g_{expr.name.lexeme}'
+
+def live_filenames(values: Iterable[Any]) -> Set[str]:
+    # The filenames of the generated code that functions reachable from
+    # values were compiled under, through closures, lists and maps.
+    values = list(values)
+    filenames = set()
+    seen = set()
+    for value in values:
+        cls = value.__class__
+        if cls is TranspiledFunction:
+            values.append(value.fn)
+            continue
+        if cls is not FunctionType and cls is not LoxList and cls is not LoxMap: continue
+        if id(value) in seen: continue
+        seen.add(id(value))
+        if cls is LoxList:
+            values.extend(value.items)
+        elif cls is LoxMap:
+            values.extend(value.entries.keys())
+            values.extend(value.entries.values())
+        else:
+            filenames.add(value.__code__.co_filename)
+            for cell in value.__closure__ or ():
+                try:
+                    values.append(cell.cell_contents)
+                except ValueError:
+                    pass
+    return filenames
+
+class PythonInterpreter(Interpreter):
+    # Runs a program by transpiling it to Python and exec()ing the result.
+    # Globals live in the exec namespace under their mangled names, which is
+    # kept so that later calls to interpret() see the globals of earlier ones.
+    def __init__(self, output: OutputSink=None) -> None:
+        super().__init__(output)
+        self.tokens: Dict[int, Token] = {}
+        self.counter = 0
+        self.runs = 0
+        self.module = None
+        # Transpilers whose code may still run, by the filename it was
+        # compiled under. Only runs that define functions outlive exec().
+        self.transpilers: Dict[str, Transpiler] = {}
+
+    def interpret(self, statements: List[Stmt]):
+        transpiler = Transpiler(self, self.tokens, self.counter)
+        self.runs += 1
+        filename = f'{FILENAME}:{self.runs}'
+        code = compile(transpiler.transpile(statements), filename, 'exec')
+        self.counter = transpiler.counter
+        if self.module == None:
+            self.module = self.namespace(self.tokens)
+
+        self.transpilers[filename] = transpiler
+        try:
+            exec(code, self.module)
+        except LoxRuntimeError as e:
+            self.report_runtime_error(e)
+        except NameError as e:
+            # An undefined global: find the read of that name on the
+            # generated line the error came from.
+            frame = [frame for frame in traceback.extract_tb(e.__traceback__)
+                     if frame.filename in self.transpilers][-1]
+            name = e.name[2:]
+            reads = self.transpilers[frame.filename].line_reads(frame.lineno)
+            token = [t for t in reads if t.lexeme == name][0]
+            self.report_runtime_error(LoxRuntimeError(token, f"Undefined variable '{name}'."))
+        finally:
+            self.output.flush()
+            # Temporaries at the top level become module globals, which would
+            # keep what they last held, such as a callee, alive.
+            for index in range(transpiler.start + 1, transpiler.counter + 1):
+                self.module.pop(f'_t{index}', None)
+            if not contains(statements, FunctionStmt):
+                self.forget_run(filename)
+            # Globals live in the namespace, but the Resolver of a later run
+            # looks for their names in self.globals.
+            for statement in statements:
+                if isinstance(statement, (VarStmt, FunctionStmt)):
+                    self.globals.values.setdefault(statement.name.lexeme, None)
+
+    def forget_run(self, filename: str) -> None:
+        transpiler = self.transpilers.pop(filename)
+        for index in range(transpiler.start + 1, transpiler.counter + 1):
+            self.tokens.pop(index, None)
+
+    def forget_resolutions(self, keep: Set[Any]) -> None:
+        # The code of a run can only run again through functions it made, so
+        # once none of those is reachable its transpiler and tokens can go.
+        super().forget_resolutions(keep)
+        live = live_filenames(self.module.values()) if self.module != None else set()
+        for filename in [filename for filename in self.transpilers if filename not in live]:
+            self.forget_run(filename)
+
+    def define_native(self, name: str, fn: LoxCallable) -> None:
+        super().define_native(name, fn)
+        if self.module != None: self.module[f'g_{name}'] = fn
+
+    def namespace(self, tokens: Dict[int, Token]) -> Dict[str, Any]:
+        namespace = {}
+
+        def fail(index: int, message: str) -> None:
+            raise LoxRuntimeError(tokens[index], message)
+
+        def add(index: int, a: Any, b: Any) -> Any:
+            # + on anything but two numbers, which the generated code handles.
+            if is_string(a) and is_string(b): return concat(a, b)
+            raise LoxRuntimeError(tokens[index], "Operands must be two numbers or two strings.")
+
+        def set_global(name: str, value: Any, index: int) -> Any:
+            if name not in namespace:
+                raise LoxRuntimeError(tokens[index], f"Undefined variable '{tokens[index].lexeme}'.")
+            namespace[name] = value
+            return value
+
+        def make_callable(callee: Any, count: int, index: int) -> Any:
+            def call(*arguments):
+                if not isinstance(callee, LoxCallable):
+                    raise LoxRuntimeError(tokens[index], "Can only call functions and classes.")
+                if count != callee.arity():
+                    raise LoxRuntimeError(tokens[index], f'Expected {callee.arity()} arguments but got {count}.')
+                try:
+                    return callee.call(self, list(arguments))
+                except LoxRuntimeError as e:
+                    raise e.at(tokens[index])
+            return call
+
+        stringify = self.stringify
+        write = self.output.write
+        def print_value(value: Any) -> None:
+            write(stringify(value))
+
+        namespace.update({
+            '_fail': fail,
+            '_set_global': set_global,
+            '_callable': make_callable,
+            '_print': print_value,
+            '_Function': TranspiledFunction,
+            '_float': float,
+            '_add': add,
+            '_NO_RETURN': object()
+        })
+        for name, value in self.globals.values.items():
+            namespace[f'g_{name}'] = value
+        return namespace
@@ -0,0 +1,278 @@
+import sys
+from typing import Any, List
+from .compiler import *
+from .interpreter import Interpreter
+from .lox_callable import LoxCallable, NativeFunction
+from .lox_runtime_error import LoxRuntimeError
+from .environment import Frame
+from .rope import Rope, concat
+from .stmt import Stmt
+
+class VMFunction(LoxCallable):
+    def __init__(self, proto: FunctionProto, closure: Any) -> None:
+        self.proto = proto
+        self.closure = closure
+        self.padding = [None] * (proto.frame_size - proto.arity)
+
+    def call(self, interpreter: Interpreter, arguments: List[Any]) -> Any:
+        return interpreter.run(self.proto.chunk, Frame(self.closure, arguments + self.padding))
+
+    def arity(self) -> int:
+        return self.proto.arity
+
+    def __str__(self) -> str:
+        return f'<fn {self.proto.name.lexeme}>'
+
+class VM(Interpreter):
+    # Runs the same resolved program as the tree-walking Interpreter, but
+    # compiled to bytecode first. Globals, natives and value helpers
+    # (stringify, is_truthy, ...) are shared with the tree-walker.
+
+    def interpret(self, statements: List[Stmt]):
+        chunk = Compiler(self).compile(statements)
+        try:
+            self.run(chunk, self.globals)
+        except LoxRuntimeError as e:
+            self.report_runtime_error(e)
+        finally:
+            self.output.flush()
+
+    # The async engine waits for async natives instead of running them to
+    # completion, and yields to other scripts every time_slice loop
+    # iterations and calls.
+    suspends = False
+    time_slice = sys.maxsize
+    # Lox calls in progress at once in one run of the routine. The calls
+    # live in a list rather than on Python's stack, so without a limit
+    # unbounded recursion would grow until memory ran out.
+    max_calls = 100000
+
+    def run(self, chunk: Chunk, frame: Any) -> Any:
+        # Runs the routine to its end; without suspending it never yields.
+        # A function called back by a native (as each() does) runs here even
+        # when suspending, and can't wait for an async native: there is no
+        # event loop to give its awaitable to.
+        routine = self.routine(chunk, frame)
+        try:
+            awaitable = next(routine)
+            while True:
+                if awaitable != None:
+                    awaitable.close()
+                    awaitable = routine.throw(LoxRuntimeError(None, "Can't wait for an async native in a function called by a native."))
+                else:
+                    awaitable = next(routine)
+        except StopIteration as e:
+            return e.value
+
+    def routine(self, chunk: Chunk, frame: Any) -> Any:
+        # A generator that runs chunk and returns the value it returns. When
+        # suspending, it yields the awaitable of each async native call and
+        # expects the result sent back, and yields None when the time slice
+        # is up.
+        code = chunk.code
+        constants = chunk.constants
+        globals = self.globals.values
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        write = self.output.write
+        # Lox calls to VMFunctions are handled inline; this holds the callers.
+        calls = []
+        ip = 0
+        ticks = self.time_slice
+        max_calls = self.max_calls
+
+        while True:
+            op = code[ip]
+            ip += 1
+
+            if op == OP_GET_LOCAL:
+                push(frame.slots[code[ip]])
+                ip += 1
+            elif op == OP_GET_ENCLOSING:
+                enclosing = frame
+                for _ in range(code[ip]):
+                    enclosing = enclosing.enclosing
+                push(enclosing.slots[code[ip + 1]])
+                ip += 2
+            elif op == OP_CONSTANT:
+                push(constants[code[ip]])
+                ip += 1
+            elif op == OP_GET_GLOBAL:
+                name = constants[code[ip]]
+                if name not in globals:
+                    raise LoxRuntimeError(chunk.tokens[ip - 1], f"Undefined variable '{name}'.")
+                push(globals[name])
+                ip += 1
+            elif op == OP_JUMP_IF_FALSE:
+                value = pop()
+                if value is None or value is False:
+                    ip = code[ip]
+                else:
+                    ip += 1
+            elif op == OP_ADD:
+                right = pop()
+                left = stack[-1]
+                if type(left) is float and type(right) is float:
+                    stack[-1] = left + right
+                elif (type(left) is str or type(left) is Rope) and (type(right) is str or type(right) is Rope):
+                    stack[-1] = concat(left, right)
+                else:
+                    raise LoxRuntimeError(chunk.tokens[ip - 1], "Operands must be two numbers or two strings.")
+            elif op == OP_SUBTRACT:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    raise LoxRuntimeError(chunk.tokens[ip - 1], "Operands must be numbers.")
+                stack[-1] = left - right
+            elif op == OP_LESS:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    raise LoxRuntimeError(chunk.tokens[ip - 1], "Operands must be numbers.")
+                stack[-1] = left < right
+            elif op == OP_CALL:
+                argc = code[ip]
+                ip += 1
+                callee = stack[-argc - 1]
+                arguments = stack[len(stack) - argc:]
+                del stack[-argc - 1:]
+
+                if type(callee) is VMFunction:
+                    proto = callee.proto
+                    if argc != proto.arity:
+                        raise LoxRuntimeError(chunk.tokens[ip - 2], f'Expected {proto.arity} arguments but got {argc}.')
+                    if len(calls) >= max_calls:
+                        raise LoxRuntimeError(chunk.tokens[ip - 2], 'Stack overflow.')
+                    calls.append((chunk, ip, frame))
+                    frame = Frame(callee.closure, arguments + callee.padding)
+                    chunk = proto.chunk
+                    code = chunk.code
+                    constants = chunk.constants
+                    ip = 0
+                    ticks -= 1
+                    if ticks == 0:
+                        ticks = self.time_slice
+                        yield None
+                elif isinstance(callee, LoxCallable):
+                    if argc != callee.arity():
+                        raise LoxRuntimeError(chunk.tokens[ip - 2], f'Expected {callee.arity()} arguments but got {argc}.')
+                    try:
+                        if self.suspends and type(callee) is NativeFunction and callee.is_async:
+                            push(callee.lox_value((yield callee.function(*callee.python_values(arguments)))))
+                        else:
+                            push(callee.call(self, arguments))
+                    except LoxRuntimeError as e:
+                        raise e.at(chunk.tokens[ip - 2])
+                else:
+                    raise LoxRuntimeError(chunk.tokens[ip - 2], "Can only call functions and classes.")
+            elif op == OP_RETURN:
+                if not calls:
+                    return pop()
+                chunk, ip, frame = calls.pop()
+                code = chunk.code
+                constants = chunk.constants
+            elif op == OP_SET_LOCAL:
+                frame.slots[code[ip]] = stack[-1]
+                ip += 1
+            elif op == OP_DEFINE_LOCAL:
+                frame.slots[code[ip]] = pop()
+                ip += 1
+            elif op == OP_SET_ENCLOSING:
+                enclosing = frame
+                for _ in range(code[ip]):
+                    enclosing = enclosing.enclosing
+                enclosing.slots[code[ip + 1]] = stack[-1]
+                ip += 2
+            elif op == OP_POP:
+                pop()
+            elif op == OP_JUMP:
+                ip = code[ip]
+            elif op == OP_LOOP:
+                ip = code[ip]
+                ticks -= 1
+                if ticks == 0:
+                    ticks = self.time_slice
+                    yield None
+            elif op == OP_PUSH_FRAME:
+                frame = Frame(frame, [None] * code[ip])
+                ip += 1
+            elif op == OP_POP_FRAME:
+                frame = frame.enclosing
+            elif op == OP_NIL:
+                push(None)
+            elif op == OP_TRUE:
+                push(True)
+            elif op == OP_FALSE:
+                push(False)
+            elif op == OP_SET_GLOBAL:
+                name = constants[code[ip]]
+                if name not in globals:
+                    raise LoxRuntimeError(chunk.tokens[ip - 1], f"Undefined variable '{name}'.")
+                globals[name] = stack[-1]
+                ip += 1
+            elif op == OP_DEFINE_GLOBAL:
+                globals[constants[code[ip]]] = pop()
+                ip += 1
+            elif op == OP_MULTIPLY:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    raise LoxRuntimeError(chunk.tokens[ip - 1], "Operands must be numbers.")
+                stack[-1] = left * right
+            elif op == OP_DIVIDE:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    raise LoxRuntimeError(chunk.tokens[ip - 1], "Operands must be numbers.")
+                stack[-1] = left / right
+            elif op == OP_GREATER:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    raise LoxRuntimeError(chunk.tokens[ip - 1], "Operands must be numbers.")
+                stack[-1] = left > right
+            elif op == OP_GREATER_EQUAL:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    raise LoxRuntimeError(chunk.tokens[ip - 1], "Operands must be numbers.")
+                stack[-1] = left >= right
+            elif op == OP_LESS_EQUAL:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    raise LoxRuntimeError(chunk.tokens[ip - 1], "Operands must be numbers.")
+                stack[-1] = left <= right
+            elif op == OP_EQUAL:
+                right = pop()
+                stack[-1] = self.is_equal(stack[-1], right)
+            elif op == OP_NOT_EQUAL:
+                right = pop()
+                stack[-1] = not self.is_equal(stack[-1], right)
+            elif op == OP_NEGATE:
+                if type(stack[-1]) is not float:
+                    raise LoxRuntimeError(chunk.tokens[ip - 1], "Operand must be a number.")
+                stack[-1] = -stack[-1]
+            elif op == OP_NOT:
+                value = stack[-1]
+                stack[-1] = value is None or value is False
+            elif op == OP_JUMP_IF_FALSE_OR_POP:
+                value = stack[-1]
+                if value is None or value is False:
+                    ip = code[ip]
+                else:
+                    pop()
+                    ip += 1
+            elif op == OP_JUMP_IF_TRUE_OR_POP:
+                value = stack[-1]
+                if value is None or value is False:
+                    pop()
+                    ip += 1
+                else:
+                    ip = code[ip]
+            elif op == OP_PRINT:
+                write(self.stringify(pop()))
+            elif op == OP_CLOSURE:
+                push(VMFunction(constants[code[ip]], frame))
+                ip += 1
@@ -1,17 +1,106 @@
 #!/usr/bin/env python
 import sys
+import argparse
 from lox import *
 
 
-def main(argv) -> None:
-  if len(argv) > 2:
-    print("Usage: pylox [script]")
+class ArgumentParser(argparse.ArgumentParser):
+  def error(self, message: str) -> None:
+    self.print_usage(sys.stderr)
+    print(f"{self.prog}: error: {message}", file=sys.stderr)
     sys.exit(64)
-  elif len(argv) == 2:
-    run_file(argv[1])
-  else:
-    run_prompt()
-    
+
+
+def main(argv) -> None:
+  parser = ArgumentParser(prog="pylox")
+  parser.add_argument("script", nargs="?")
+  parser.add_argument("--engine", choices=ENGINES, default="tree",
+                      help="execution engine: tree-walking interpreter, bytecode vm, compiled closures or transpiled python")
+  parser.add_argument("--emit-python", action="store_true",
+                      help="print the Python source the 'python' engine would run, then exit")
+  parser.add_argument("--no-optimize", dest="optimize", action="store_false",
+                      help="skip constant folding and dead branch removal")
+  parser.add_argument("--optimizer-report", action="store_true",
+                      help="print how many AST nodes the optimizer eliminated")
+  parser.add_argument("--stream", action="store_true",
+                      help="run each top-level declaration as soon as it is parsed; execution stops at "
+                           "the first syntax error (exit 65, earlier output stands) or runtime error (exit 70)")
+  parser.add_argument("--no-cache", dest="cache", action="store_false",
+                      help="always parse the script instead of loading it from the parse cache")
+  parser.add_argument("--clear-cache", action="store_true",
+                      help="remove every entry from the parse cache before running")
+  parser.add_argument("--cache-stats", action="store_true",
+                      help="print parse cache hits and misses")
+  parser.add_argument("--output", metavar="FILE",
+                      help="write the script's printed output to FILE instead of stdout")
+  parser.add_argument("--flush", choices=FLUSH_POLICIES,
+                      help="when printed output is written: every line, every 64KB or at the end of the "
+                           "program (default: every line on a terminal, otherwise every 64KB)")
+  parser.add_argument("--profile", action="store_true",
+                      help="time every Lox function and source line and print a report to stderr on exit "
+                           "(tree engine only)")
+  parser.add_argument("--profile-stacks", metavar="FILE",
+                      help="profile, and also write collapsed stacks for flame graph tools to FILE")
+  parser.add_argument("--memoize", action="store_true",
+                      help="reuse the results of calls to pure functions with the same arguments (tree engine only)")
+  parser.add_argument("--memo-size", type=int, default=1024, metavar="N",
+                      help="results each memoized function keeps (default: 1024)")
+  parser.add_argument("--memo-stats", action="store_true",
+                      help="print which functions are pure and their memo hits and misses")
+  parser.add_argument("--max-steps", type=int, metavar="N",
+                      help="stop with a runtime error after executing N statements and calls (tree engine only)")
+  parser.add_argument("--timeout", type=float, metavar="SECONDS",
+                      help="stop with a runtime error after running for SECONDS (tree engine only)")
+  parser.add_argument("--max-depth", type=int, metavar="N",
+                      help="stop with a runtime error when more than N calls are nested (tree engine only)")
+  parser.add_argument("--max-memory", type=int, metavar="BYTES",
+                      help="stop with a runtime error when strings and frames hold more than about BYTES "
+                           "(tree engine only)")
+  args = parser.parse_args(argv[1:])
+  profiler = Profiler() if args.profile or args.profile_stacks != None else None
+  if profiler != None:
+    if args.engine != "tree": parser.error("--profile only works with --engine tree")
+    if args.script == None or args.emit_python: parser.error("--profile needs a script to run")
+  memo = Memo(args.memo_size) if args.memoize else None
+  if memo != None:
+    if args.engine != "tree": parser.error("--memoize only works with --engine tree")
+    if profiler != None: parser.error("--memoize can't be combined with --profile")
+    if args.stream or args.script == None or args.emit_python: parser.error("--memoize needs a whole script to run")
+  budget = None
+  if (args.max_steps, args.timeout, args.max_depth, args.max_memory) != (None,) * 4:
+    if args.engine != "tree": parser.error("budgets only work with --engine tree")
+    if profiler != None or memo != None: parser.error("budgets can't be combined with --profile or --memoize")
+    if args.script == None or args.emit_python: parser.error("budgets need a script to run")
+    budget = Budget(args.max_steps, args.timeout, args.max_depth, args.max_memory)
+
+  if args.clear_cache:
+    removed = ProgramCache().clear()
+    print(f'[cache] removed {removed} entries', file=sys.stderr)
+    if args.script == None: return
+
+  stream = open(args.output, 'w') if args.output != None else None
+  output = OutputSink(stream, args.flush)
+  try:
+    if args.emit_python:
+      if args.script == None: parser.error("--emit-python needs a script")
+      emit_python(args.script, args.optimize)
+    elif args.script != None:
+      # Streaming never holds the whole program, so there is nothing to cache.
+      cache = ProgramCache() if args.cache and not args.stream else None
+      try:
+        run_file(args.script, args.engine, args.optimize, args.optimizer_report, args.stream, cache, output, profiler, memo, budget)
+      finally:
+        if cache != None and args.cache_stats: print(cache.report(), file=sys.stderr)
+        if profiler != None: print(profiler.report(), file=sys.stderr)
+        if memo != None and args.memo_stats: print(memo.report(), file=sys.stderr)
+        if args.profile_stacks != None:
+          with open(args.profile_stacks, 'w') as f:
+            f.write(profiler.collapsed_stacks())
+    else:
+      run_prompt(args.engine, args.optimize, args.optimizer_report, output)
+  finally:
+    if stream != None: stream.close()
+
 
 if __name__ == "__main__":
   main(sys.argv)